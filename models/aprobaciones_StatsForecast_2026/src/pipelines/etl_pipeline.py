@@ -1,40 +1,32 @@
 import pandas as pd
-import requests
+import sys
 import yaml
 import logging
 from pathlib import Path
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.ckan import extract_raw
+from bcie_common.storage import write_table
+from bcie_common.schema import apply_schema
+from bcie_common.instrumentation import instrument
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
+@instrument()
 def run_etl(config_path):
     # Cargar configuracion
     with open(config_path, 'r', encoding='utf-8') as f:
         config = yaml.safe_load(f)
 
-    # Extraccion de datos
-    url = config['api']['base_url']
-    resource_id = config['api']['resource_id']
-    limit = config['api']['limit']
-
+    # Extraccion de datos (completa o incremental segun api.incremental)
     logging.info("Conectando al API CKAN del BCIE...")
     
     try:
-        params = {'resource_id': resource_id, 'limit': limit}
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        data_json = response.json()
-        if not data_json['success']:
-            raise Exception("API Error: La consulta fallo.")
-            
-        records = data_json['result']['records']
-        df = pd.DataFrame(records)
-        logging.info(f"Descarga completada: {len(df)} registros.")
-
-        # Guardar copia cruda
+        # La copia cruda y su checkpoint se guardan en data.raw_path
         raw_path = Path(config['data']['raw_path'])
-        raw_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(raw_path, index=False)
+        df = extract_raw(config['api'], raw_path)
+        logging.info(f"Descarga completada: {len(df)} registros.")
 
     except Exception as e:
         logging.error(f"Error descargando: {e}")
@@ -65,19 +57,16 @@ def run_etl(config_path):
     # Limpieza final
     df = df.dropna(subset=['Fecha_Aprobacion', val_col])
     
-    # Estandarizar columna de grupo (Pais)
-    group_col = config['data']['group_col']
-    if group_col in df.columns:
-        df[group_col] = df[group_col].astype(str).str.upper().str.strip()
-
     # Variables adicionales
     df['Anio'] = df['Fecha_Aprobacion'].dt.year
     df['Mes'] = df['Fecha_Aprobacion'].dt.month
 
+    # Esquema tipado: normalizacion de Pais/Sector y tipos, una sola vez en la ingesta
+    df = apply_schema(df)
+
     # Guardar archivo procesado
     processed_path = Path(config['data']['processed_path'])
-    processed_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(processed_path, index=False)
+    write_table(df, processed_path, config)
     
     logging.info(f"ETL Terminado. Datos listos en: {processed_path}")
 
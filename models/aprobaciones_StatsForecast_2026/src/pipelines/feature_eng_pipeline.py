@@ -1,15 +1,21 @@
 import pandas as pd
+import sys
+from pathlib import Path
 import yaml
 import logging
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table
+
 def load_and_prep_data(config):
     """
     Carga, limpia y agrupa los datos para Prophet.
     """
     logging.info("Cargando y preparando datos...")
     
-    # Cargar CSV
-    df = pd.read_csv(config['data']['filepath'])
+    # Cargar datos (por defecto, la salida del ETL; Parquet tipado si existe)
+    df = read_table(config['data'].get('filepath', config['data']['processed_path']), config=config)
     
     # Convertir fechas
     df[config['data']['date_col']] = pd.to_datetime(df[config['data']['date_col']])
@@ -21,8 +27,8 @@ def load_and_prep_data(config):
     # Ajustamos esto para sumar los montos por mes y por grupo (ej. Pais)
     df_grouped = df.groupby([
         config['data']['group_col'], 
-        pd.Grouper(key=config['data']['date_col'], freq=config['forecast']['freq'])
-    ])[config['data']['value_col']].sum().reset_index()
+        pd.Grouper(key=config['data']['date_col'], freq=config.get('forecast', config['model'])['freq'])
+    ], observed=True)[config['data']['value_col']].sum().reset_index()
     
     # Renombrar columnas para Prophet
     df_prepared = df_grouped.rename(columns={
@@ -1,13 +1,21 @@
 import pandas as pd
+import sys
+import numpy as np
 from statsforecast import StatsForecast
-from statsforecast.models import AutoARIMA, DynamicOptimizedTheta
+from statsforecast.models import AutoARIMA, DynamicOptimizedTheta, Naive
 from joblib import Parallel, delayed
 import yaml
 import logging
 from pathlib import Path
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists, write_table
+from bcie_common.instrumentation import instrument, span
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
+@instrument(kind='fit')
 def train_country_model(group_name, df_group, periods, freq):
     try:
         # 1. Preparar datos y Agrupar ANUALMENTE ('YS')
@@ -63,13 +71,108 @@ def train_country_model(group_name, df_group, periods, freq):
         logging.error(f"Fallo en {group_name}: {e}")
         return pd.DataFrame()
 
+def build_long_frame(df, group_col='Pais', freq='YS'):
+    """
+    Construye el formato largo unique_id/ds/y para todas las series a la vez.
+
+    Replica el resultado de agrupar cada pais con pd.Grouper: los periodos sin
+    aprobaciones dentro del rango de cada serie se completan con 0.
+    """
+    df_sf = df.rename(columns={'Fecha_Aprobacion': 'ds', 'Monto_Aprobado': 'y', group_col: 'unique_id'})
+    # unique_id como texto (el Parquet lo guarda categórico)
+    df_sf['unique_id'] = df_sf['unique_id'].astype(str)
+    df_sf = df_sf.groupby(['unique_id', pd.Grouper(key='ds', freq=freq)])['y'].sum()
+
+    # Matriz fechas x series para rellenar huecos sin iterar por pais
+    wide = df_sf.unstack('unique_id')
+    wide = wide.reindex(pd.date_range(wide.index.min(), wide.index.max(), freq=freq))
+    observed = wide.notna()
+    in_range = observed.cummax() & observed[::-1].cummax()[::-1]
+    wide = wide.fillna(0).where(in_range)
+
+    df_long = wide.rename_axis('ds').stack().dropna().rename('y').reset_index()
+    return df_long[['unique_id', 'ds', 'y']].sort_values(['unique_id', 'ds'], ignore_index=True)
+
+
+# Modelos de respaldo admitidos en `model.fallback_model`
+FALLBACK_MODELS = {'Naive': Naive}
+
+def build_global_forecaster(freq, n_jobs=-1, fallback_model=None):
+    """
+    AutoARIMA + DynamicOptimizedTheta. Con `fallback_model` (p. ej. 'Naive'), si un modelo no
+    ajusta una serie StatsForecast usa el respaldo en su columna sin avisar; sin respaldo
+    (por defecto) el error llega a `train_global_model`, que reintenta serie por serie.
+    """
+    models = [
+        AutoARIMA(season_length=1),
+        DynamicOptimizedTheta(season_length=1)
+    ]
+    fallback = FALLBACK_MODELS[fallback_model]() if fallback_model else None
+    return StatsForecast(models=models, freq=freq, n_jobs=n_jobs, fallback_model=fallback)
+
+def forecast_per_series(df_long, periods, freq, fallback_model=None):
+    """
+    Reintento serie por serie cuando el ajuste global falla: como en el modo por pais, una
+    serie con error se registra y se omite sin descartar las demas.
+    """
+    sf = build_global_forecaster(freq, n_jobs=1, fallback_model=fallback_model)
+    partes = []
+    for unique_id, df_serie in df_long.groupby('unique_id', sort=False):
+        try:
+            partes.append(sf.forecast(df=df_serie, h=periods, level=[80]).reset_index())
+        except Exception as e:
+            logging.error(f"Fallo en {unique_id}: {e}")
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+@instrument(kind='fit')
+def train_global_model(df_long, periods, freq, n_jobs=-1, fallback_model=None):
+    """
+    Ajusta AutoARIMA y DynamicOptimizedTheta una sola vez sobre todas las series.
+
+    StatsForecast reparte las series entre procesos (n_jobs), por lo que el tiempo
+    escala con el numero de nucleos. El ensemble (promedio) y la combinacion de
+    intervalos (min/max) se calculan columna a columna sobre todas las series.
+    Si el ajuste global falla se reintenta serie por serie (`forecast_per_series`): las
+    series con error se registran y se omiten, como en el modo por pais. Con
+    `fallback_model` un modelo que falla en una serie se reemplaza por el respaldo.
+    """
+    # Series con menos de 2 periodos no se pueden ajustar (mismo criterio que por pais)
+    sizes = df_long.groupby('unique_id')['ds'].transform('size')
+    df_long = df_long[sizes >= 2]
+    if df_long.empty: return pd.DataFrame()
+
+    # forecast() ajusta y predice sin conservar los modelos ajustados en memoria
+    try:
+        sf = build_global_forecaster(freq, n_jobs=n_jobs, fallback_model=fallback_model)
+        forecast = sf.forecast(df=df_long, h=periods, level=[80])
+    except Exception as e:
+        logging.error(f"Fallo el ajuste global ({e}); se reintenta serie por serie.")
+        forecast = forecast_per_series(df_long, periods, freq, fallback_model)
+        if forecast.empty: return pd.DataFrame()
+    if 'unique_id' not in forecast.columns:
+        forecast = forecast.reset_index()
+
+    # LOGICA ENSEMBLE (PROMEDIO) vectorizada para todas las series
+    forecast['yhat'] = (forecast['AutoARIMA'].to_numpy() + forecast['DynamicOptimizedTheta'].to_numpy()) / 2
+    forecast['yhat_lower'] = np.minimum(forecast['AutoARIMA-lo-80'].to_numpy(), forecast['DynamicOptimizedTheta-lo-80'].to_numpy())
+    forecast['yhat_upper'] = np.maximum(forecast['AutoARIMA-hi-80'].to_numpy(), forecast['DynamicOptimizedTheta-hi-80'].to_numpy())
+
+    # FILTRO CRITICO: Solo fechas ESTRICTAMENTE MAYORES a la ultima real de cada serie
+    last_real_date = df_long.groupby('unique_id')['ds'].max()
+    forecast = forecast[forecast['ds'] > forecast['unique_id'].map(last_real_date)]
+
+    res = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+    res['Pais'] = forecast['unique_id'].to_numpy()
+    return res.reset_index(drop=True)
+
+@instrument()
 def run_training(config_path):
     with open(config_path, 'r') as f: config = yaml.safe_load(f)
     data_path = config['data']['processed_path']
     # Ajuste de ruta si estamos ejecutando desde root del proyecto
-    if not Path(data_path).exists(): return
+    if not table_exists(data_path, config=config): return
 
-    df = pd.read_csv(data_path)
+    df = read_table(data_path, config=config)
     df['Fecha_Aprobacion'] = pd.to_datetime(df['Fecha_Aprobacion'])
 
     # Parametros
@@ -78,19 +181,31 @@ def run_training(config_path):
     
     logging.info(f"Entrenando modelos para {len(paises)} paises (Ensemble AutoARIMA + Theta)...")
 
-    # Paralelizacion
-    # Nota: StatsForecast ya es eficiente, pero mantenemos paralelismo por paises si se desea
-    # O podríamos pasar todo el DF a StatsForecast, pero para mantener logica existente:
-    
-    resultados = Parallel(n_jobs=-1, backend="threading")(
-        delayed(train_country_model)(pais, df[df['Pais'] == pais], horizonte, 'YS') for pais in paises
-    )
+    training_mode = config['model'].get('training_mode', 'global')
+
+    with span('fit', kind='fit', mode=training_mode) as fit_span:
+        fit_span.rows = len(df)
+        if training_mode == 'global':
+            # Un solo ajuste para todas las series con paralelismo por procesos de StatsForecast
+            n_jobs = config['model'].get('n_jobs', -1)
+            fallback_model = config['model'].get('fallback_model')
+            if fallback_model:
+                logging.warning(f"Respaldo {fallback_model} activo: un modelo que no ajuste una serie se reemplaza sin aviso.")
+            df_long = build_long_frame(df, 'Pais', 'YS')
+            resultados = [train_global_model(df_long, horizonte, 'YS', n_jobs=n_jobs, fallback_model=fallback_model)]
+        else:
+            # Paralelizacion
+            # Nota: StatsForecast ya es eficiente, pero mantenemos paralelismo por paises si se desea
+            # O podríamos pasar todo el DF a StatsForecast, pero para mantener logica existente:
+
+            resultados = Parallel(n_jobs=-1, backend="threading")(
+                delayed(train_country_model)(pais, df[df['Pais'] == pais], horizonte, 'YS') for pais in paises
+            )
     
     if resultados:
         final_df = pd.concat(resultados, ignore_index=True)
         output_path = "data/04-predictions/predicciones_bcie.csv"
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        final_df.to_csv(output_path, index=False)
+        write_table(final_df, output_path, config)
         logging.info("Predicciones futuras guardadas correctamente (AutoARIMA).")
 
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ Pipeline de generación de visualizaciones (StatsForecast).
 Ruta: src/pipelines/visualization_pipeline.py
 """
 import yaml
+import sys
 import pandas as pd
 import logging
 import os
@@ -13,8 +14,14 @@ from datetime import datetime
 from src.dashboard.logic import prepare_unified_data, process_executive_data
 from src.dashboard.layout import get_dashboard_html, get_executive_html
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists
+from bcie_common.instrumentation import instrument
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
+@instrument()
 def generate_plots(config_path):
     """Genera el Dashboard de Predicciones (StatsForecast AutoARIMA + Theta) y Ejecutivo."""
     with open(config_path, 'r') as f:
@@ -31,18 +38,18 @@ def generate_plots(config_path):
     output_dir_strat.mkdir(parents=True, exist_ok=True)
     output_dir_exec.mkdir(parents=True, exist_ok=True)
 
-    if not pred_path.exists():
+    if not table_exists(pred_path, config=config):
         logging.error(f"No se encontró el archivo de predicciones en: {pred_path}")
         return
 
     logging.info("Cargando datos...")
     try:
         try:
-            df_pred = pd.read_csv(pred_path, encoding='utf-8-sig')
-            df_hist = pd.read_csv(data_path, encoding='utf-8-sig')
+            df_pred = read_table(pred_path, encoding='utf-8-sig', config=config)
+            df_hist = read_table(data_path, encoding='utf-8-sig', config=config)
         except:
-            df_pred = pd.read_csv(pred_path, encoding='latin-1')
-            df_hist = pd.read_csv(data_path, encoding='latin-1')
+            df_pred = read_table(pred_path, encoding='latin-1', config=config)
+            df_hist = read_table(data_path, encoding='latin-1', config=config)
 
         # --- DASHBOARD ESTRATÉGICO (PREDICTIVO) ---
         logging.info("Procesando datos unificados (Estratégico)...")
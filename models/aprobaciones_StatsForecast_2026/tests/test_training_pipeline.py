@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('statsforecast')
+
+from src.pipelines.training_pipeline import build_long_frame, train_country_model, train_global_model
+
+
+def approvals(rng):
+    rows = []
+    for pais, years in {'Honduras': range(2000, 2016), 'Guatemala': range(2003, 2016), 'Panamá': range(2006, 2016)}.items():
+        for year in years:
+            # Años sin aprobaciones dentro del rango: el modo global los completa con 0, como pd.Grouper
+            if year % 7 == 0 and pais != 'Honduras':
+                continue
+            for _ in range(rng.integers(1, 4)):
+                rows.append({'Pais': pais, 'Fecha_Aprobacion': pd.Timestamp(f'{year}-{rng.integers(1, 13):02d}-15'),
+                             'Monto_Aprobado': rng.uniform(1e6, 5e7)})
+    return pd.DataFrame(rows)
+
+
+def test_global_forecast_matches_per_country_models():
+    df = approvals(np.random.default_rng(0))
+
+    per_country = pd.concat(
+        [train_country_model(pais, df[df['Pais'] == pais], 3, 'YS') for pais in df['Pais'].unique()],
+        ignore_index=True
+    )
+    global_fit = train_global_model(build_long_frame(df, 'Pais', 'YS'), 3, 'YS', n_jobs=1)
+
+    key = ['Pais', 'ds']
+    per_country = per_country.sort_values(key, ignore_index=True)
+    global_fit = global_fit.sort_values(key, ignore_index=True)
+    assert len(per_country) == 9
+    pd.testing.assert_frame_equal(global_fit[per_country.columns], per_country, check_dtype=False, rtol=1e-6)
@@ -1,6 +1,6 @@
 import sys
 import os
-import traceback
+import yaml
 
 # Mensaje inicial de ejecución
 print("Iniciando ejecución del script principal (Modelo TimesFM)...")
@@ -9,25 +9,60 @@ print("Iniciando ejecución del script principal (Modelo TimesFM)...")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 if BASE_DIR not in sys.path:
     sys.path.append(BASE_DIR)
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(os.path.dirname(BASE_DIR))
 
 try:
     from src.pipelines.etl_pipeline import run_etl
     from src.pipelines.inference_pipeline import run_forecasting
     from src.pipelines.evaluation_pipeline import run_evaluation
     from src.pipelines.visualization_pipeline import generate_plots
+    from bcie_common.stages import Stage, main as run_pipeline
     
     print("Las librerías y módulos necesarios se han importado correctamente.")
 except ImportError as e:
     print(f"Error crítico: No fue posible importar los módulos requeridos. Detalles: {e}")
     sys.exit(1)
 
+def build_stages(config_path):
+    """
+    Etapas del pipeline. Cada etapa se omite cuando su configuración, su código y los artefactos
+    de las etapas previas no cambiaron desde la última ejecución exitosa.
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    paths = config.get('paths', {})
+    evaluation_path = paths.get('evaluation_path', "data/05-evaluation")
+    predictions_path = os.path.join(paths.get('predictions_path', "data/04-predictions"), "predicciones_bcie.csv")
+
+    return [
+        # Etapa 1: ETL; se ejecuta siempre (extracción incremental y con cache compartida)
+        Stage('etl', run_etl, [config_path], config=['api', 'data'],
+              outputs=[config['data']['processed_path']], always=True),
+        # Etapa 2: Evaluación; un fallo no bloquea los pronósticos
+        Stage('evaluation', run_evaluation, [config_path], config=['data', 'model', 'paths'],
+              deps=['etl'], required=False,
+              outputs=[os.path.join(evaluation_path, "backtesting_results.csv"),
+                       os.path.join(evaluation_path, "residual_stats.csv")]),
+        # Etapa 3: Pronósticos (usa los residuales de la evaluación para los intervalos)
+        Stage('forecasting', run_forecasting, [config_path], config=['data', 'model', 'paths'],
+              deps=['etl', 'evaluation'], outputs=[predictions_path]),
+        # Etapa 4: Visualización y reportes
+        Stage('visualization', generate_plots, [config_path], config=['data', 'paths'],
+              deps=['etl', 'forecasting'], code=['src/dashboard'], required=False,
+              outputs=["data/05-reporting/dashboard_proyecciones_2026.html",
+                       "data/05-reporting/dashboard_ejecutivo_bcie.html"])
+    ]
+
 def main():
     """
-    Función principal que orquesta la ejecución secuencial de los pipelines:
+    Función principal que orquesta los pipelines en orden:
     1. ETL: Extracción y transformación de datos.
     2. Evaluación: Validación histórica del modelo.
     3. Inferencia: Generación de proyecciones futuras.
     4. Visualización: Creación de reportes y gráficos.
+
+    Uso: python run.py [--force etl|evaluation|forecasting|visualization|all]
     """
     config_path = os.path.join(BASE_DIR, "config", "local.yaml")
 
@@ -35,42 +70,15 @@ def main():
         print(f"Error: El archivo de configuración no se encuentra en la ruta esperada: {config_path}")
         return
 
-    # Etapa 1: Extracción y Transformación (ETL)
-    print("\n--- Etapa 1: Proceso ETL (Extracción, Transformación y Carga) ---")
-    try:
-        run_etl(config_path)
-    except Exception as e:
-        print(f"La etapa de ETL ha fallado: {e}")
-        return
-
-    # Etapa 2: Evaluación y Backtesting
-    print("\n--- Etapa 2: Evaluación del Modelo (Backtesting y Validación) ---")
-    try:
-        run_evaluation(config_path)
-    except Exception as e:
-        print(f"Advertencia: Se produjo un error durante la evaluación: {e}")
-        # El proceso continúa, ya que la evaluación no bloquea la generación de pronósticos,
-        # aunque es recomendable revisar los logs.
-        traceback.print_exc()
-
-    # Etapa 3: Generación de Pronósticos
-    print("\n--- Etapa 3: Ejecución de Pronósticos con TimesFM ---")
-    try:
-        run_forecasting(config_path)
-    except Exception as e:
-        print(f"Error: No se pudieron generar los pronósticos: {e}")
-        traceback.print_exc()
-        return
-
-    # Etapa 4: Visualización y Reportes
-    print("\n--- Etapa 4: Generación de Reportes y Visualizaciones ---")
-    try:
-        generate_plots(config_path)
-    except Exception as e:
-        print(f"Error: Falló la generación de los gráficos finales: {e}")
-        traceback.print_exc()
+    report = run_pipeline(
+        build_stages(config_path), config_path, description="Pipeline TimesFM BCIE",
+        state_dir=os.path.join(BASE_DIR, ".cache", "pipeline")
+    )
 
-    print("\nEl proceso ha finalizado exitosamente.")
+    if report['success']:
+        print("\nEl proceso ha finalizado exitosamente.")
+    else:
+        print("\nEl proceso se detuvo por un error (ver el resumen de etapas).")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,160 @@
+"""
+Registro de Modelos TimesFM
+
+Mantiene una única instancia del modelo por proceso para que las etapas de evaluación
+e inferencia (ejecutadas de forma consecutiva desde run.py) compartan los mismos pesos
+en memoria en lugar de deserializarlos dos veces.
+
+Si en la configuración se define `model.local_model_dir`, los pesos se leen desde ese
+directorio en formato safetensors (memory-mapped), evitando la descarga y reduciendo la
+lectura de disco en los arranques en frío. Si el directorio aún no existe, el modelo se
+descarga de Hugging Face una sola vez y se guarda allí para las siguientes ejecuciones.
+
+También centraliza el modo de ejecución en CPU (`model.cpu_execution`): cuantización
+dinámica int8 de las capas lineales, autocast bf16 y control de hilos de torch.
+"""
+
+import os
+import logging
+import threading
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPO_ID = "google/timesfm-2.0-500m-pytorch"
+
+_MODEL_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+CPU_EXECUTION_DEFAULTS = {
+    'num_threads': None,       # torch.set_num_threads (None = valor por defecto de torch)
+    'quantize_int8': False,    # Cuantización dinámica int8 de nn.Linear
+    'bf16_autocast': False,    # Autocast bfloat16 durante la inferencia
+    'compare_fp32': False      # Reporta la diferencia de precisión frente a fp32 en la evaluación
+}
+
+
+def _import_model_class():
+    try:
+        from transformers.models.timesfm.modeling_timesfm import TimesFmModelForPrediction
+    except ImportError:
+        logger.warning("Importación específica fallida, intentando carga genérica con AutoModel...")
+        from transformers import AutoModelForTimeSeriesForecasting as TimesFmModelForPrediction
+    return TimesFmModelForPrediction
+
+
+def _has_safetensors(model_dir):
+    return os.path.isdir(model_dir) and any(
+        name.endswith(".safetensors") for name in os.listdir(model_dir)
+    )
+
+
+def get_device():
+    """Selecciona el dispositivo de procesamiento disponible (GPU/CPU)."""
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def get_cpu_execution_settings(config, device=None):
+    """
+    Devuelve la configuración efectiva del modo de ejecución en CPU.
+
+    Las optimizaciones solo se activan cuando el dispositivo es CPU. La cuantización
+    int8 y el autocast bf16 son excluyentes: las capas cuantizadas operan en fp32.
+    """
+    settings = dict(CPU_EXECUTION_DEFAULTS)
+    settings.update(config.get('model', {}).get('cpu_execution') or {})
+
+    if (device or get_device()) != "cpu":
+        settings['quantize_int8'] = False
+        settings['bf16_autocast'] = False
+
+    if settings['quantize_int8'] and settings['bf16_autocast']:
+        logger.warning("bf16_autocast no es compatible con quantize_int8; se utilizará solo int8.")
+        settings['bf16_autocast'] = False
+
+    settings['precision'] = (
+        'int8' if settings['quantize_int8'] else 'bf16' if settings['bf16_autocast'] else 'fp32'
+    )
+    return settings
+
+
+def configure_cpu_runtime(config):
+    """Aplica el número de hilos de torch configurado en `model.cpu_execution`."""
+    settings = get_cpu_execution_settings(config)
+    if settings['num_threads']:
+        torch.set_num_threads(int(settings['num_threads']))
+    logger.info(f"Hilos de torch: {torch.get_num_threads()} | Precisión: {settings['precision']}")
+    return settings
+
+
+def get_model(config, device=None, precision=None):
+    """
+    Devuelve el modelo TimesFM listo para inferencia, cargándolo solo la primera vez.
+
+    Args:
+        config: Diccionario de configuración (se usa la sección `model`).
+        device: Dispositivo destino. Si es None se selecciona automáticamente.
+        precision: 'fp32' o 'int8'. Si es None se toma de `model.cpu_execution`.
+            La variante int8 se deriva de la instancia fp32 registrada.
+
+    Returns:
+        model, device
+    """
+    model_cfg = config.get('model', {})
+    repo_id = model_cfg.get('repo_id', DEFAULT_REPO_ID)
+    local_dir = model_cfg.get('local_model_dir')
+    device = device or get_device()
+
+    if precision is None:
+        precision = get_cpu_execution_settings(config, device)['precision']
+    if precision == 'int8':
+        return _get_quantized_model(config, device), device
+
+    source = local_dir if local_dir and _has_safetensors(local_dir) else repo_id
+    cache_key = (source, device)
+
+    with _CACHE_LOCK:
+        if cache_key in _MODEL_CACHE:
+            logger.info(f"Reutilizando modelo ya cargado en memoria: {source} ({device})")
+            return _MODEL_CACHE[cache_key], device
+
+        model_class = _import_model_class()
+        logger.info(f"Cargando arquitectura del modelo: {source}. Dispositivo en uso: {device}")
+
+        # safetensors se abre con memory-map: solo se leen de disco los tensores utilizados
+        model = model_class.from_pretrained(
+            source,
+            trust_remote_code=True,
+            device_map=device,
+            use_safetensors=(source == local_dir) or None,
+            low_cpu_mem_usage=True
+        )
+        model.eval()
+
+        if local_dir and source != local_dir:
+            logger.info(f"Guardando copia local del modelo (safetensors) en: {local_dir}")
+            os.makedirs(local_dir, exist_ok=True)
+            model.save_pretrained(local_dir, safe_serialization=True)
+
+        _MODEL_CACHE[cache_key] = model
+        return model, device
+
+
+def _get_quantized_model(config, device):
+    base_model, _ = get_model(config, device, precision='fp32')
+    cache_key = (id(base_model), 'int8')
+
+    with _CACHE_LOCK:
+        if cache_key not in _MODEL_CACHE:
+            logger.info("Aplicando cuantización dinámica int8 a las capas lineales...")
+            _MODEL_CACHE[cache_key] = torch.ao.quantization.quantize_dynamic(
+                base_model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return _MODEL_CACHE[cache_key]
+
+
+def clear_model_cache():
+    """Libera las instancias registradas (útil en pruebas o procesos de larga duración)."""
+    with _CACHE_LOCK:
+        _MODEL_CACHE.clear()
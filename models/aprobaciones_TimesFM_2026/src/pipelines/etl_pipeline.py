@@ -1,12 +1,20 @@
 import pandas as pd
-import requests
+import sys
 import yaml
 import logging
 from pathlib import Path
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.ckan import extract_raw
+from bcie_common.storage import write_table
+from bcie_common.schema import apply_schema
+from bcie_common.instrumentation import instrument
+
 # Configuración del registro de eventos (logging)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
+@instrument()
 def run_etl(config_path):
     """
     Ejecuta el proceso ETL (Extracción, Transformación y Carga).
@@ -18,30 +26,14 @@ def run_etl(config_path):
     with open(config_path, 'r', encoding='utf-8') as f:
         config = yaml.safe_load(f)
 
-    # 2. Extracción de Datos
-    url = config['api']['base_url']
-    resource_id = config['api']['resource_id']
-    limit = config['api']['limit']
-
+    # 2. Extracción de Datos (completa o incremental según api.incremental)
     logging.info("Estableciendo conexión con el API de Datos Abiertos del BCIE...")
     
     try:
-        params = {'resource_id': resource_id, 'limit': limit}
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        data_json = response.json()
-        if not data_json['success']:
-            raise Exception("Error del API: La consulta no fue exitosa.")
-            
-        records = data_json['result']['records']
-        df = pd.DataFrame(records)
-        logging.info(f"Descarga exitosa: Se han obtenido {len(df)} registros.")
-
-        # Guardar copia de seguridad de los datos crudos
+        # La copia cruda y su checkpoint incremental se guardan en data.raw_path
         raw_path = Path(config['data']['raw_path'])
-        raw_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(raw_path, index=False)
+        df = extract_raw(config['api'], raw_path)
+        logging.info(f"Descarga exitosa: Se han obtenido {len(df)} registros.")
 
     except Exception as e:
         logging.error(f"Error durante la descarga de datos: {e}")
@@ -72,19 +64,16 @@ def run_etl(config_path):
     # Eliminación de registros con datos faltantes clave
     df = df.dropna(subset=['Fecha_Aprobacion', val_col])
     
-    # Estandarización de la columna de agrupación (País)
-    group_col = config['data']['group_col']
-    if group_col in df.columns:
-        df[group_col] = df[group_col].astype(str).str.upper().str.strip()
-
     # Creación de variables temporales adicionales
     df['Anio'] = df['Fecha_Aprobacion'].dt.year
     df['Mes'] = df['Fecha_Aprobacion'].dt.month
 
+    # Esquema tipado: normalización de País/Sector y tipos, una sola vez en la ingesta
+    df = apply_schema(df)
+
     # 4. Carga (Guardado de datos procesados)
     processed_path = Path(config['data']['processed_path'])
-    processed_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(processed_path, index=False)
+    write_table(df, processed_path, config)
     
     logging.info(f"Proceso ETL finalizado correctamente. Datos disponibles en: {processed_path}")
 
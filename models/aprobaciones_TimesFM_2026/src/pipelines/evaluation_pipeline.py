@@ -7,6 +7,8 @@ Este módulo se encarga de analizar la robustez y precisión del modelo TimesFM
 """
 
 import pandas as pd
+import sys
+from pathlib import Path
 import numpy as np
 import yaml
 import torch
@@ -14,8 +16,15 @@ import os
 from datetime import datetime
 import logging
 import traceback
+from src.model_registry import configure_cpu_runtime, get_model
+from src.pipelines.inference_pipeline import build_context_batch, predict_batched, predict_series
 from sklearn.metrics import mean_squared_error, mean_absolute_percentage_error, mean_absolute_error
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists
+from bcie_common.instrumentation import instrument
+
 # Configuración del registro de eventos (logging)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -25,7 +34,8 @@ def load_config(config_path):
         return yaml.safe_load(f)
 
 
-def time_series_cross_validation(country_data, model, device, value_col, n_splits=3, horizon=2):
+def time_series_cross_validation(country_data, model, device, value_col, n_splits=3, horizon=2, context_len=None,
+                                 bf16_autocast=False):
     """
     Realiza una validación cruzada temporal (Rolling Window).
     
@@ -33,6 +43,8 @@ def time_series_cross_validation(country_data, model, device, value_col, n_split
     - Iteración 1: Entrenar hasta 2018, Validar 2019-2020
     - Iteración 2: Entrenar hasta 2020, Validar 2021-2022
     - Iteración 3: Entrenar hasta 2022, Validar 2023-2024
+
+    `bf16_autocast` aplica el mismo modo de ejecución en CPU que la evaluación por lotes.
     
     Returns:
         Lista de diccionarios con las métricas de error (MAPE, RMSE, MAE) por cada iteración.
@@ -71,15 +83,11 @@ def time_series_cross_validation(country_data, model, device, value_col, n_split
         
         # Preparación de Tensores
         history_values = train_data[value_col].values
-        input_tensor = torch.tensor(history_values, dtype=torch.float32).unsqueeze(0).to(device)
-        freq_tensor = torch.tensor([0]).to(device)
+        if context_len:
+            history_values = history_values[-context_len:]
         
         try:
-            with torch.no_grad():
-                outputs = model(past_values=input_tensor, freq=freq_tensor)
-                forecast = outputs.mean_predictions
-                
-            forecast_values = forecast.cpu().numpy().squeeze()
+            forecast_values = predict_series(model, history_values, device, bf16_autocast=bf16_autocast)
             
             # Ajuste de longitud y comparación
             pred_len = len(test_data)
@@ -110,6 +118,188 @@ def time_series_cross_validation(country_data, model, device, value_col, n_split
     return fold_metrics if fold_metrics else None
 
 
+def build_backtest_windows(df_grouped, group_col, value_col, cutoff_year,
+                           n_splits=3, cv_horizon=2, min_train_size=5):
+    """
+    Genera todas las ventanas de evaluación (país, corte) de ambas fases en una sola pasada.
+
+    - Fase A ('backtest'): historia hasta `cutoff_year` y prueba en los años posteriores.
+    - Fase B ('cv'): pliegues de ventana móvil con la misma lógica que
+      `time_series_cross_validation`.
+
+    Las divisiones se obtienen por posición sobre arrays ordenados, sin filtrar
+    DataFrames con `isin`.
+
+    Returns:
+        Lista de diccionarios con la historia, los años y los valores reales de cada ventana.
+    """
+    windows = []
+
+    for country, country_data in df_grouped.groupby(group_col, sort=False, observed=True):
+        order = np.argsort(country_data['Año'].to_numpy(), kind='stable')
+        years = country_data['Año'].to_numpy()[order]
+        values = country_data[value_col].to_numpy(dtype=np.float64)[order]
+        n_years = len(years)
+
+        # Fase A: Backtesting simple
+        n_train = int(np.searchsorted(years, cutoff_year, side='right'))
+        if 0 < n_train < n_years:
+            windows.append({
+                'phase': 'backtest',
+                'country': country,
+                'history': values[:n_train],
+                'test_years': years[n_train:],
+                'y_true': values[n_train:]
+            })
+
+        # Fase B: Validación cruzada (ventana móvil)
+        if n_years < min_train_size + (n_splits * cv_horizon):
+            continue
+
+        for fold in range(n_splits):
+            test_end_idx = n_years - (fold * cv_horizon)
+            test_start_idx = test_end_idx - cv_horizon
+            if test_start_idx < min_train_size:
+                continue
+
+            windows.append({
+                'phase': 'cv',
+                'country': country,
+                'fold': fold + 1,
+                'history': values[:test_start_idx],
+                'train_years': years[:test_start_idx],
+                'test_years': years[test_start_idx:test_end_idx],
+                'y_true': values[test_start_idx:test_end_idx]
+            })
+
+    return windows
+
+
+@instrument(kind='metrics')
+def compute_window_metrics(y_true, y_pred, mask):
+    """
+    Calcula MAPE, RMSE y MAE por ventana sobre matrices rellenadas.
+
+    Args:
+        y_true, y_pred: Arrays (n_windows, max_len) con valores reales y pronosticados.
+        mask: Array booleano (n_windows, max_len); True en las posiciones válidas.
+
+    Returns:
+        mape, rmse, mae: Arrays de longitud n_windows (equivalentes a las métricas de sklearn).
+    """
+    n_valid = mask.sum(axis=1)
+    errors = np.where(mask, y_pred - y_true, 0.0)
+    abs_errors = np.abs(errors)
+
+    # Mismo denominador que sklearn.metrics.mean_absolute_percentage_error
+    denominator = np.maximum(np.abs(y_true), np.finfo(np.float64).eps)
+
+    mape = (abs_errors / denominator).sum(axis=1) / n_valid
+    rmse = np.sqrt((errors ** 2).sum(axis=1) / n_valid)
+    mae = abs_errors.sum(axis=1) / n_valid
+    return mape, rmse, mae
+
+
+def run_backtest_engine(windows, model, device, context_len, batch_size=32, bf16_autocast=False, latencies=None):
+    """
+    Ejecuta todas las ventanas de evaluación con pasadas hacia adelante por lotes.
+
+    `bf16_autocast` y `latencies` se transmiten a `predict_batched`.
+
+    Returns:
+        metrics: Métricas de la Fase A por país.
+        all_results: Detalle año a año de la Fase A (incluye residuales).
+        cv_by_country: Diccionario país -> lista de métricas por pliegue (Fase B).
+    """
+    metrics, all_results, cv_by_country = [], [], {}
+    if not windows:
+        return metrics, all_results, cv_by_country
+
+    contexts = build_context_batch([w['history'] for w in windows], context_len)
+    forecasts = predict_batched(
+        model, contexts, device, batch_size=batch_size,
+        bf16_autocast=bf16_autocast, latencies=latencies
+    )
+
+    # Matrices de prueba rellenadas para calcular todas las métricas a la vez
+    test_lens = np.array([len(w['y_true']) for w in windows])
+    max_len = int(test_lens.max())
+    # Ventanas sin pronóstico (fila NaN tras un fallo del modelo) quedan fuera de las métricas
+    valid = (test_lens <= forecasts.shape[1]) & ~np.isnan(forecasts).all(axis=1)
+
+    y_true = np.zeros((len(windows), max_len), dtype=np.float64)
+    mask = np.arange(max_len)[None, :] < test_lens[:, None]
+    for i, w in enumerate(windows):
+        y_true[i, :test_lens[i]] = w['y_true']
+
+    y_pred = np.zeros_like(y_true)
+    width = min(max_len, forecasts.shape[1])
+    y_pred[:, :width] = np.nan_to_num(forecasts[:, :width])
+
+    mape, rmse, mae = compute_window_metrics(y_true, y_pred, mask)
+
+    for i, w in enumerate(windows):
+        if not valid[i]:
+            continue
+        country = w['country']
+
+        if w['phase'] == 'backtest':
+            for j, year in enumerate(w['test_years']):
+                residual = y_pred[i, j] - y_true[i, j]
+                all_results.append({
+                    'País': country,
+                    'Año': int(year),
+                    'Real': y_true[i, j],
+                    'Predicho': y_pred[i, j],
+                    'Residual': residual,
+                    'Residual_Abs': abs(residual)
+                })
+            metrics.append({'País': country, 'MAPE': mape[i], 'RMSE': rmse[i], 'MAE': mae[i]})
+        else:
+            cv_by_country.setdefault(country, []).append({
+                'fold': w['fold'],
+                'train_years': f"{w['train_years'].min()}-{w['train_years'].max()}",
+                'test_years': f"{w['test_years'].min()}-{w['test_years'].max()}",
+                'MAPE': mape[i],
+                'RMSE': rmse[i],
+                'MAE': mae[i]
+            })
+
+    return metrics, all_results, cv_by_country
+
+
+def compare_with_fp32(windows, metrics, latencies, config, device, context_len, batch_size, precision):
+    """
+    Compara la precisión y latencia del modo de ejecución configurado frente a fp32.
+
+    Reejecuta el backtesting con el modelo fp32 y reporta, por país, la diferencia de
+    MAPE/RMSE/MAE de la Fase A, junto con la latencia media por lote de cada variante.
+
+    Returns:
+        DataFrame con la comparación (una fila por país más una fila 'GLOBAL').
+    """
+    fp32_model, _ = get_model(config, device, precision='fp32')
+    fp32_latencies = []
+    fp32_metrics, _, _ = run_backtest_engine(
+        windows, fp32_model, device, context_len,
+        batch_size=batch_size, latencies=fp32_latencies
+    )
+
+    current_df = pd.DataFrame(metrics).set_index('País')
+    fp32_df = pd.DataFrame(fp32_metrics).set_index('País')
+    comparison = current_df.join(fp32_df, lsuffix=f'_{precision}', rsuffix='_fp32', how='inner')
+
+    for metric in ['MAPE', 'RMSE', 'MAE']:
+        comparison[f'Delta_{metric}'] = comparison[f'{metric}_{precision}'] - comparison[f'{metric}_fp32']
+
+    comparison.loc['GLOBAL'] = comparison.mean(numeric_only=True)
+    comparison[f'Latencia_Lote_ms_{precision}'] = np.mean(latencies) * 1000 if latencies else np.nan
+    comparison['Latencia_Lote_ms_fp32'] = np.mean(fp32_latencies) * 1000 if fp32_latencies else np.nan
+
+    return comparison.reset_index()
+
+
+@instrument()
 def run_evaluation(config_path):
     try:
         logger.info("=" * 60)
@@ -119,10 +309,10 @@ def run_evaluation(config_path):
         
         # 1. Carga de Datos Procesados
         processed_path = config['data']['processed_path']
-        if not os.path.exists(processed_path):
+        if not table_exists(processed_path, config=config):
             raise FileNotFoundError(f"No se encontró el archivo fuente: {processed_path}")
             
-        df = pd.read_csv(processed_path)
+        df = read_table(processed_path, config=config)
         
         # Estandarización de Fechas
         date_col = config['data']['date_col']
@@ -133,7 +323,7 @@ def run_evaluation(config_path):
         df['Año'] = df[date_col].dt.year
         
         # Agrupación por País y Año
-        df_grouped = df.groupby([group_col, 'Año'])[value_col].sum().reset_index()
+        df_grouped = df.groupby([group_col, 'Año'], observed=True)[value_col].sum().reset_index()
         
         # 2. Configuración de Parámetros de Evaluación
         horizon = config['model'].get('horizon_years', 5)
@@ -143,20 +333,14 @@ def run_evaluation(config_path):
         logger.info(f"Último año registrado: {max_year}")
         logger.info(f"Horizonte de predicción definido: {horizon} años")
         
-        # 3. Inicialización del Modelo
-        repo_id = "google/timesfm-2.0-500m-pytorch"
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        
-        logger.info(f"Cargando modelo {repo_id}. Dispositivo en uso: {device}")
-        
-        try:
-            from transformers.models.timesfm.modeling_timesfm import TimesFmModelForPrediction
-        except ImportError:
-            from transformers import AutoModelForTimeSeriesForecasting as TimesFmModelForPrediction
-            
-        model = TimesFmModelForPrediction.from_pretrained(repo_id, trust_remote_code=True, device_map=device)
+        # 3. Inicialización del Modelo (compartido con la etapa de inferencia)
+        execution = configure_cpu_runtime(config)
+        model, device = get_model(config)
         
         countries = df_grouped[group_col].unique()
+        inference_mode = config['model'].get('inference_mode', 'batched')
+        context_len = config['model'].get('context_len', 12)
+        batch_size = config['model'].get('batch_size', 32)
         
         # ========================================
         # FASE A: BACKTESTING SIMPLE
@@ -168,58 +352,72 @@ def run_evaluation(config_path):
         
         metrics = []
         all_results = []
+        cv_by_country = None
         
-        for country in countries:
-            country_data = df_grouped[df_grouped[group_col] == country].sort_values('Año')
+        if inference_mode == 'batched':
+            # Todas las ventanas (Fase A y Fase B) se evalúan en unas pocas pasadas por lotes
+            windows = build_backtest_windows(
+                df_grouped, group_col, value_col, cutoff_year,
+                n_splits=3, cv_horizon=2
+            )
+            logger.info(f"Evaluando {len(windows)} ventanas por lotes (batch_size={batch_size}, context_len={context_len})")
+            latencies = []
+            metrics, all_results, cv_by_country = run_backtest_engine(
+                windows, model, device, context_len, batch_size=batch_size,
+                bf16_autocast=execution['bf16_autocast'], latencies=latencies
+            )
+            logger.info(
+                f"Latencia media por lote ({execution['precision']}): "
+                f"{np.mean(latencies) * 1000:.1f} ms en {len(latencies)} lotes"
+            )
+        else:
+            for country in countries:
+                country_data = df_grouped[df_grouped[group_col] == country].sort_values('Año')
             
-            # División de datos (Train/Test)
-            train = country_data[country_data['Año'] <= cutoff_year]
-            test = country_data[country_data['Año'] > cutoff_year]
+                # División de datos (Train/Test)
+                train = country_data[country_data['Año'] <= cutoff_year]
+                test = country_data[country_data['Año'] > cutoff_year]
             
-            if len(test) == 0 or len(train) == 0:
-                continue
+                if len(test) == 0 or len(train) == 0:
+                    continue
                 
-            history_values = train[value_col].values
-            input_tensor = torch.tensor(history_values, dtype=torch.float32).unsqueeze(0).to(device)
-            freq_tensor = torch.tensor([0]).to(device)
+                history_values = train[value_col].values[-context_len:]
+                # Mismo modo de ejecución en CPU (inference_mode, autocast bf16) que por lotes
+                forecast_values = predict_series(
+                    model, history_values, device, bf16_autocast=execution['bf16_autocast']
+                )
             
-            with torch.no_grad():
-                outputs = model(past_values=input_tensor, freq=freq_tensor)
-                forecast = outputs.mean_predictions
+                pred_len = len(test)
+                if len(forecast_values) < pred_len:
+                    continue
                 
-            forecast_values = forecast.cpu().numpy().squeeze()
-            
-            pred_len = len(test)
-            if len(forecast_values) < pred_len:
-                continue
-                
-            y_pred = forecast_values[:pred_len]
-            y_true = test[value_col].values
+                y_pred = forecast_values[:pred_len]
+                y_true = test[value_col].values
             
-            # Registro detallado de resultados (incluyendo análisis de residuales)
-            for i in range(pred_len):
-                residual = y_pred[i] - y_true[i]
-                all_results.append({
-                    'País': country,
-                    'Año': test.iloc[i]['Año'],
-                    'Real': y_true[i],
-                    'Predicho': y_pred[i],
-                    'Residual': residual,
-                    'Residual_Abs': abs(residual)
-                })
+                # Registro detallado de resultados (incluyendo análisis de residuales)
+                for i in range(pred_len):
+                    residual = y_pred[i] - y_true[i]
+                    all_results.append({
+                        'País': country,
+                        'Año': test.iloc[i]['Año'],
+                        'Real': y_true[i],
+                        'Predicho': y_pred[i],
+                        'Residual': residual,
+                        'Residual_Abs': abs(residual)
+                    })
 
-            try:
-                mape = mean_absolute_percentage_error(y_true, y_pred)
-                rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-                mae = mean_absolute_error(y_true, y_pred)
-                metrics.append({
-                    'País': country, 
-                    'MAPE': mape, 
-                    'RMSE': rmse, 
-                    'MAE': mae
-                })
-            except Exception:
-                pass
+                try:
+                    mape = mean_absolute_percentage_error(y_true, y_pred)
+                    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
+                    mae = mean_absolute_error(y_true, y_pred)
+                    metrics.append({
+                        'País': country, 
+                        'MAPE': mape, 
+                        'RMSE': rmse, 
+                        'MAE': mae
+                    })
+                except Exception:
+                    pass
         
         # Exportación de resultados de Backtesting
         results_df = pd.DataFrame(all_results)
@@ -246,6 +444,23 @@ def run_evaluation(config_path):
             logger.info(f"MAPE Promedio Global: {avg_mape:.2%}")
             logger.info(f"RMSE Promedio Global: {avg_rmse:,.2f}")
         
+        # Comparación del modo de ejecución en CPU frente a fp32
+        if execution['compare_fp32'] and inference_mode != 'batched':
+            logger.warning("compare_fp32 solo está disponible con inference_mode 'batched'; no se genera cpu_execution_report.csv.")
+        if (metrics and inference_mode == 'batched' and execution['compare_fp32']
+                and execution['precision'] != 'fp32'):
+            comparison_df = compare_with_fp32(
+                windows, metrics, latencies, config, device,
+                context_len, batch_size, execution['precision']
+            )
+            comparison_df.to_csv(os.path.join(evaluation_path, "cpu_execution_report.csv"), index=False)
+            global_row = comparison_df[comparison_df['País'] == 'GLOBAL'].iloc[0]
+            logger.info(
+                f"Modo {execution['precision']} vs fp32 -> Delta MAPE: {global_row['Delta_MAPE']:+.2%} | "
+                f"Latencia por lote: {global_row[f'Latencia_Lote_ms_' + execution['precision']]:.1f} ms "
+                f"vs {global_row['Latencia_Lote_ms_fp32']:.1f} ms"
+            )
+        
         # ========================================
         # FASE B: VALIDACIÓN CRUZADA (CROSS-VALIDATION)
         # ========================================
@@ -258,12 +473,15 @@ def run_evaluation(config_path):
         cv_summary = []
         
         for country in countries:
-            country_data = df_grouped[df_grouped[group_col] == country].sort_values('Año')
-            
-            fold_metrics = time_series_cross_validation(
-                country_data, model, device, value_col,
-                n_splits=3, horizon=2
-            )
+            if cv_by_country is not None:
+                fold_metrics = cv_by_country.get(country)
+            else:
+                country_data = df_grouped[df_grouped[group_col] == country].sort_values('Año')
+                fold_metrics = time_series_cross_validation(
+                    country_data, model, device, value_col,
+                    n_splits=3, horizon=2, context_len=context_len,
+                    bf16_autocast=execution['bf16_autocast']
+                )
             
             if fold_metrics:
                 for fm in fold_metrics:
@@ -3,6 +3,7 @@ Pipeline para generar el Dashboard Ejecutivo Histórico (Datos Reales).
 Ruta: src/pipelines/historical_pipeline.py
 """
 import yaml
+import sys
 import pandas as pd
 import logging
 import os
@@ -13,8 +14,14 @@ from src.dashboard.logic import process_executive_data
 from src.dashboard.layout import get_executive_html
 from datetime import datetime
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists
+from bcie_common.instrumentation import instrument
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
+@instrument()
 def generate_historical_report(config_path):
     with open(config_path, 'r') as f:
         config = yaml.safe_load(f)
@@ -26,15 +33,15 @@ def generate_historical_report(config_path):
     output_dir = base_dir / "src/dashboard"
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    if not data_path.exists():
+    if not table_exists(data_path, config=config):
         logging.error(f"❌ No se encontró el archivo de datos reales en: {data_path}")
         return
 
     logging.info(f"Cargando datos reales desde: {data_path}")
     try:
-        df = pd.read_csv(data_path, encoding='utf-8-sig')
+        df = read_table(data_path, encoding='utf-8-sig', config=config)
     except:
-        df = pd.read_csv(data_path, encoding='latin-1')
+        df = read_table(data_path, encoding='latin-1', config=config)
 
     logging.info("Procesando datos para indicadores ejecutivos...")
     data_processed = process_executive_data(df)
@@ -7,14 +7,23 @@ valores futuros. Además, calcula intervalos de confianza basados en la variabil
 """
 
 import pandas as pd
+import sys
+from pathlib import Path
 import numpy as np
 import yaml
 import torch
-from transformers import AutoModel, AutoConfig
 import os
 from datetime import datetime
 import logging
+import time
 import traceback
+from contextlib import contextmanager
+from src.model_registry import configure_cpu_runtime, get_model
+
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists, write_table
+from bcie_common.instrumentation import instrument
 
 # Configuración del registro de eventos (logging)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -94,6 +103,99 @@ def calculate_confidence_intervals(predictions, country, residual_stats, confide
     return lower_bounds, upper_bounds
 
 
+def build_context_batch(series_list, context_len):
+    """
+    Recorta cada serie a sus últimos `context_len` valores (float32) para la inferencia por lotes.
+
+    TimesFM (Transformers) recibe una secuencia de tensores de longitud variable y se encarga
+    internamente del relleno a la izquierda y de su máscara, por lo que aquí no se construye
+    una matriz rellenada.
+
+    Args:
+        series_list: Lista de arrays 1-D con la historia de cada serie (orden cronológico).
+        context_len: Número máximo de periodos de contexto por serie.
+
+    Returns:
+        Lista de arrays float32 (uno por serie) con a lo sumo `context_len` valores.
+    """
+    return [np.asarray(history, dtype=np.float32)[-context_len:] for history in series_list]
+
+
+@contextmanager
+def inference_context(bf16_autocast=False):
+    """
+    Contexto de toda pasada hacia adelante, por lotes o secuencial: `torch.inference_mode` y,
+    si el modo de ejecución en CPU lo indica, autocast bfloat16.
+    """
+    with torch.inference_mode(), torch.autocast(device_type="cpu", dtype=torch.bfloat16, enabled=bf16_autocast):
+        yield
+
+
+def predict_series(model, history, device, bf16_autocast=False):
+    """
+    Pronóstico medio de una sola serie (modo secuencial y respaldo del modo por lotes).
+
+    Returns:
+        Array 1-D con las predicciones del horizonte del modelo.
+    """
+    input_tensor = torch.tensor(np.asarray(history, dtype=np.float32)).unsqueeze(0).to(device)
+    freq_tensor = torch.tensor([0]).to(device)
+    with inference_context(bf16_autocast):
+        outputs = model(past_values=input_tensor, freq=freq_tensor)
+    return outputs.mean_predictions.float().cpu().numpy().reshape(-1)
+
+
+@instrument(kind='fit')
+def predict_batched(model, contexts, device, batch_size=32, bf16_autocast=False, latencies=None):
+    """
+    Ejecuta TimesFM sobre las series en bloques de `batch_size`.
+
+    Si un bloque falla, sus series se reintentan una a una (`predict_series`); una serie que
+    también falla queda sin pronóstico (fila NaN) sin detener las demás.
+
+    Args:
+        contexts: Historias por serie (ver `build_context_batch`).
+        bf16_autocast: Ejecuta la pasada hacia adelante con autocast bfloat16 (solo CPU).
+        latencies: Lista opcional donde se acumula la latencia (segundos) de cada lote
+            procesado sin errores.
+
+    Returns:
+        Array float32 de forma (n_series, horizon_len) con las predicciones medias; NaN en
+        las filas de las series sin pronóstico.
+    """
+    forecasts = [None] * len(contexts)
+
+    for start in range(0, len(contexts), batch_size):
+        block = contexts[start:start + batch_size]
+        batch_start = time.perf_counter()
+        try:
+            past_values = [torch.from_numpy(history).to(device) for history in block]
+            with inference_context(bf16_autocast):
+                outputs = model(past_values=past_values, freq=[0] * len(block))
+            forecasts[start:start + len(block)] = list(outputs.mean_predictions.float().cpu().numpy())
+        except Exception as e_batch:
+            logger.warning(f"Falló el lote {start // batch_size + 1} ({e_batch}); se reintenta serie por serie.")
+            for i, history in enumerate(block, start):
+                try:
+                    forecasts[i] = predict_series(model, history, device, bf16_autocast)
+                except Exception as e_series:
+                    logger.warning(f"La serie {i} quedó sin pronóstico. Error: {e_series}")
+            continue
+
+        if latencies is not None:
+            latencies.append(time.perf_counter() - batch_start)
+
+    done = [f for f in forecasts if f is not None]
+    if not done:
+        raise RuntimeError("TimesFM no generó pronósticos para ninguna serie.")
+    result = np.full((len(contexts), max(len(f) for f in done)), np.nan, dtype=np.float32)
+    for i, forecast in enumerate(forecasts):
+        if forecast is not None:
+            result[i, :len(forecast)] = forecast
+    return result
+
+
+@instrument()
 def run_forecasting(config_path):
     try:
         logger.info("Iniciando proceso de proyección con modelo TimesFM...")
@@ -104,10 +206,10 @@ def run_forecasting(config_path):
         
         # 1. Carga de Datos Procesados
         processed_path = config['data']['processed_path']
-        if not os.path.exists(processed_path):
+        if not table_exists(processed_path, config=config):
             raise FileNotFoundError(f"No se encuentra el archivo de datos procesados: {processed_path}")
             
-        df = pd.read_csv(processed_path)
+        df = read_table(processed_path, config=config)
         logger.info(f"Datos cargados correctamente: {len(df)} registros.")
         
         # 2. Preprocesamiento para Series Temporales
@@ -120,61 +222,78 @@ def run_forecasting(config_path):
         df['Año'] = df[date_col].dt.year
         
         # Agrupación anual por país
-        df_grouped = df.groupby([group_col, 'Año'])[value_col].sum().reset_index()
+        df_grouped = df.groupby([group_col, 'Año'], observed=True)[value_col].sum().reset_index()
         
         # Identificación de series únicas
         countries = df_grouped[group_col].unique()
         logger.info(f"Se generarán proyecciones para {len(countries)} países.")
 
-        # 3. Inicialización del Modelo TimesFM
-        repo_id = "google/timesfm-2.0-500m-pytorch"
+        # 3. Inicialización del Modelo TimesFM (compartido con la etapa de evaluación)
         horizon_years = config['model'].get('horizon_years', 5)
         
-        logger.info(f"Cargando arquitectura del modelo: {repo_id}...")
-        
-        # Configuración de hardware (GPU/CPU)
-        device = "cuda" if torch.cuda.is_available() else "cpu"
+        execution = configure_cpu_runtime(config)
+        model, device = get_model(config)
         logger.info(f"Dispositivo de procesamiento seleccionado: {device}")
-
-        # Importación dinámica del modelo
-        try:
-            from transformers.models.timesfm.modeling_timesfm import TimesFmModelForPrediction
-        except ImportError:
-            logger.warning("Importación específica fallida, intentando carga genérica con AutoModel...")
-            from transformers import AutoModelForTimeSeriesForecasting as TimesFmModelForPrediction
-            
-        model = TimesFmModelForPrediction.from_pretrained(
-            repo_id, 
-            trust_remote_code=True,
-            device_map=device
-        )
         
         # 4. Generación de Pronósticos
-        logger.info("Ejecutando inferencia por país...")
-        
+        inference_mode = config['model'].get('inference_mode', 'batched')
+        context_len = config['model'].get('context_len', 12)
+        batch_size = config['model'].get('batch_size', 32)
+
+        series_by_country = {
+            country: country_data.sort_values('Año')
+            for country, country_data in df_grouped.groupby(group_col, sort=False, observed=True)
+        }
+
         all_forecasts = []
-        
-        for country in countries:
-            try:
-                # Filtrar y ordenar datos históricos del país
-                country_data = df_grouped[df_grouped[group_col] == country].sort_values('Año')
-                
-                history_values = country_data[value_col].values
-                
-                # Preparación del tensor de entrada
-                input_tensor = torch.tensor(history_values, dtype=torch.float32).unsqueeze(0).to(device)
-                freq_tensor = torch.tensor([0]).to(device) 
-
-                with torch.no_grad():
-                    outputs = model(
-                        past_values=input_tensor, 
-                        freq=freq_tensor
+
+        if inference_mode == 'batched':
+            logger.info(f"Ejecutando inferencia por lotes (batch_size={batch_size}, context_len={context_len})...")
+
+            valid_countries = [c for c in countries if len(series_by_country[c]) > 0]
+            contexts = build_context_batch(
+                [series_by_country[c][value_col].values for c in valid_countries],
+                context_len
+            )
+            latencies = []
+            batch_forecasts = predict_batched(
+                model, contexts, device, batch_size=batch_size,
+                bf16_autocast=execution['bf16_autocast'], latencies=latencies
+            )
+            # Las series sin pronóstico (fila NaN) se omiten, como en el modo por país
+            forecasts_by_country = {
+                country: forecast for country, forecast in zip(valid_countries, batch_forecasts)
+                if not np.isnan(forecast).all()
+            }
+            failed = [str(c) for c in valid_countries if c not in forecasts_by_country]
+            if failed:
+                logger.warning(f"No se pudo completar la proyección para: {', '.join(failed)}")
+            logger.info(
+                f"Latencia por lote ({execution['precision']}): "
+                + ", ".join(f"{t * 1000:.1f} ms" for t in latencies)
+            )
+        else:
+            logger.info("Ejecutando inferencia por país...")
+            forecasts_by_country = {}
+
+            for country in countries:
+                try:
+                    # Historia del país (respetando la ventana de contexto configurada)
+                    history_values = series_by_country[country][value_col].values[-context_len:]
+
+                    # Mismo modo de ejecución en CPU (inference_mode, autocast bf16) que por lotes
+                    forecasts_by_country[country] = predict_series(
+                        model, history_values, device, bf16_autocast=execution['bf16_autocast']
                     )
-                    forecast = outputs.mean_predictions
-                    
-                # Procesamiento de la salida
-                forecast_values = forecast.cpu().numpy().squeeze()
-                
+
+                except Exception as e_country:
+                    logger.warning(f"No se pudo completar la proyección para {country}. Error: {e_country}")
+                    continue
+
+        for country, forecast_values in forecasts_by_country.items():
+            try:
+                country_data = series_by_country[country]
+
                 # Ajuste de longitud del horizonte
                 if len(forecast_values) > horizon_years:
                      forecast_values = forecast_values[-horizon_years:]
@@ -218,7 +337,7 @@ def run_forecasting(config_path):
         output_path = os.path.join(output_dir, "predicciones_bcie.csv") 
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        forecast_df.to_csv(output_path, index=False)
+        write_table(forecast_df, output_path, config)
         logger.info(f"Proyecciones guardadas exitosamente en: {output_path}")
         
         # Resumen final sobre la metodología de intervalos
@@ -9,6 +9,7 @@ Se generan dos tipos de reportes:
 """
 
 import pandas as pd
+import sys
 import yaml
 import os
 import logging
@@ -17,6 +18,11 @@ from src.dashboard.logic import prepare_unified_data, process_executive_data
 from src.dashboard.layout import get_dashboard_html, get_executive_html
 from datetime import datetime
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists
+from bcie_common.instrumentation import instrument
+
 # Configuración del registro de eventos (logging)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -25,6 +31,7 @@ def load_config(config_path):
     with open(config_path, 'r', encoding='utf-8') as f:
         return yaml.safe_load(f)
 
+@instrument()
 def generate_plots(config_path):
     try:
         logger.info("Iniciando la generación de reportes visuales...")
@@ -35,17 +42,17 @@ def generate_plots(config_path):
         pred_path_dir = config.get('paths', {}).get('predictions_path', "data/04-predictions")
         pred_path = os.path.join(pred_path_dir, "predicciones_bcie.csv")
         
-        if not os.path.exists(raw_path):
+        if not table_exists(raw_path, config=config):
             raise FileNotFoundError(f"No se encontraron datos históricos en: {raw_path}")
             
-        if not os.path.exists(pred_path):
+        if not table_exists(pred_path, config=config):
             logger.warning(f"No se encontró el archivo de predicciones en {pred_path}. Se generará el dashboard únicamente con datos históricos.")
             # Creación de estructura vacía para evitar fallos en la lógica de unión
             df_pred = pd.DataFrame(columns=['ds', 'unique_id', 'yhat', 'yhat_lower', 'yhat_upper'])
         else:
-            df_pred = pd.read_csv(pred_path)
+            df_pred = read_table(pred_path, config=config)
 
-        df_hist = pd.read_csv(raw_path)
+        df_hist = read_table(raw_path, config=config)
         
         # 1. Generación del Dashboard Predictivo
         logger.info("Construyendo Dashboard Predictivo...")
@@ -0,0 +1,25 @@
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_absolute_percentage_error, mean_squared_error
+
+from src.pipelines.evaluation_pipeline import compute_window_metrics
+
+
+def test_window_metrics_match_sklearn_on_ragged_windows():
+    rng = np.random.default_rng(0)
+    lengths = [1, 2, 5, 3]
+    y_true = np.zeros((len(lengths), max(lengths)))
+    y_pred = np.full_like(y_true, 1e6)  # Relleno: no debe influir en las métricas
+    mask = np.arange(max(lengths))[None, :] < np.array(lengths)[:, None]
+    windows = []
+    for i, n in enumerate(lengths):
+        truth, forecast = rng.uniform(0, 50, size=n), rng.uniform(0, 50, size=n)
+        truth[0] = 0.0 if i == 2 else truth[0]  # Cero real: mismo épsilon que sklearn
+        y_true[i, :n], y_pred[i, :n] = truth, forecast
+        windows.append((truth, forecast))
+
+    mape, rmse, mae = compute_window_metrics(y_true, y_pred, mask)
+
+    for i, (truth, forecast) in enumerate(windows):
+        assert np.isclose(mape[i], mean_absolute_percentage_error(truth, forecast))
+        assert np.isclose(rmse[i], np.sqrt(mean_squared_error(truth, forecast)))
+        assert np.isclose(mae[i], mean_absolute_error(truth, forecast))
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+
+from src.pipelines.inference_pipeline import build_context_batch, predict_batched, predict_series
+
+HORIZON = 4
+
+
+class DriftModel:
+    """
+    Stub de TimesFM: último valor más la pendiente media de la historia. Acepta un tensor
+    (1, L) o una lista de tensores 1-D, como el modelo de Transformers, y falla con las
+    series que contienen valores negativos.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, past_values, freq):
+        series = list(past_values) if isinstance(past_values, list) else [past_values[0]]
+        self.calls.append(len(series))
+        if any((s < 0).any() for s in series):
+            raise ValueError("serie inválida")
+        steps = torch.arange(1, HORIZON + 1, dtype=torch.float32)
+        rows = [s[-1] + steps * (s[-1] - s[0]) / max(len(s) - 1, 1) for s in series]
+        return SimpleNamespace(mean_predictions=torch.stack(rows))
+
+
+def make_series(n, rng):
+    return [rng.uniform(1, 100, size=rng.integers(2, 20)).cumsum() for _ in range(n)]
+
+
+def test_context_batch_keeps_last_values_as_float32():
+    contexts = build_context_batch([np.arange(10.0), np.arange(3.0)], context_len=5)
+
+    np.testing.assert_array_equal(contexts[0], np.arange(5.0, 10.0))
+    np.testing.assert_array_equal(contexts[1], np.arange(3.0))
+    assert all(c.dtype == np.float32 for c in contexts)
+
+
+def test_batched_forecasts_match_sequential():
+    model = DriftModel()
+    contexts = build_context_batch(make_series(11, np.random.default_rng(0)), context_len=12)
+
+    latencies = []
+    batched = predict_batched(model, contexts, 'cpu', batch_size=4, latencies=latencies)
+    sequential = np.vstack([predict_series(model, c, 'cpu') for c in contexts])
+
+    assert batched.shape == (11, HORIZON) and len(latencies) == 3
+    np.testing.assert_allclose(batched, sequential, rtol=1e-6)
+
+
+def test_failed_block_falls_back_to_single_series():
+    model = DriftModel()
+    contexts = build_context_batch(make_series(8, np.random.default_rng(1)), context_len=12)
+    contexts[5] = -contexts[5]
+
+    latencies = []
+    forecasts = predict_batched(model, contexts, 'cpu', batch_size=4, latencies=latencies)
+
+    # El segundo bloque falla: sus cuatro series se reintentan una a una
+    assert model.calls == [4, 4, 1, 1, 1, 1] and len(latencies) == 1
+    assert np.isnan(forecasts[5]).all()
+    for i in (0, 1, 2, 3, 4, 6, 7):
+        np.testing.assert_allclose(forecasts[i], predict_series(model, contexts[i], 'cpu'), rtol=1e-6)
+
+
+def test_all_series_failing_raises():
+    contexts = [-np.ones(5, dtype=np.float32)] * 3
+    with pytest.raises(RuntimeError):
+        predict_batched(DriftModel(), contexts, 'cpu', batch_size=2)
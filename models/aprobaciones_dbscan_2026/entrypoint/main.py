@@ -6,8 +6,12 @@ This script orchestrates the full DBSCAN clustering workflow:
 2. Training: Runs the DBSCAN clustering model.
 3. Dashboard: Generates the interactive HTML dashboard.
 
+Stages whose inputs (config, code, upstream artifacts) are unchanged since the last
+successful run are skipped (see bcie_common/stages.py).
+
 Usage:
     python entrypoint/main.py
+    python entrypoint/main.py --force training
 """
 
 import sys
@@ -15,6 +19,10 @@ import logging
 from pathlib import Path
 from datetime import datetime
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from bcie_common.stages import Stage, main as run_pipeline
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +30,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger("DBSCAN_Orchestrator")
 
+def run_artifacts(results, *names):
+    """Artifacts of the last recorded training run (its run directory lives in the stage result)."""
+    training = results.get('training') or {}
+    if not training.get('output_dir'):
+        return []
+    return [Path(training['output_dir']) / name for name in names]
+
+def build_stages(config_path, run_id):
+    """ETL -> Training -> Dashboard (the dashboard is non-fatal: training artifacts are already saved)."""
+    from src.pipelines.etl_pipeline import run_etl
+    from src.pipelines.training_pipeline import train_dbscan
+    from src.dashboard.generate_dashboard import generate_dashboard
+
+    def train_stage(results):
+        return train_dbscan(config_path, run_id=run_id)
+
+    def dashboard_stage(results):
+        return generate_dashboard(config_path, run_id=results['training']['run_id'])
+
+    return [
+        # ETL always runs: extraction is incremental and served from the shared cache
+        Stage('etl', run_etl, [config_path, run_id], config=['api', 'data'],
+              outputs=["data/02-preprocessed/aprobaciones_limpias.csv"], always=True),
+        Stage('training', train_stage, config=['data', 'runs', 'model'], deps=['etl'], with_results=True,
+              code=['src/pipelines/training_pipeline.py'],
+              outputs=lambda results: run_artifacts(
+                  results, "aprobaciones_clusters.csv", "metrics.json", "advanced_metrics.json",
+                  "cluster_profiles.json", "outliers_top10.json")),
+        Stage('dashboard', dashboard_stage, deps=['training'], with_results=True, required=False,
+              code=['src/dashboard'], inputs=["src/dashboard/dashboard_template.html"],
+              outputs=lambda results: run_artifacts(results, "dashboard_clustering.html"))
+    ]
+
 def main():
     """Main orchestration function."""
     
@@ -40,37 +81,11 @@ def main():
     logger.info(f"DBSCAN Pipeline - Run ID: {run_id}")
     logger.info(f"=" * 60)
 
-    # --- PHASE 1: ETL ---
-    logger.info("PHASE 1: ETL Pipeline")
-    try:
-        from src.pipelines.etl_pipeline import run_etl
-        run_etl(config_path, run_id=run_id)
-        logger.info("✅ ETL Pipeline completed successfully.")
-    except Exception as e:
-        logger.error(f"❌ ETL Pipeline failed: {e}")
+    report = run_pipeline(build_stages(config_path, run_id), config_path, description="DBSCAN Pipeline")
+    if not report['success']:
+        logger.error("❌ Pipeline failed (see the stage summary).")
         sys.exit(1)
 
-    # --- PHASE 2: TRAINING ---
-    logger.info("PHASE 2: Training Pipeline (DBSCAN)")
-    try:
-        from src.pipelines.training_pipeline import train_dbscan
-        result = train_dbscan(config_path, run_id=run_id)
-        logger.info(f"✅ Training Pipeline completed. Output: {result['output_dir']}")
-    except Exception as e:
-        logger.error(f"❌ Training Pipeline failed: {e}")
-        sys.exit(1)
-
-    # --- PHASE 3: DASHBOARD ---
-    logger.info("PHASE 3: Dashboard Generation")
-    try:
-        from src.dashboard.generate_dashboard import generate_dashboard
-        generate_dashboard(config_path, run_id=run_id)
-        logger.info("✅ Dashboard generated successfully.")
-    except Exception as e:
-        logger.error(f"❌ Dashboard generation failed: {e}")
-        # Non-fatal: training artifacts are already saved
-        logger.warning("Training artifacts are preserved despite dashboard failure.")
-
     logger.info(f"=" * 60)
     logger.info(f"Pipeline Complete. Run ID: {run_id}")
     logger.info(f"=" * 60)
@@ -10,16 +10,24 @@ It performs the following steps:
 """
 
 import logging
-import requests
 import pandas as pd
 import yaml
 import json
+import sys
 from pathlib import Path
 from datetime import datetime
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.ckan import extract_raw
+from bcie_common.storage import write_table
+from bcie_common.schema import apply_schema
+from bcie_common.instrumentation import instrument
+
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
+@instrument()
 def run_etl(config_path, run_id=None):
     """
     Executes the ETL process based on the provided configuration file.
@@ -35,57 +43,17 @@ def run_etl(config_path, run_id=None):
     with open(config_path, 'r', encoding='utf-8') as f:
         config = yaml.safe_load(f)
 
-    # --- EXTRACTION WITH PAGINATION ---
-    url = config['api']['base_url']
+    # --- EXTRACTION WITH PAGINATION (concurrent pages: api.max_workers; full or incremental: api.incremental) ---
     resource_id = config['api']['resource_id']
-    limit = config['api'].get('limit', 5000)  # Default to 5000 per page
 
     logger.info("Connecting to BCIE CKAN API...")
     
     try:
-        all_records = []
-        offset = 0
-        page = 1
-        
-        while True:
-            params = {
-                'resource_id': resource_id, 
-                'limit': limit,
-                'offset': offset
-            }
-            
-            logger.info(f"Fetching page {page} (offset={offset}, limit={limit})...")
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            
-            data_json = response.json()
-            if not data_json['success']:
-                raise Exception(f"API Error on page {page}: Query failed.")
-                
-            records = data_json['result']['records']
-            
-            if not records:
-                logger.info(f"No more records returned. Pagination complete.")
-                break
-                
-            all_records.extend(records)
-            logger.info(f"Page {page}: retrieved {len(records)} records (total so far: {len(all_records)})")
-            
-            # Stop if fewer records than limit (last page)
-            if len(records) < limit:
-                logger.info(f"Received {len(records)} < {limit}, stopping pagination.")
-                break
-                
-            offset += limit
-            page += 1
-        
-        df = pd.DataFrame(all_records)
-        logger.info(f"Download complete: {len(df)} total records retrieved across {page} pages.")
-
-        # Save Raw Data
+        # Raw data and its incremental checkpoint live next to data.raw_path
         raw_path = Path(config['data']['raw_path'])
-        raw_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(raw_path, index=False)
+        df = extract_raw(config['api'], raw_path)
+        total_downloaded = len(df)
+        logger.info(f"Download complete: {total_downloaded} total records retrieved.")
 
     except Exception as e:
         logger.error(f"Download failed: {e}")
@@ -127,18 +95,16 @@ def run_etl(config_path, run_id=None):
     # Null Handling
     df = df.dropna(subset=['Fecha_Aprobacion', val_col])
     
-    # Standardization (Group/Country)
-    group_col = config['data']['group_col']
-    if group_col in df.columns:
-        df[group_col] = df[group_col].astype(str).str.upper().str.strip()
-
     # Derived Features
     df['Anio'] = df['Fecha_Aprobacion'].dt.year
     df['Mes'] = df['Fecha_Aprobacion'].dt.month
 
+    # Typed schema: Pais/Sector normalization and dtypes, once at ingestion
+    df = apply_schema(df)
+    group_col = config['data']['group_col']
+
     # --- DATA QUALITY TRACKING ---
     processed_path = Path(config['data']['processed_path'])
-    total_downloaded = len(all_records)
     valid_records = len(df)
     
     data_quality = {
@@ -176,8 +142,7 @@ def run_etl(config_path, run_id=None):
     logger.info(f"Run metadata saved to: {meta_path}")
 
     # --- LOADING ---
-    processed_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(processed_path, index=False)
+    write_table(df, processed_path, config)
     
     logger.info(f"ETL Completed. Processed data saved to: {processed_path}")
 
@@ -11,6 +11,7 @@ Output: optimization_results.json with all iterations + recommended params.
 """
 
 import yaml
+import sys
 import pandas as pd
 import numpy as np
 from sklearn.cluster import DBSCAN
@@ -20,6 +21,10 @@ from pathlib import Path
 import json
 import logging
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -33,10 +38,10 @@ def optimize_dbscan(config_path="config/local.yaml"):
     
     # Load data
     processed_path = Path(config["data"]["processed_path"])
-    if not processed_path.exists():
+    if not table_exists(processed_path, config=config):
         raise FileNotFoundError(f"Data not found: {processed_path}")
     
-    df = pd.read_csv(processed_path)
+    df = read_table(processed_path, config=config)
     features = config["model"]["features"]
     log_col = config["model"].get("log_transform_feature")
     
@@ -5,8 +5,11 @@ This script orchestrates the execution of the EDA analytics pipeline:
 1. ETL: Data extraction from CKAN and preprocessing.
 2. Dashboard: Generation of the HTML reporting interface.
 
+The dashboard is only rebuilt when the preprocessed table (or its code/template) changes,
+so a scheduled run without new data finishes after the ETL.
+
 Usage:
-    python run.py
+    python run.py [--force etl|dashboard|all]
 
 Dependencies:
     - config/local.yaml
@@ -17,41 +20,46 @@ Dependencies:
 import logging
 import sys
 import os
+import yaml
+from pathlib import Path
 
 # Ensure src module is in the path
 sys.path.append(os.path.join(os.getcwd(), 'src'))
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from pipelines.etl_pipeline import run_etl
+from src.dashboard.generate_dashboard import generate_dashboard
+from bcie_common.stages import Stage, main as run_pipeline
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def build_stages(config_path):
+    """Pipeline stages; each one is skipped when its inputs are unchanged since the last successful run."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    return [
+        # 1. ETL Phase (always runs: extraction is incremental and served from the shared cache)
+        Stage('etl', run_etl, [config_path], config=['api', 'data'],
+              outputs=[config['data']['processed_path']], always=True),
+        # 2. Training Phase (NOT APPLICABLE FOR EDA)
+        # 3. Dashboard Generation
+        Stage('dashboard', generate_dashboard, deps=['etl'],
+              inputs=["src/dashboard/dashboard_eda.html"],
+              outputs=["src/dashboard/dashboard_eda_report.html"])
+    ]
+
 def main():
-    """Execute the full data pipeline."""
+    """Execute the data pipeline, skipping stages whose inputs have not changed."""
     config_path = "config/local.yaml"
     
     logging.info(">>> INITIATING BCIE EDA PIPELINE <<<")
-    
-    # 1. ETL Phase
-    logging.info("--- PHASE 1: ETL (SKIPPED - USING CACHED DATA) ---")
-    try:
-        # run_etl(config_path)
-        pass
-    except Exception as e:
-        logging.critical(f"ETL Failure: {e}")
-        return
 
-    # 2. Training Phase (NOT APPLICABLE FOR EDA)
-    # logging.info("--- PHASE 2: MODEL TRAINING (SKIPPED) ---")
-        
-    # 3. Dashboard Generation
-    logging.info("--- PHASE 3: EDA DASHBOARD GENERATION ---")
-    try:
-        # Dynamic import to ensure path context is correct
-        from src.dashboard.generate_dashboard import generate_dashboard
-        generate_dashboard()
-    except Exception as e:
-        logging.critical(f"Dashboard Failure: {e}")
+    report = run_pipeline(build_stages(config_path), config_path, description="BCIE EDA Pipeline")
+    if not report['success']:
+        logging.critical(">>> PIPELINE STOPPED (see the stage summary) <<<")
         return
         
     logging.info(">>> PIPELINE COMPLETED SUCCESSFULLY <<<")
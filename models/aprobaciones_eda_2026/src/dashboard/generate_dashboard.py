@@ -11,6 +11,7 @@ Features:
 """
 
 import pandas as pd
+import sys
 import logging
 import os
 import json
@@ -18,9 +19,16 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.schema import map_codes
+from bcie_common.storage import read_table, table_exists
+from bcie_common.instrumentation import instrument
+
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
+@instrument()
 def generate_dashboard():
     logger.info("Generating Premium EDA Report...")
     
@@ -31,16 +39,18 @@ def generate_dashboard():
     output_path = base_dir / "src/dashboard/dashboard_eda_report.html"
 
     # Validation
-    if not data_path.exists():
+    if not table_exists(data_path):
         logger.error(f"Processed data not found at: {data_path}")
         return
 
     try:
-        df = pd.read_csv(data_path)
+        df = read_table(data_path)
         
         # --- PRE-CALCULATIONS ---
         
-        # 1. Type Enforcement
+        # 1. Type Enforcement (categoricals back to text: the report fills gaps and serializes to JSON)
+        for col in df.select_dtypes('category').columns:
+            df[col] = df[col].astype(object)
         df['Anio'] = df['Anio'].astype(int)
         df['Monto_Aprobado'] = pd.to_numeric(df['Monto_Aprobado'], errors='coerce').fillna(0)
         
@@ -119,24 +129,24 @@ def generate_dashboard():
             })
 
         # 1.5 Partner Funnel (Tipo de Socio) - REPLACEMENT FOR WHALES
-        # User defined strict mapping for "Tipo de Socio" based on Country
-        def get_socio_category(pais):
-            p = str(pais).strip()
+        # User defined strict mapping for "Tipo de Socio" based on Country.
+        # Country names (and their variants) are already canonical from the ETL schema.
+        socio_categories = {
             # Fundadores
-            if p in ['Guatemala', 'El Salvador', 'Honduras', 'Nicaragua', 'Costa Rica']:
-                return 'Países Fundadores'
+            'Guatemala': 'Países Fundadores', 'El Salvador': 'Países Fundadores', 'Honduras': 'Países Fundadores',
+            'Nicaragua': 'Países Fundadores', 'Costa Rica': 'Países Fundadores',
             # Regionales No-Fundadores
-            elif p in ['República Dominicana', 'Panamá', 'Belice']:
-                return 'Regionales No-Fundadores'
-            # Extrarregionales (Handling potential naming variations)
-            elif p in ['México', 'Argentina', 'Colombia', 'España', 'Cuba', 'República de Corea', 'Corea del Sur', 'Taiwán', 'Taiwan', 'República de China (Taiwán)']:
-                return 'Extrarregionales'
+            'República Dominicana': 'Regionales No-Fundadores', 'Panamá': 'Regionales No-Fundadores',
+            'Belice': 'Regionales No-Fundadores',
+            # Extrarregionales
+            'México': 'Extrarregionales', 'Argentina': 'Extrarregionales', 'Colombia': 'Extrarregionales',
+            'España': 'Extrarregionales', 'Cuba': 'Extrarregionales', 'Corea': 'Extrarregionales',
+            'Taiwán': 'Extrarregionales',
             # Regional
-            elif 'Regional' in p:
-                return 'Regional'
-            return 'Otros'
+            'Regional': 'Regional'
+        }
 
-        df['Tipo_Socio_Calc'] = df['Pais'].apply(get_socio_category)
+        df['Tipo_Socio_Calc'] = map_codes(df['Pais'], socio_categories, 'Otros')
         
         partner_agg = df.groupby('Tipo_Socio_Calc')['Monto_Aprobado'].sum().reset_index().sort_values('Monto_Aprobado', ascending=False) # Descending for Funnel Top->Bottom
         partner_agg['Tipo_Socio'] = partner_agg['Tipo_Socio_Calc']
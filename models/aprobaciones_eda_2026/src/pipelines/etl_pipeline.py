@@ -12,12 +12,19 @@ MLOps Standards:
 """
 
 import pandas as pd
-import requests
+import sys
 import yaml
 import logging
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.ckan import extract_raw
+from bcie_common.storage import write_table
+from bcie_common.schema import apply_schema, cast_schema, map_codes
+from bcie_common.instrumentation import instrument
+
 # Configure module-level logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -40,29 +47,14 @@ def extract_data(config: Dict[str, Any]) -> pd.DataFrame:
     Raises:
         Exception: If API query fails and no local cache is available.
     """
-    url = config['api']['base_url']
-    resource_id = config['api']['resource_id']
-    limit = config['api']['limit']
     raw_path = Path(config['data']['raw_path'])
 
     logger.info("Connecting to BCIE CKAN API...")
     
     try:
-        params = {'resource_id': resource_id, 'limit': limit}
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        data_json = response.json()
-        if not data_json['success']:
-            raise Exception("API Error: Query failed.")
-            
-        records = data_json['result']['records']
-        df = pd.DataFrame(records)
+        # Full or incremental download (api.incremental); refreshes the raw cache and its checkpoint
+        df = extract_raw(config['api'], raw_path)
         logger.info(f"Download complete: {len(df)} records retrieved.")
-
-        # Save Raw Data Cache
-        raw_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(raw_path, index=False)
         return df
 
     except Exception as e:
@@ -108,14 +100,8 @@ def clean_data(df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFrame:
     # 4. Null Handling
     df = df.dropna(subset=['Fecha_Aprobacion', val_col])
     
-    # 5. String Standardization
-    group_col = config['data']['group_col']
-    if group_col in df.columns:
-        df[group_col] = df[group_col].astype(str).str.title().str.strip()
-
-    # 6. Sector Cleaning
-    if 'Sector_Economico' in df.columns:
-        df['Sector_Economico'] = df['Sector_Economico'].astype(str).str.strip().str.title()
+    # 5. Typed schema: Pais/Sector normalization (fixed vocabulary) and dtypes, once at ingestion
+    df = apply_schema(df, pais_labels='display')
     
     return df
 
@@ -141,7 +127,10 @@ def feature_engineering(df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFram
     val_col = config['data']['value_col']   # 'Monto_Aprobado'
     
     def top_sector(x):
-        return x.value_counts().index[0] if len(x) > 0 else 'Unknown'
+        # Mode over category codes; ties resolve in order of appearance, as with plain strings
+        codes = x.cat.codes
+        codes = codes[codes >= 0]
+        return x.cat.categories[codes.value_counts().index[0]] if len(codes) > 0 else 'Unknown'
 
     group_keys = [group_col, 'Anio', 'Decada']
     
@@ -151,7 +140,7 @@ def feature_engineering(df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFram
         df['__dummy_id'] = 1
         id_col = '__dummy_id'
 
-    df_agg = df.groupby(group_keys).agg(
+    df_agg = df.groupby(group_keys, observed=True).agg(
         Monto_Aprobado=(val_col, 'sum'),
         CANTIDAD_APROBACIONES=(id_col, 'count'), 
         Sector_Economico=('Sector_Economico', top_sector)
@@ -165,7 +154,7 @@ def feature_engineering(df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFram
         return 'Extra-regional'
 
     if group_col in df_agg.columns:
-        df_agg['Tipo_Pais'] = df_agg[group_col].apply(categorize_pais)
+        df_agg['Tipo_Pais'] = map_codes(df_agg[group_col], categorize_pais)
 
     # 4. Business Logic Bands (REMOVED FOR EDA)
     # 5. Frequency Bands (REMOVED FOR EDA)
@@ -173,21 +162,21 @@ def feature_engineering(df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFram
 
     # Note: User requested removal of Monto_Banda, Frecuencia_Banda, Cuadrante_Estrategia
 
-    return df_agg
+    return cast_schema(df_agg)
 
 def load_data(df: pd.DataFrame, config: Dict[str, Any]) -> None:
     """
-    Saves the processed dataframe to disk.
+    Saves the processed dataframe to disk (columnar format per `data.storage_format`).
 
     Args:
         df: Processed DataFrame.
         config: Configuration dict.
     """
     processed_path = Path(config['data']['processed_path'])
-    processed_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(processed_path, index=False)
+    write_table(df, processed_path, config)
     logger.info(f"ETL Completed. Processed data saved to: {processed_path}")
 
+@instrument()
 def run_etl(config_path: str = "config/local.yaml"):
     """Orchestrates the ETL pipeline."""
     try:
@@ -0,0 +1,21 @@
+import numpy as np
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import pdist, squareform
+
+from src.pipelines.training_pipeline import hierarchical_labels_for_ks, linkage_from_distance
+
+
+def baseline_labels(D, k, method="average"):
+    """Original per-K implementation: a fresh linkage on the square float64 matrix for every K."""
+    return fcluster(linkage(squareform(D, checks=False), method=method), t=k, criterion="maxclust") - 1
+
+
+def test_single_linkage_tree_matches_per_k_scipy_linkage():
+    rng = np.random.default_rng(0)
+    D = squareform(pdist(rng.normal(size=(120, 3))))
+
+    # Square matrix, condensed float64 and the pipeline's condensed float32 Gower vector
+    for distances in (D, squareform(D), squareform(D).astype(np.float32)):
+        labels_by_k = hierarchical_labels_for_ks(linkage_from_distance(distances), range(2, 16))
+        for k, labels in labels_by_k.items():
+            np.testing.assert_array_equal(labels, baseline_labels(D, k))
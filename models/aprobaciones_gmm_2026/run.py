@@ -1,5 +1,6 @@
 import logging
 import sys
+import yaml
 from pathlib import Path
 
 # Configurar Logging
@@ -11,39 +12,45 @@ logging.basicConfig(
 
 # Agregar src al path
 sys.path.append(str(Path(__file__).parent / 'src'))
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from pipelines.etl_pipeline import run_etl
 from pipelines.training_pipeline import train_gmm
+from src.dashboard.generate_dashboard import generate_dashboard
+from bcie_common.stages import Stage, main as run_pipeline
+
+def build_stages(config_path):
+    """Etapas del pipeline; cada una se omite si sus entradas no cambiaron desde la ultima corrida."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    predictions_dir = Path(config['model']['output_path']).parent
+    dashboard_inputs = ["clusters.json", "advanced_metrics.json", "optimization_history.json",
+                        "covariances.json", "centroids.json", "profile_scores.json"]
+
+    return [
+        # 1. ETL (siempre: la extraccion es incremental y con cache compartida)
+        Stage('etl', run_etl, [config_path], config=['api', 'data'],
+              outputs=[config['data']['processed_path']], always=True),
+        # 2. Entrenamiento (GMM)
+        Stage('training', train_gmm, [config_path], config=['data', 'model'], deps=['etl'],
+              outputs=[config['model']['output_path']] + [predictions_dir / name for name in dashboard_inputs]),
+        # 3. Dashboard
+        Stage('dashboard', generate_dashboard, deps=['training'],
+              inputs=["src/dashboard/dashboard_gmm_template.html"],
+              outputs=["src/dashboard/dashboard_gmm.html"])
+    ]
 
 def main():
     logging.info(">>> INICIANDO PROCESO DE CLUSTERING GMM <<<")
     config_path = "config/local.yaml"
-    
-    # 1. ETL
-    logging.info("--- PASO 1: ETL ---")
-    try:
-        run_etl(config_path)
-    except Exception as e:
-        logging.error(f"Fallo en ETL: {e}")
-        return
 
-    # 2. Entrenamiento
-    logging.info("--- PASO 2: ENTRENAMIENTO (GMM) ---")
-    try:
-        train_gmm(config_path)
-    except Exception as e:
-        logging.error(f"Fallo en Entrenamiento: {e}")
+    # python run.py [--force etl|training|dashboard|all]
+    report = run_pipeline(build_stages(config_path), config_path, description="Clustering GMM BCIE")
+    if not report['success']:
+        logging.error(">>> PROCESO INTERRUMPIDO (ver el resumen de etapas) <<<")
         return
-        
-    # 3. Dashboard
-    logging.info("--- PASO 3: GENERACION DE DASHBOARD ---")
-    try:
-        from src.dashboard.generate_dashboard import generate_dashboard
-        generate_dashboard()
-    except Exception as e:
-        logging.error(f"Fallo en Dashboard: {e}")
-        return
-        
+
     logging.info(">>> PROCESO COMPLETADO EXITOSAMENTE <<<")
 
 if __name__ == "__main__":
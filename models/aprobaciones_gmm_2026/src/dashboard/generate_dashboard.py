@@ -1,13 +1,19 @@
 import json
+import sys
 import logging
 from pathlib import Path
 import pandas as pd
 import numpy as np
 import os
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.instrumentation import instrument
+
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+@instrument()
 def generate_dashboard():
     logging.info("Generando Dashboard GMM (Probabilistic Design)...")
     
@@ -13,6 +13,7 @@ Key processes:
 """
 
 import pandas as pd
+import sys
 import numpy as np
 import yaml
 import logging
@@ -25,9 +26,15 @@ from sklearn.metrics import silhouette_score, davies_bouldin_score, calinski_har
 from scipy.stats import entropy
 import json
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists, write_table
+from bcie_common.instrumentation import instrument, record_rows, span
+
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
+@instrument()
 def train_gmm(config_path):
     """
     Executes the Gaussian Mixture Model training workflow.
@@ -37,18 +44,19 @@ def train_gmm(config_path):
         config = yaml.safe_load(f)
         
     data_path = Path(config['data']['processed_path'])
-    if not data_path.exists():
+    if not table_exists(data_path, config=config):
         logger.error(f"Input data file not found: {data_path}")
         return
 
     logger.info("Loading preprocessed data...")
-    df = pd.read_csv(data_path)
+    df = read_table(data_path, config=config)
     
     # Feature Selection
     features = config['model']['features']
     logger.info(f"Selected Features: {features}")
     
     X = df[features].dropna().copy()
+    record_rows(len(X))
     
     # --- FEATURE ENGINEERING ---
     logger.info("Applying Log Transformation to Amount Feature...")
@@ -73,21 +81,22 @@ def train_gmm(config_path):
     bic_scores = []
     
     # Optimization loop
-    for k in range(1, max_k + 1):
-        gmm = GaussianMixture(n_components=k, random_state=42, n_init=10)
-        gmm.fit(X_scaled)
-        
-        aic = gmm.aic(X_scaled)
-        bic = gmm.bic(X_scaled)
-        
-        aic_scores.append(aic)
-        bic_scores.append(bic)
-        
-        metrics_data.append({
-            "k": k,
-            "aic": aic,
-            "bic": bic
-        })
+    with span('model_selection', kind='fit', max_k=max_k):
+        for k in range(1, max_k + 1):
+            gmm = GaussianMixture(n_components=k, random_state=42, n_init=10)
+            gmm.fit(X_scaled)
+
+            aic = gmm.aic(X_scaled)
+            bic = gmm.bic(X_scaled)
+
+            aic_scores.append(aic)
+            bic_scores.append(bic)
+
+            metrics_data.append({
+                "k": k,
+                "aic": aic,
+                "bic": bic
+            })
         
     # Determine Optimal K (Elbow method on BIC or minimum BIC)
     # Theoretically minimal BIC is best, but sometimes it overfits. 
@@ -121,12 +130,13 @@ def train_gmm(config_path):
         
     logger.info(f"Training Final Model with K={optimal_k}...")
     
-    gmm_final = GaussianMixture(n_components=optimal_k, random_state=42, n_init=10)
-    gmm_final.fit(X_scaled)
-    
-    # Predict clusters
-    labels = gmm_final.predict(X_scaled)
-    X['Cluster'] = labels
+    with span('fit', kind='fit', k=int(optimal_k)):
+        gmm_final = GaussianMixture(n_components=optimal_k, random_state=42, n_init=10)
+        gmm_final.fit(X_scaled)
+
+        # Predict clusters
+        labels = gmm_final.predict(X_scaled)
+        X['Cluster'] = labels
     
     # Soft Clustering Probabilities (Entropy Calculation)
     probs = gmm_final.predict_proba(X_scaled)
@@ -141,46 +151,47 @@ def train_gmm(config_path):
     # Calculate Centroids
     cluster_centers_ = gmm_final.means_
         
-    # Final Standard Metrics
-    # Note: Silhouette is not natively "GMM" (which deals with density), but requested for comparison.
-    if optimal_k > 1:
-        final_sil = silhouette_score(X_scaled, labels)
-        final_dbi = davies_bouldin_score(X_scaled, labels)
-        final_ch = calinski_harabasz_score(X_scaled, labels)
-    else:
-        final_sil, final_dbi, final_ch = 0, 0, 0
-    
-    logger.info(f"Final Model (K={optimal_k}) - Avg Prob: {avg_prob:.4f}, AIC: {gmm_final.aic(X_scaled):.0f}")
+    with span('metrics', kind='metrics'):
+        # Final Standard Metrics
+        # Note: Silhouette is not natively "GMM" (which deals with density), but requested for comparison.
+        if optimal_k > 1:
+            final_sil = silhouette_score(X_scaled, labels)
+            final_dbi = davies_bouldin_score(X_scaled, labels)
+            final_ch = calinski_harabasz_score(X_scaled, labels)
+        else:
+            final_sil, final_dbi, final_ch = 0, 0, 0
 
-    # --- RIGOROUS VALIDATION (Subsampling Stability) ---
-    logger.info("Running Stability Analysis (Subsampling)...")
-    
-    stability_scores = []
-    n_samples = len(X_scaled)
-    subset_size = int(n_samples * 0.90) 
-    
-    for i in range(20):
-        indices = np.random.choice(n_samples, subset_size, replace=False)
-        X_sub = X_scaled[indices]
-        
-        gmm_stable = GaussianMixture(n_components=optimal_k, random_state=42+i, n_init=1)
-        gmm_stable.fit(X_sub)
-        labels_sub = gmm_stable.predict(X_sub)
-        
-        labels_orig_subset = labels[indices]
-        
-        ari = adjusted_rand_score(labels_orig_subset, labels_sub)
-        stability_scores.append(ari)
-        
-    avg_stability = np.mean(stability_scores)
-    
-    # --- BALANCE ---
-    unique, counts = np.unique(labels, return_counts=True)
-    if len(counts) > 0:
-        size_cv = np.std(counts) / np.mean(counts)
-        min_size_pct = (np.min(counts) / len(labels)) * 100
-    else:
-        size_cv, min_size_pct = 0, 0
+        logger.info(f"Final Model (K={optimal_k}) - Avg Prob: {avg_prob:.4f}, AIC: {gmm_final.aic(X_scaled):.0f}")
+
+        # --- RIGOROUS VALIDATION (Subsampling Stability) ---
+        logger.info("Running Stability Analysis (Subsampling)...")
+
+        stability_scores = []
+        n_samples = len(X_scaled)
+        subset_size = int(n_samples * 0.90) 
+
+        for i in range(20):
+            indices = np.random.choice(n_samples, subset_size, replace=False)
+            X_sub = X_scaled[indices]
+
+            gmm_stable = GaussianMixture(n_components=optimal_k, random_state=42+i, n_init=1)
+            gmm_stable.fit(X_sub)
+            labels_sub = gmm_stable.predict(X_sub)
+
+            labels_orig_subset = labels[indices]
+
+            ari = adjusted_rand_score(labels_orig_subset, labels_sub)
+            stability_scores.append(ari)
+
+        avg_stability = np.mean(stability_scores)
+
+        # --- BALANCE ---
+        unique, counts = np.unique(labels, return_counts=True)
+        if len(counts) > 0:
+            size_cv = np.std(counts) / np.mean(counts)
+            min_size_pct = (np.min(counts) / len(labels)) * 100
+        else:
+            size_cv, min_size_pct = 0, 0
     
     # Save Advanced Metrics
     adv_metrics = {
@@ -273,7 +284,7 @@ def train_gmm(config_path):
     with open(predictions_dir / "covariances.json", "w") as f:
         json.dump(covariances_data, f)
         
-    df_export.to_csv(config['model']['output_path'], index=False)
+    write_table(df_export, config['model']['output_path'], config)
     logger.info(f"Results saved to: {config['model']['output_path']}")
 
 if __name__ == "__main__":
@@ -12,6 +12,10 @@ from src.pipelines.training_pipeline import train_hdbscan
 from src.dashboard.generate_dashboard import generate_dashboard
 from src.pipelines.optimization import run_optimization
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from bcie_common.stages import Stage, add_arguments, run_stages
+
 # Configure Logger
 logging.basicConfig(
     level=logging.INFO,
@@ -20,11 +24,55 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def run_artifacts(results, *names):
+    """Artifacts of the last recorded training run (its run directory lives in the stage result)."""
+    training = results.get('training') or {}
+    if not training.get('output_dir'):
+        return []
+    return [Path(training['output_dir']) / name for name in names]
+
+def build_stages(config_path, run_id, optimize=False):
+    """
+    Pipeline stages. Training and dashboard are skipped when their inputs (config, code and
+    upstream artifacts) are unchanged; the dashboard then keeps pointing at the last run directory.
+    """
+    def train_stage(results):
+        # Pass best_params if optimization ran
+        best_params = results.get('optimization') if optimize else None
+        return train_hdbscan(config_path, run_id=run_id, params_override=best_params)
+
+    def dashboard_stage(results):
+        return generate_dashboard(config_path, run_id=results['training']['run_id'])
+
+    # 1. ETL (always runs: extraction is incremental and served from the shared cache)
+    stages = [Stage('etl', run_etl, [config_path, run_id], config=['api', 'data'],
+                    outputs=["data/02-preprocessed/aprobaciones_limpias.csv"], always=True)]
+    if optimize:
+        # 1b. Hyperparameter optimization (explicit request: always runs)
+        stages.append(Stage('optimization', run_optimization, [config_path, run_id], config=['data', 'model'],
+                            deps=['etl'], always=True,
+                            outputs=[Path("data/04-predictions/runs") / run_id / "optimization_results.json"]))
+    stages += [
+        # 2. Training (HDBSCAN)
+        Stage('training', train_stage, config=['data', 'runs', 'model'], with_results=True,
+              deps=['etl'] + (['optimization'] if optimize else []),
+              code=['src/pipelines/training_pipeline.py'],
+              outputs=lambda results: run_artifacts(
+                  results, "aprobaciones_clusters.csv", "metrics.json", "advanced_metrics.json",
+                  "cluster_profiles.json", "outliers_top10.json", "outlier_histogram.json")),
+        # 3. Dashboard Generation
+        Stage('dashboard', dashboard_stage, deps=['training'], with_results=True,
+              code=['src/dashboard'], inputs=["src/dashboard/dashboard_template.html"],
+              outputs=lambda results: run_artifacts(results, "dashboard_clustering.html"))
+    ]
+    return stages
+
 def main():
     parser = argparse.ArgumentParser(description="BCIE HDBSCAN Pipeline Runner")
     parser.add_argument("--config", type=str, default="config/local.yaml", help="Path to config file")
     parser.add_argument("--optimize", action="store_true", help="Run hyperparameter optimization (Grid Search)")
     parser.add_argument("--skip-etl", action="store_true", help="Skip ETL stage if data is already processed")
+    add_arguments(parser)
     args = parser.parse_args()
 
     # 1. Generate Run ID
@@ -34,44 +82,11 @@ def main():
     logger.info(f">>> INITIATING BCIE HDBSCAN CLUSTERING PIPELINE (Run ID: {run_id}) <<<")
     
     config_path = args.config
-    
-    # 2. Optimization Stage (Optional)
-    best_params = None
-    if args.optimize:
-        logger.info("--- PHASE 0: HYPERPARAMETER OPTIMIZATION ---")
-        best_params = run_optimization(config_path, run_id)
-        logger.info(f"Optimization finished. Proceeding with params: {best_params}")
-
-    # 3. ETL Stage
-    if not args.skip_etl:
-        logger.info("--- PHASE 1: ETL EXECUTION ---")
-        try:
-            run_etl(config_path, run_id=run_id)
-            logger.info("ETL Completed Successfully.")
-        except Exception as e:
-            logger.error(f"ETL Failed: {e}")
-            raise
-    else:
-        logger.info("--- PHASE 1: SKIPPED (ETL) ---")
-
-    # 4. Training Stage (HDBSCAN)
-    logger.info("--- PHASE 2: MODEL TRAINING (HDBSCAN) ---")
-    try:
-        # Pass best_params if optimization ran
-        train_hdbscan(config_path, run_id=run_id, params_override=best_params)
-        logger.info("Training Completed Successfully.")
-    except Exception as e:
-        logger.error(f"Training Failed: {e}")
-        raise
-
-    # 5. Dashboard Generation
-    logger.info("--- PHASE 3: DASHBOARD GENERATION ---")
-    try:
-        generate_dashboard(config_path, run_id=run_id)
-        logger.info("Dashboard Generated Successfully.")
-    except Exception as e:
-        logger.error(f"Dashboard Generation Failed: {e}")
-        raise
+    stages = build_stages(config_path, run_id, optimize=args.optimize)
+    report = run_stages(stages, config_path, force=args.force, skip=['etl'] if args.skip_etl else [],
+                        profile=args.profile, ignore_unknown=args.ignore_unknown_stages)
+    if not report['success']:
+        raise RuntimeError("HDBSCAN pipeline failed (see the stage summary)")
 
     logger.info(">>> PIPELINE COMPLETED SUCCESSFULLY <<<")
 
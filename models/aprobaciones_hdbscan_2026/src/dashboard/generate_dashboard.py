@@ -12,14 +12,21 @@ Key operations:
 """
 
 import logging
+import sys
 import os
 import yaml
 from pathlib import Path
 from datetime import datetime
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, records_json, table_exists
+from bcie_common.instrumentation import instrument
+
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
+@instrument()
 def generate_dashboard(config_path="config/local.yaml", run_id=None):
     """
     Generates the interactive HTML dashboard for a specific run.
@@ -68,13 +75,12 @@ def generate_dashboard(config_path="config/local.yaml", run_id=None):
     # 2. Data Loading & Injection Preparation
     try:
         # A) Clusters Data (Main Dataset)
-        if not data_path.exists():
+        if not table_exists(data_path, config=config):
             raise FileNotFoundError(f"Cluster data not found: {data_path}")
         
-        import pandas as pd
-        df = pd.read_csv(data_path)
+        df = read_table(data_path, config=config)
         # Convert to JSON for injection
-        data_clusters_json = df.to_json(orient='records')
+        data_clusters_json = records_json(df)
         
         # B) Validation Metrics
         metrics_json = "{}"
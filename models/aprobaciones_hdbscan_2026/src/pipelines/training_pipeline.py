@@ -1,4 +1,5 @@
 import yaml
+import sys
 import pandas as pd
 import numpy as np
 import hdbscan
@@ -12,6 +13,11 @@ from sklearn.preprocessing import StandardScaler, RobustScaler
 from joblib import dump
 from sklearn.metrics import silhouette_score, davies_bouldin_score, calinski_harabasz_score, adjusted_rand_score
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists, write_table
+from bcie_common.instrumentation import instrument, record_rows, span
+
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
@@ -19,6 +25,7 @@ def _run_dir(config, run_id):
     """Helper to resolve the specific run directory."""
     return Path(config["runs"]["output_root"]) / run_id
 
+@instrument(kind='metrics')
 def compute_stability_ari(X, params, n_iterations=20, sample_frac=0.8, random_state=42):
     """
     Compute clustering stability using subsample ARI.
@@ -73,6 +80,7 @@ def compute_stability_ari(X, params, n_iterations=20, sample_frac=0.8, random_st
         "ari_scores": [float(x) for x in ari_scores]
     }
 
+@instrument()
 def train_hdbscan(config_path, run_id, params_override=None):
     """
     Executes the HDBSCAN training pipeline.
@@ -111,10 +119,10 @@ def train_hdbscan(config_path, run_id, params_override=None):
 
     # 3. Load Data
     logger.info(f"Loading data from {processed_path}")
-    if not processed_path.exists():
+    if not table_exists(processed_path, config=config):
         raise FileNotFoundError(f"Processed data not found at {processed_path}")
     
-    df = pd.read_csv(processed_path)
+    df = read_table(processed_path, config=config)
     
     # 4. Feature Engineering
     features = config["model"]["features"]
@@ -122,6 +130,7 @@ def train_hdbscan(config_path, run_id, params_override=None):
     
     # Create feature matrix
     X = df[features].copy()
+    record_rows(len(X))
     
     # Apply Log Transform if configured
     if log_col and log_col in X.columns:
@@ -157,7 +166,8 @@ def train_hdbscan(config_path, run_id, params_override=None):
         core_dist_n_jobs=-1
     )
     
-    clusterer.fit(X_scaled)
+    with span('fit', kind='fit'):
+        clusterer.fit(X_scaled)
     
     # 6. Extract Results
     labels = clusterer.labels_
@@ -188,20 +198,21 @@ def train_hdbscan(config_path, run_id, params_override=None):
     persistence_min = float(np.min(persistence)) if persistence is not None and len(persistence) else None
     persistence_max = float(np.max(persistence)) if persistence is not None and len(persistence) else None
 
-    # Internal Validity (Silhouette, DBI, CH) - ONLY on valid clusters
-    sil_score = -1.0
-    dbi_score = -1.0
-    ch_score = -1.0
-    
-    if n_clusters > 1:
-        valid_mask = labels != -1
-        X_valid = X_scaled[valid_mask]
-        labels_valid = labels[valid_mask]
-        
-        if len(set(labels_valid)) > 1:
-            sil_score = silhouette_score(X_valid, labels_valid)
-            dbi_score = davies_bouldin_score(X_valid, labels_valid)
-            ch_score = calinski_harabasz_score(X_valid, labels_valid)
+    with span('metrics', kind='metrics'):
+        # Internal Validity (Silhouette, DBI, CH) - ONLY on valid clusters
+        sil_score = -1.0
+        dbi_score = -1.0
+        ch_score = -1.0
+
+        if n_clusters > 1:
+            valid_mask = labels != -1
+            X_valid = X_scaled[valid_mask]
+            labels_valid = labels[valid_mask]
+
+            if len(set(labels_valid)) > 1:
+                sil_score = silhouette_score(X_valid, labels_valid)
+                dbi_score = davies_bouldin_score(X_valid, labels_valid)
+                ch_score = calinski_harabasz_score(X_valid, labels_valid)
 
     logger.info(f"Clusters: {n_clusters} | Noise: {noise_pct:.1f}% | DBCV: {relative_validity:.3f}")
 
@@ -212,7 +223,7 @@ def train_hdbscan(config_path, run_id, params_override=None):
     df_export["Outlier_Score"] = outlier_score
     
     # Save CSV
-    df_export.to_csv(csv_out, index=False)
+    write_table(df_export, csv_out, config)
     logger.info(f"Saved results to {csv_out}")
 
     # 9. Artifact Generation
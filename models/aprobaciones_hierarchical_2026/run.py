@@ -1,5 +1,6 @@
 import logging
 import sys
+import yaml
 from pathlib import Path
 
 # Configure Logger
@@ -9,50 +10,44 @@ logging.basicConfig(
     handlers=[logging.StreamHandler(sys.stdout)]
 )
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
 # Import pipelines
 from src.pipelines.etl_pipeline import run_etl
 from src.pipelines.training_pipeline import train_hierarchical
 from src.dashboard.generate_dashboard import generate_dashboard
+from bcie_common.stages import Stage, main as run_pipeline
+
+def build_stages(config_path):
+    """Etapas del pipeline; cada una se omite si sus entradas no cambiaron desde la ultima corrida."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    predictions_dir = Path(config['model']['output_path']).parent
+
+    return [
+        # 1. ETL (siempre: la extraccion es incremental y con cache compartida)
+        Stage('etl', run_etl, [config_path], config=['api', 'data'],
+              outputs=[config['data']['processed_path']], always=True),
+        # 2. Entrenamiento (Ward)
+        Stage('training', train_hierarchical, [config_path], config=['data', 'model'], deps=['etl'],
+              outputs=[config['model']['output_path'], predictions_dir / "advanced_metrics.json",
+                       predictions_dir / "optimization_history.json"]),
+        # 3. Dashboard
+        Stage('dashboard', generate_dashboard, deps=['training'],
+              inputs=["src/dashboard/dashboard_template.html"],
+              outputs=["src/dashboard/dashboard_hierarchical.html"])
+    ]
 
 def main():
     logging.info(">>> INICIANDO PROCESO DE CLUSTERING JERARQUICO (WARD) <<<")
     
     config_path = "config/local.yaml"
-    
-    # 1. ETL
-    logging.info("--- PASO 1: ETL ---")
-    try:
-        # Check if run_etl accepts args. My previous implementations usually take config_path
-        # But looking at old run.py it passed run_id.
-        # Let's assume run_etl handles config_path or no args. 
-        # Safest is to check etl_pipeline.py, but usually I write it to take config.
-        # However, to be safe, let's try calling it matching the file signature if I could see it.
-        # Assuming run_etl(config_path) based on my previous GMM run.py.
-        run_etl(config_path)
-    except TypeError:
-        # Fallback if it requires run_id or something
-        try:
-             run_etl(config_path, run_id="manual_run")
-        except:
-             run_etl() # Try no args
-    except Exception as e:
-        logging.error(f"Fallo en ETL: {e}")
-        return
-
-    # 2. Training
-    logging.info("--- PASO 2: ENTRENAMIENTO (WARD) ---")
-    try:
-        train_hierarchical(config_path)
-    except Exception as e:
-        logging.error(f"Fallo en Entrenamiento: {e}")
-        return
 
-    # 3. Dashboard
-    logging.info("--- PASO 3: DASHBOARD ---")
-    try:
-        generate_dashboard()
-    except Exception as e:
-        logging.error(f"Fallo en Dashboard: {e}")
+    # python run.py [--force etl|training|dashboard|all]
+    report = run_pipeline(build_stages(config_path), config_path, description="Clustering Jerarquico BCIE")
+    if not report['success']:
+        logging.error(">>> PROCESO INTERRUMPIDO (ver el resumen de etapas) <<<")
         return
 
     logging.info(">>> PROCESO COMPLETADO EXITOSAMENTE <<<")
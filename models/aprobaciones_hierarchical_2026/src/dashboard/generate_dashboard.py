@@ -1,4 +1,5 @@
 import pandas as pd
+import sys
 import json
 import logging
 import os
@@ -6,8 +7,14 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, records_json, table_exists
+from bcie_common.instrumentation import instrument
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
+@instrument()
 def generate_dashboard():
     logging.info("Generando Dashboard HTML (Hierarchical - HDBSCAN Style)...")
     
@@ -18,12 +25,12 @@ def generate_dashboard():
     template_path = base_dir / "src/dashboard/dashboard_template.html"
     output_path = base_dir / "src/dashboard/dashboard_hierarchical.html"
 
-    if not data_path.exists():
+    if not table_exists(data_path):
         logging.error(f"No se encontraron datos de clusters: {data_path}")
         return
 
     # Leer Datos Principales
-    df = pd.read_csv(data_path)
+    df = read_table(data_path)
     
     # Ensure critical columns exist and are numeric
     df['Monto_Aprobado'] = pd.to_numeric(df['Monto_Aprobado'], errors='coerce').fillna(0)
@@ -124,7 +131,7 @@ def generate_dashboard():
     update_time = datetime.now().strftime("%d/%m/%Y %H:%M")
 
     # Replace Keys
-    html_content = html_content.replace('{{DATA_CLUSTERS}}', df.to_json(orient='records'))
+    html_content = html_content.replace('{{DATA_CLUSTERS}}', records_json(df))
     html_content = html_content.replace('{{DATA_METRICS}}', json.dumps(metrics_data))
     html_content = html_content.replace('{{DATA_ADVANCED_METRICS}}', json.dumps(advanced_metrics))
     html_content = html_content.replace('{{DATA_PROFILES}}', json.dumps(profiles_data))
@@ -1,4 +1,5 @@
 import hdbscan
+import sys
 import logging
 import pandas as pd
 import numpy as np
@@ -8,8 +9,14 @@ import itertools
 from pathlib import Path
 from sklearn.preprocessing import StandardScaler, RobustScaler
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table
+from bcie_common.instrumentation import instrument
+
 logger = logging.getLogger(__name__)
 
+@instrument()
 def run_optimization(config_path, run_id):
     """
     Runs a grid search for HDBSCAN hyperparameters.
@@ -23,7 +30,7 @@ def run_optimization(config_path, run_id):
 
     # Load Data
     processed_path = Path(config["data"]["processed_path"])
-    df = pd.read_csv(processed_path)
+    df = read_table(processed_path, config=config)
     
     features = config["model"]["features"]
     log_col = config["model"].get("log_transform_feature")
@@ -12,6 +12,7 @@ Key processes:
 """
 
 import pandas as pd
+import sys
 import numpy as np
 import yaml
 import logging
@@ -24,9 +25,15 @@ from scipy.cluster.hierarchy import dendrogram, linkage
 import matplotlib.pyplot as plt
 import plotly.figure_factory as ff
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists, write_table
+from bcie_common.instrumentation import instrument, record_rows, span
+
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
+@instrument()
 def train_hierarchical(config_path):
     """
     Executes the Hierarchical Clustering training workflow.
@@ -36,18 +43,19 @@ def train_hierarchical(config_path):
         config = yaml.safe_load(f)
         
     data_path = Path(config['data']['processed_path'])
-    if not data_path.exists():
+    if not table_exists(data_path, config=config):
         logger.error(f"Input data file not found: {data_path}")
         return
 
     logger.info("Loading preprocessed data...")
-    df = pd.read_csv(data_path)
+    df = read_table(data_path, config=config)
     
     # Feature Selection
     features = config['model']['features']
     logger.info(f"Selected Features: {features}")
     
     X = df[features].dropna().copy()
+    record_rows(len(X))
     
     # --- FEATURE ENGINEERING ---
     logger.info("Applying Log Transformation to Amount Feature...")
@@ -70,16 +78,17 @@ def train_hierarchical(config_path):
     best_k = 2
     metrics_data = []
     
-    for k in range(2, max_k + 1):
-        model = AgglomerativeClustering(n_clusters=k, linkage='ward')
-        labels = model.fit_predict(X_scaled)
-        
-        sil = silhouette_score(X_scaled, labels)
-        metrics_data.append({"k": k, "silhouette": sil})
-        
-        if sil > best_score:
-            best_score = sil
-            best_k = k
+    with span('model_selection', kind='fit', max_k=max_k):
+        for k in range(2, max_k + 1):
+            model = AgglomerativeClustering(n_clusters=k, linkage='ward')
+            labels = model.fit_predict(X_scaled)
+
+            sil = silhouette_score(X_scaled, labels)
+            metrics_data.append({"k": k, "silhouette": sil})
+
+            if sil > best_score:
+                best_score = sil
+                best_k = k
             
     logger.info(f"Best K found: {best_k} (Silhouette: {best_score:.4f})")
     
@@ -97,43 +106,45 @@ def train_hierarchical(config_path):
     # --- PHASE 2: FINAL MODEL TRAINING ---
     logger.info(f"Training Final Linkage Matrix (Ward)...")
     
-    # Compute linkage matrix for Dendrogram
-    Z = linkage(X_scaled, method='ward')
-    
-    # Fit Final Model
-    logger.info(f"Fitting Agglomerative Model with K={best_k}...")
-    hc_final = AgglomerativeClustering(n_clusters=best_k, linkage='ward')
-    labels = hc_final.fit_predict(X_scaled)
-    X['Cluster'] = labels
-    
-    # Final Metrics
-    final_sil = silhouette_score(X_scaled, labels)
-    final_dbi = davies_bouldin_score(X_scaled, labels)
-    final_ch = calinski_harabasz_score(X_scaled, labels)
-
-    # --- RIGOROUS VALIDATION (Stability) ---
-    logger.info("Running Stability Analysis (Subsampling)...")
-    stability_scores = []
-    n_samples = len(X_scaled)
-    subset_size = int(n_samples * 0.90) 
-    
-    for i in range(20):
-        try:
-            indices = np.random.choice(n_samples, subset_size, replace=False)
-            X_sub = X_scaled[indices]
-            model_sub = AgglomerativeClustering(n_clusters=best_k, linkage='ward')
-            labels_sub = model_sub.fit_predict(X_sub)
-            labels_orig_subset = labels[indices]
-            ari = adjusted_rand_score(labels_orig_subset, labels_sub)
-            stability_scores.append(ari)
-        except:
-            continue
-            
-    avg_stability = np.mean(stability_scores) if stability_scores else 0
-    
-    # --- BALANCE ---
-    unique, counts = np.unique(labels, return_counts=True)
-    size_cv = np.std(counts) / np.mean(counts) if len(counts) > 0 else 0
+    with span('fit', kind='fit', k=int(best_k)):
+        # Compute linkage matrix for Dendrogram
+        Z = linkage(X_scaled, method='ward')
+
+        # Fit Final Model
+        logger.info(f"Fitting Agglomerative Model with K={best_k}...")
+        hc_final = AgglomerativeClustering(n_clusters=best_k, linkage='ward')
+        labels = hc_final.fit_predict(X_scaled)
+        X['Cluster'] = labels
+    
+    with span('metrics', kind='metrics'):
+        # Final Metrics
+        final_sil = silhouette_score(X_scaled, labels)
+        final_dbi = davies_bouldin_score(X_scaled, labels)
+        final_ch = calinski_harabasz_score(X_scaled, labels)
+
+        # --- RIGOROUS VALIDATION (Stability) ---
+        logger.info("Running Stability Analysis (Subsampling)...")
+        stability_scores = []
+        n_samples = len(X_scaled)
+        subset_size = int(n_samples * 0.90) 
+
+        for i in range(20):
+            try:
+                indices = np.random.choice(n_samples, subset_size, replace=False)
+                X_sub = X_scaled[indices]
+                model_sub = AgglomerativeClustering(n_clusters=best_k, linkage='ward')
+                labels_sub = model_sub.fit_predict(X_sub)
+                labels_orig_subset = labels[indices]
+                ari = adjusted_rand_score(labels_orig_subset, labels_sub)
+                stability_scores.append(ari)
+            except:
+                continue
+
+        avg_stability = np.mean(stability_scores) if stability_scores else 0
+
+        # --- BALANCE ---
+        unique, counts = np.unique(labels, return_counts=True)
+        size_cv = np.std(counts) / np.mean(counts) if len(counts) > 0 else 0
     
     # Save Metrics
     adv_metrics = {
@@ -152,7 +163,7 @@ def train_hierarchical(config_path):
     df_export = df.loc[X.index].copy()
     df_export['Cluster'] = labels
     
-    df_export.to_csv(config['model']['output_path'], index=False)
+    write_table(df_export, config['model']['output_path'], config)
     
     # Save Dendrogram Data for Plotly (JSON)
     # Plotly's create_dendrogram returns a figure. We can save the figure data.
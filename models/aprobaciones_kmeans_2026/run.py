@@ -7,7 +7,7 @@ This script orchestrates the end-to-end execution of the analytics pipeline:
 3. Dashboard: Generation of the HTML reporting interface.
 
 Usage:
-    python run.py
+    python run.py [--force etl|training|dashboard|all]
 
 Dependencies:
     - config/local.yaml
@@ -18,46 +18,51 @@ Dependencies:
 import logging
 import sys
 import os
+import yaml
+from pathlib import Path
 
 # Ensure src module is in the path
 sys.path.append(os.path.join(os.getcwd(), 'src'))
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 from pipelines.etl_pipeline import run_etl
 from pipelines.training_pipeline import train_kmeans
+from src.dashboard.generate_dashboard import generate_dashboard
+from bcie_common.stages import Stage, main as run_pipeline
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def build_stages(config_path):
+    """Pipeline stages; each one is skipped when its inputs are unchanged since the last successful run."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    predictions_dir = Path(config['model']['output_path']).parent
+
+    return [
+        # 1. ETL Phase (always runs: extraction is incremental and served from the shared cache)
+        Stage('etl', run_etl, [config_path], config=['api', 'data'],
+              outputs=[config['data']['processed_path']], always=True),
+        # 2. Training Phase
+        Stage('training', train_kmeans, [config_path], config=['data', 'model'], deps=['etl'],
+              outputs=[predictions_dir / name for name in ["aprobaciones_clusters.csv", "metrics.json", "advanced_metrics.json", "centroids.json"]]),
+        # 3. Dashboard Generation
+        Stage('dashboard', generate_dashboard, deps=['training'],
+              inputs=["src/dashboard/dashboard_template.html"],
+              outputs=["src/dashboard/dashboard_clustering.html"])
+    ]
+
 def main():
-    """Execute the full data pipeline."""
+    """Execute the data pipeline, skipping stages whose inputs have not changed."""
     config_path = "config/local.yaml"
     
     logging.info(">>> INITIATING BCIE K-MEANS CLUSTERING PIPELINE <<<")
-    
-    # 1. ETL Phase
-    logging.info("--- PHASE 1: ETL (EXTRACTION & TRANSFORMATION) ---")
-    try:
-        run_etl(config_path)
-    except Exception as e:
-        logging.critical(f"ETL Failure: {e}")
-        return
 
-    # 2. Training Phase
-    logging.info("--- PHASE 2: MODEL TRAINING & OPTIMIZATION ---")
-    try:
-        train_kmeans(config_path)
-    except Exception as e:
-        logging.critical(f"Training Failure: {e}")
-        return
-        
-    # 3. Dashboard Generation
-    logging.info("--- PHASE 3: DASHBOARD GENERATION ---")
-    try:
-        # Dynamic import to ensure path context is correct
-        from src.dashboard.generate_dashboard import generate_dashboard
-        generate_dashboard()
-    except Exception as e:
-        logging.critical(f"Dashboard Failure: {e}")
+    # python run.py [--force etl|training|dashboard|all]
+    report = run_pipeline(build_stages(config_path), config_path, description="BCIE K-Means Clustering Pipeline")
+    if not report['success']:
+        logging.critical(">>> PIPELINE STOPPED (see the stage summary) <<<")
         return
         
     logging.info(">>> PIPELINE COMPLETED SUCCESSFULLY <<<")
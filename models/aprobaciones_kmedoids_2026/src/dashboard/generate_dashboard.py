@@ -12,14 +12,21 @@ Key operations:
 """
 
 import pandas as pd
+import sys
 import logging
 import os
 from pathlib import Path
 from datetime import datetime
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, records_json, table_exists
+from bcie_common.instrumentation import instrument
+
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
+@instrument()
 def generate_dashboard():
     """
     Generates the interactive HTML dashboard.
@@ -36,15 +43,15 @@ def generate_dashboard():
     output_path = base_dir / "src/dashboard/dashboard_clustering.html"
 
     # Validation
-    if not data_path.exists():
+    if not table_exists(data_path):
         logger.error(f"Prediction data not found at: {data_path}")
         return
 
     # Data Injection Preparation
     try:
         # 1. Main Data (Clusters)
-        df = pd.read_csv(data_path)
-        data_clusters_json = df.to_json(orient='records')
+        df = read_table(data_path)
+        data_clusters_json = records_json(df)
         
         # 2. Validation Metrics
         metrics_json = "[]"
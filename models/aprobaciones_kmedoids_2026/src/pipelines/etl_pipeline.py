@@ -10,14 +10,22 @@ It performs the following steps:
 """
 
 import pandas as pd
-import requests
+import sys
 import yaml
 import logging
 from pathlib import Path
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.ckan import extract_raw
+from bcie_common.storage import write_table
+from bcie_common.schema import apply_schema
+from bcie_common.instrumentation import instrument
+
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
+@instrument()
 def run_etl(config_path):
     """
     Executes the ETL process based on the provided configuration file.
@@ -32,30 +40,14 @@ def run_etl(config_path):
     with open(config_path, 'r', encoding='utf-8') as f:
         config = yaml.safe_load(f)
 
-    # --- EXTRACTION ---
-    url = config['api']['base_url']
-    resource_id = config['api']['resource_id']
-    limit = config['api']['limit']
-
+    # --- EXTRACTION (full or incremental, see api.incremental) ---
     logger.info("Connecting to BCIE CKAN API...")
     
     try:
-        params = {'resource_id': resource_id, 'limit': limit}
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        
-        data_json = response.json()
-        if not data_json['success']:
-            raise Exception("API Error: Query failed.")
-            
-        records = data_json['result']['records']
-        df = pd.DataFrame(records)
-        logger.info(f"Download complete: {len(df)} records retrieved.")
-
-        # Save Raw Data
+        # Raw data and its incremental checkpoint live next to data.raw_path
         raw_path = Path(config['data']['raw_path'])
-        raw_path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(raw_path, index=False)
+        df = extract_raw(config['api'], raw_path)
+        logger.info(f"Download complete: {len(df)} records retrieved.")
 
     except Exception as e:
         logger.error(f"Download failed: {e}")
@@ -85,19 +77,16 @@ def run_etl(config_path):
     # Null Handling
     df = df.dropna(subset=['Fecha_Aprobacion', val_col])
     
-    # Standardization (Group/Country)
-    group_col = config['data']['group_col']
-    if group_col in df.columns:
-        df[group_col] = df[group_col].astype(str).str.upper().str.strip()
-
     # Derived Features
     df['Anio'] = df['Fecha_Aprobacion'].dt.year
     df['Mes'] = df['Fecha_Aprobacion'].dt.month
 
+    # Typed schema: Pais/Sector normalization and dtypes, once at ingestion
+    df = apply_schema(df)
+
     # --- LOADING ---
     processed_path = Path(config['data']['processed_path'])
-    processed_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(processed_path, index=False)
+    write_table(df, processed_path, config)
     
     logger.info(f"ETL Completed. Processed data saved to: {processed_path}")
 
@@ -12,6 +12,7 @@ Key processes:
 """
 
 import pandas as pd
+import sys
 import numpy as np
 import yaml
 import logging
@@ -23,9 +24,15 @@ from sklearn.metrics import silhouette_score, davies_bouldin_score, calinski_har
 from sklearn.utils import resample
 import json
 
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists, write_table
+from bcie_common.instrumentation import instrument, record_rows, span
+
 # Configure module-level logger
 logger = logging.getLogger(__name__)
 
+@instrument()
 def train_kmedoids(config_path):
     """
     Executes the K-Medoids training workflow.
@@ -38,18 +45,19 @@ def train_kmedoids(config_path):
         config = yaml.safe_load(f)
         
     data_path = Path(config['data']['processed_path'])
-    if not data_path.exists():
+    if not table_exists(data_path, config=config):
         logger.error(f"Input data file not found: {data_path}")
         return
 
     logger.info("Loading preprocessed data...")
-    df = pd.read_csv(data_path)
+    df = read_table(data_path, config=config)
     
     # Feature Selection
     features = config['model']['features']
     logger.info(f"Selected Features: {features}")
     
     X = df[features].dropna().copy()
+    record_rows(len(X))
     
     # --- FEATURE ENGINEERING ---
     # Log Transformation on Amount (index 0) to reduce skewness
@@ -73,21 +81,22 @@ def train_kmedoids(config_path):
     metrics_data = []
     wcss_list = []
     
-    for k in range(1, max_k + 1):
-        kmedoids = KMedoids(n_clusters=k, init='k-medoids++', random_state=config['model']['random_state'])
-        labels = kmedoids.fit_predict(X_scaled)
-        wcss = kmedoids.inertia_
-        wcss_list.append(wcss)
-        
-        sil_score = 0
-        if k > 1:
-            sil_score = silhouette_score(X_scaled, labels)
-            
-        metrics_data.append({
-            "k": k,
-            "wcss": wcss,
-            "silhouette": sil_score
-        })
+    with span('model_selection', kind='fit', max_k=max_k):
+        for k in range(1, max_k + 1):
+            kmedoids = KMedoids(n_clusters=k, init='k-medoids++', random_state=config['model']['random_state'])
+            labels = kmedoids.fit_predict(X_scaled)
+            wcss = kmedoids.inertia_
+            wcss_list.append(wcss)
+
+            sil_score = 0
+            if k > 1:
+                sil_score = silhouette_score(X_scaled, labels)
+
+            metrics_data.append({
+                "k": k,
+                "wcss": wcss,
+                "silhouette": sil_score
+            })
         
     # Save Validation Metrics
     with open(predictions_dir / "metrics.json", "w") as f:
@@ -107,76 +116,78 @@ def train_kmedoids(config_path):
     optimal_k = config['model']['optimal_k']
     logger.info(f"Training Final Model with K={optimal_k}...")
     
-    kmedoids = KMedoids(n_clusters=optimal_k, init='k-medoids++', random_state=config['model']['random_state'])
-    X['Cluster'] = kmedoids.fit_predict(X_scaled)
-    labels = X['Cluster'].values
+    with span('fit', kind='fit', k=int(optimal_k)):
+        kmedoids = KMedoids(n_clusters=optimal_k, init='k-medoids++', random_state=config['model']['random_state'])
+        X['Cluster'] = kmedoids.fit_predict(X_scaled)
+        labels = X['Cluster'].values
     
     # Robustness Metrics: Centroid Distance (Interpretability)
     # Note: X_scaled and cluster_centers_ share the same scale
     distances = np.linalg.norm(X_scaled - kmedoids.cluster_centers_[labels], axis=1)
     
-    # Final Silhouette Score
-    final_sil_score = silhouette_score(X_scaled, labels)
-    final_dbi_score = davies_bouldin_score(X_scaled, labels)
-    final_ch_score = calinski_harabasz_score(X_scaled, labels)
-    
-    logger.info(f"Final Model Quality (Silhouette): {final_sil_score:.4f}")
-    logger.info(f"Final Model Quality (Davies-Bouldin): {final_dbi_score:.4f}")
-    logger.info(f"Final Model Quality (Calinski-Harabasz): {final_ch_score:.4f}")
+    with span('metrics', kind='metrics'):
+        # Final Silhouette Score
+        final_sil_score = silhouette_score(X_scaled, labels)
+        final_dbi_score = davies_bouldin_score(X_scaled, labels)
+        final_ch_score = calinski_harabasz_score(X_scaled, labels)
 
-    # --- RIGOROUS VALIDATION (Bootstrap 20 seeds) ---
-    logger.info("Running Bootstrap Stability Analysis (20 iterations)...")
-    
-    stability_scores = []
-    sil_scores = []
-    dbi_scores = []
-    
-    for i in range(20):
-        # 1. Resample Data (Bootstrap with replacement)
-        X_resampled, _ = resample(X_scaled, labels, random_state=42 + i)
-        
-        # 2. Fit K-Medoids on Resampled Data
-        km_stable = KMedoids(n_clusters=optimal_k, init='k-medoids++', random_state=42 + i)
-        labels_stable_pred = km_stable.fit_predict(X_resampled)
-        
-        # 3. Predict Original Data using the Resampled Model (to compare vs original labels)
-        predicted_orig_labels = km_stable.predict(X_scaled)
-        
-        # 4. Compare Original Labels vs Labels predicted by model trained on resampled data
-        ari = adjusted_rand_score(labels, predicted_orig_labels)
-        stability_scores.append(ari)
-        
-        # Metric Stats (on resampled distribution to see variance)
-        sil_scores.append(silhouette_score(X_resampled, labels_stable_pred))
-        dbi_scores.append(davies_bouldin_score(X_resampled, labels_stable_pred))
-        
-    avg_stability = np.mean(stability_scores)
-    std_stability = np.std(stability_scores)
-    min_ari = np.min(stability_scores)
-    max_ari = np.max(stability_scores)
-    
-    # Statistical Ranges
-    sil_mean = np.mean(sil_scores)
-    sil_std = np.std(sil_scores)
-    dbi_mean = np.mean(dbi_scores)
-    dbi_std = np.std(dbi_scores)
-
-    logger.info(f"Stability (ARI): {avg_stability:.4f} +/- {std_stability:.4f}")
-    logger.info(f"Silhouette Stats: {sil_mean:.4f} +/- {sil_std:.4f}")
-    
-    # --- NEGATIVE SILHOUETTE % & BALANCE ---
-    from sklearn.metrics import silhouette_samples
-    sample_silhouette_values = silhouette_samples(X_scaled, labels)
-    neg_sil_pct = (np.sum(sample_silhouette_values < 0) / len(labels)) * 100
-    
-    # Cluster Balance (CV of sizes)
-    unique, counts = np.unique(labels, return_counts=True)
-    size_cv = np.std(counts) / np.mean(counts)
-    min_size_pct = (np.min(counts) / len(labels)) * 100
-    max_size_pct = (np.max(counts) / len(labels)) * 100
-
-    logger.info(f"Negative Silhouette: {neg_sil_pct:.2f}%")
-    logger.info(f"Cluster Sizes CV: {size_cv:.4f} (Min: {min_size_pct:.1f}%, Max: {max_size_pct:.1f}%)")
+        logger.info(f"Final Model Quality (Silhouette): {final_sil_score:.4f}")
+        logger.info(f"Final Model Quality (Davies-Bouldin): {final_dbi_score:.4f}")
+        logger.info(f"Final Model Quality (Calinski-Harabasz): {final_ch_score:.4f}")
+
+        # --- RIGOROUS VALIDATION (Bootstrap 20 seeds) ---
+        logger.info("Running Bootstrap Stability Analysis (20 iterations)...")
+
+        stability_scores = []
+        sil_scores = []
+        dbi_scores = []
+
+        for i in range(20):
+            # 1. Resample Data (Bootstrap with replacement)
+            X_resampled, _ = resample(X_scaled, labels, random_state=42 + i)
+
+            # 2. Fit K-Medoids on Resampled Data
+            km_stable = KMedoids(n_clusters=optimal_k, init='k-medoids++', random_state=42 + i)
+            labels_stable_pred = km_stable.fit_predict(X_resampled)
+
+            # 3. Predict Original Data using the Resampled Model (to compare vs original labels)
+            predicted_orig_labels = km_stable.predict(X_scaled)
+
+            # 4. Compare Original Labels vs Labels predicted by model trained on resampled data
+            ari = adjusted_rand_score(labels, predicted_orig_labels)
+            stability_scores.append(ari)
+
+            # Metric Stats (on resampled distribution to see variance)
+            sil_scores.append(silhouette_score(X_resampled, labels_stable_pred))
+            dbi_scores.append(davies_bouldin_score(X_resampled, labels_stable_pred))
+
+        avg_stability = np.mean(stability_scores)
+        std_stability = np.std(stability_scores)
+        min_ari = np.min(stability_scores)
+        max_ari = np.max(stability_scores)
+
+        # Statistical Ranges
+        sil_mean = np.mean(sil_scores)
+        sil_std = np.std(sil_scores)
+        dbi_mean = np.mean(dbi_scores)
+        dbi_std = np.std(dbi_scores)
+
+        logger.info(f"Stability (ARI): {avg_stability:.4f} +/- {std_stability:.4f}")
+        logger.info(f"Silhouette Stats: {sil_mean:.4f} +/- {sil_std:.4f}")
+
+        # --- NEGATIVE SILHOUETTE % & BALANCE ---
+        from sklearn.metrics import silhouette_samples
+        sample_silhouette_values = silhouette_samples(X_scaled, labels)
+        neg_sil_pct = (np.sum(sample_silhouette_values < 0) / len(labels)) * 100
+
+        # Cluster Balance (CV of sizes)
+        unique, counts = np.unique(labels, return_counts=True)
+        size_cv = np.std(counts) / np.mean(counts)
+        min_size_pct = (np.min(counts) / len(labels)) * 100
+        max_size_pct = (np.max(counts) / len(labels)) * 100
+
+        logger.info(f"Negative Silhouette: {neg_sil_pct:.2f}%")
+        logger.info(f"Cluster Sizes CV: {size_cv:.4f} (Min: {min_size_pct:.1f}%, Max: {max_size_pct:.1f}%)")
 
     # Save Advanced Metrics
     adv_metrics = {
@@ -240,7 +251,7 @@ def train_kmedoids(config_path):
         json.dump(centroids_data, f)
         
     # Save Final CSV Report
-    df_export.to_csv(config['model']['output_path'], index=False)
+    write_table(df_export, config['model']['output_path'], config)
     logger.info(f"Results successfully saved to: {config['model']['output_path']}")
 
 if __name__ == "__main__":
@@ -22,14 +22,21 @@ import json
 import sys
 from pathlib import Path
 from typing import Dict, Any, Tuple, List, Union
-from sklearn.metrics import silhouette_score, adjusted_rand_score, silhouette_samples
+from sklearn.metrics import silhouette_score, adjusted_rand_score
 from scipy.cluster.hierarchy import linkage, fcluster
 from scipy.spatial.distance import squareform
 
 # Local imports
 sys.path.append(os.path.join(os.getcwd(), 'src'))
-from utils.gower_dist import compute_gower_distance
-from utils.embedding import generate_embedding
+from utils.gower_dist import compute_gower_condensed
+from utils.embedding import generate_embedding, generate_landmark_embedding
+
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists, write_table
+from bcie_common.instrumentation import instrument, record_rows, span
+from bcie_common.stability import bootstrap_stability, n_from_condensed
+from bcie_common.cluster_metrics import intra_inter_stats, silhouette_stats
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -42,45 +49,70 @@ def hierarchical_labels_from_distance(D: np.ndarray, k: int, method: str = "aver
     Generates cluster labels from a precomputed distance matrix using Hierarchical Clustering.
 
     Args:
-        D (np.ndarray): Square distance matrix.
+        D (np.ndarray): Condensed distance vector (no squareform needed) or square distance matrix.
         k (int): Number of clusters to form.
         method (str): Linkage method (e.g., 'average', 'ward', 'complete').
 
     Returns:
         np.ndarray: Array of cluster labels (0 to k-1).
     """
-    # scipy linkage requires condensed distance matrix for some inputs, or square form
-    condensed = squareform(D, checks=False)
-    Z = linkage(condensed, method=method)
+    return labels_from_linkage(linkage_from_distance(D, method=method), k)
+
+def linkage_from_distance(D: np.ndarray, method: str = "average") -> np.ndarray:
+    """
+    Builds the hierarchical clustering tree (scipy linkage matrix) from a distance matrix.
+
+    Args:
+        D (np.ndarray): Condensed distance vector (no squareform needed) or square distance matrix.
+            scipy converts it to float64 and average linkage works on a second float64
+            copy, so the peak is ~8N^2 bytes on top of D.
+        method (str): Linkage method (e.g., 'average', 'ward', 'complete').
+
+    Returns:
+        np.ndarray: Linkage matrix Z of shape (N-1, 4).
+    """
+    # scipy linkage requires the condensed form; a square matrix is converted first
+    condensed = D if D.ndim == 1 else squareform(D, checks=False)
+    return linkage(condensed, method=method)
+
+def labels_from_linkage(Z: np.ndarray, k: int) -> np.ndarray:
+    """Cuts a linkage tree into (at most) k clusters, labelled 0 to k-1."""
     # fcluster returns labels 1..k -> convert to 0..k-1
-    labels = fcluster(Z, t=k, criterion="maxclust") - 1
-    return labels
+    return fcluster(Z, t=k, criterion="maxclust") - 1
+
+def hierarchical_labels_for_ks(Z: np.ndarray, ks) -> Dict[int, np.ndarray]:
+    """
+    Cuts a single linkage tree at every K of the search.
+
+    The hierarchy does not depend on K, so the O(N^2 log N) linkage runs once and each
+    cut costs O(N).
+
+    Args:
+        Z (np.ndarray): Linkage matrix (see `linkage_from_distance`).
+        ks (Iterable[int]): Numbers of clusters.
+
+    Returns:
+        Dict[int, np.ndarray]: Labels (0 to k-1) for each k.
+    """
+    return {k: labels_from_linkage(Z, k) for k in ks}
 
 def mean_intra_inter(D: np.ndarray, labels: np.ndarray) -> Tuple[float, float]:
     """
     Calculates Mean Intra-cluster distance (W) and Mean Inter-cluster distance (B).
 
+    Scans the condensed distances in bounded row chunks (see `bcie_common.cluster_metrics`);
+    to evaluate several K, call `intra_inter_stats` once with all the labelings.
+
     Args:
-        D (np.ndarray): Square distance matrix.
+        D (np.ndarray): Condensed distance vector or square distance matrix.
         labels (np.ndarray): Cluster labels.
 
     Returns:
         Tuple[float, float]: (W, B) - Mean Intra and Mean Inter distances.
     """
-    n = D.shape[0]
-    # Generate indices for the upper triangle (excluding diagonal)
-    iu = np.triu_indices(n, k=1)
-    dvals = D[iu]
-    
-    # Check pairwise label equality
-    l_i = labels[iu[0]]
-    l_j = labels[iu[1]]
-    same = (l_i == l_j)
-    
-    # Calculate means, handling empty cases safely
-    W = dvals[same].mean() if np.any(same) else 1.0
-    B = dvals[~same].mean() if np.any(~same) else 0.0
-    return W, B
+    condensed = D if D.ndim == 1 else squareform(D, checks=False)
+    stats = intra_inter_stats(condensed, {0: labels})[0]
+    return stats['W'], stats['B']
 
 def balance_score(labels: np.ndarray) -> float:
     """
@@ -159,7 +191,11 @@ def composite_score_for_k(
     frac: float = 0.6,
     # Weights Configuration
     wS: float = 0.50, wC: float = 0.25, wSep: float = 0.25,   # Q components
-    wQ: float = 0.60, wStab: float = 0.25, wBal: float = 0.15 # Final components
+    wQ: float = 0.60, wStab: float = 0.25, wBal: float = 0.15, # Final components
+    labels: np.ndarray = None,
+    stability: Dict[str, float] = None,
+    intra_inter: Tuple[float, float] = None,
+    silhouette: float = None
 ) -> Tuple[float, Dict[str, Any]]:
     """
     Calculates a comprehensive Composite Score for a given K.
@@ -167,7 +203,7 @@ def composite_score_for_k(
     Score = Penalty * (wQ*Quality + wStab*Stability + wBal*Balance)
 
     Args:
-        D (np.ndarray): Distance Matrix.
+        D (np.ndarray): Condensed distance vector or square distance matrix.
         k (int): Number of clusters to evaluate.
         k_min (int): Minimum K in search range (for penalty scaling).
         k_max (int): Maximum K in search range.
@@ -177,11 +213,23 @@ def composite_score_for_k(
         frac (float): Bootstrap subsample fraction.
         wS, wC, wSep: Weights for Quality sub-score.
         wQ, wStab, wBal: Weights for Final Score.
+        labels (np.ndarray): Labels for k cut from a shared linkage tree. If None, the tree is
+            built from D.
+        stability (Dict): Bootstrap ARI statistics for k (see `bcie_common.stability`). If
+            None, they are computed here with `stability_bootstrap_ari`.
+        intra_inter (Tuple[float, float]): (W, B) for k from a shared scan of the distances
+            (`intra_inter_stats`). If None, computed here with `mean_intra_inter`.
+        silhouette (float): Silhouette score for k from a shared blocked scan
+            (`silhouette_stats`). If None, computed here with `silhouette_score`.
 
     Returns:
         Tuple[float, Dict]: Final Score (0-1) and dictionary of component details.
     """
-    labels = hierarchical_labels_from_distance(D, k, method=method)
+    if labels is None:
+        labels = hierarchical_labels_from_distance(D, k, method=method)
+    # The per-K fallbacks for silhouette and stability index the square matrix
+    if D.ndim == 1 and (silhouette is None or stability is None):
+        D = squareform(D)
 
     # 1. Silhouette Score (Gower)
     s_raw = 0.0
@@ -190,13 +238,15 @@ def composite_score_for_k(
         if len(np.unique(labels)) < 2:
             s_raw, s_star = 0.0, 0.0
         else:
-            s_raw = float(silhouette_score(D, labels, metric="precomputed")) # [-1, 1]
+            if silhouette is None:
+                silhouette = silhouette_score(D, labels, metric="precomputed")
+            s_raw = float(silhouette)                                        # [-1, 1]
             s_star = float(np.clip((s_raw + 1) / 2, 0, 1))                   # [0, 1] Normalized
     except Exception:
         s_raw, s_star = 0.0, 0.0
 
     # 2. Cohesion & Separation
-    W, Bsep = mean_intra_inter(D, labels)
+    W, Bsep = intra_inter if intra_inter is not None else mean_intra_inter(D, labels)
     C = np.clip(1 - W, 0, 1)     # Cohesion (1-Intra)
     Sep = np.clip(Bsep, 0, 1)    # Separation (Inter)
 
@@ -204,7 +254,9 @@ def composite_score_for_k(
 
     # 3. Balance & Stability
     Bal = balance_score(labels)
-    Stab_stats = stability_bootstrap_ari(D, labels, k, method=method, B=B, frac=frac)
+    if stability is None:
+        stability = stability_bootstrap_ari(D, labels, k, method=method, B=B, frac=frac)
+    Stab_stats = stability
     Stab = Stab_stats["mean"]
 
     # 4. Complexity Penalty
@@ -224,6 +276,79 @@ def composite_score_for_k(
         "P": float(P)
     }
 
+def load_previous_coordinates(
+    path: Path,
+    df: pd.DataFrame,
+    keys: List[str],
+    config: Dict[str, Any] = None
+) -> Union[np.ndarray, None]:
+    """
+    Loads the (x, y) coordinates of the previous run's output, if any (embedding warm start),
+    matched to the current rows on a stable key instead of row position.
+
+    Args:
+        path (Path): Configured path of the clusters table.
+        df (pd.DataFrame): Current training rows.
+        keys (List[str]): Columns that identify a row across runs (e.g. ['Pais', 'Anio']).
+        config (Dict): Project config (storage format).
+
+    Returns:
+        np.ndarray of shape (len(df), 2), row-aligned with `df` (NaN for rows absent from the
+        previous output), or None if there is no usable previous output.
+    """
+    if not table_exists(path, config=config):
+        return None
+    try:
+        prev = read_table(path, columns=list(keys) + ['x', 'y'], config=config)
+    except Exception as e:
+        logger.warning(f"Previous embedding not available for warm start: {e}")
+        return None
+
+    # Keys as text on both sides: categorical vocabularies may differ between runs
+    current = df[keys].astype(str)
+    prev[keys] = prev[keys].astype(str)
+    prev = prev.drop_duplicates(subset=keys, keep='first')
+    matched = current.merge(prev, on=keys, how='left', validate='many_to_one')
+    coords = matched[['x', 'y']].to_numpy(dtype=np.float64)
+    logger.info(f"Warm start: {int(np.isfinite(coords).all(axis=1).sum())} of {len(df)} rows "
+                f"matched on {keys}.")
+    return coords
+
+def compute_embedding(
+    condensed: np.ndarray,
+    emb_config: Dict[str, Any],
+    previous: np.ndarray = None
+) -> Tuple[pd.DataFrame, float, str]:
+    """
+    Computes the 2D map with full SMACOF MDS or Landmark MDS, as configured.
+
+    Args:
+        condensed (np.ndarray): Condensed distances (expanded to the square matrix for SMACOF only).
+        emb_config (Dict): `model.embedding` section (method, smacof_max_samples, n_landmarks).
+        previous (np.ndarray): Previous run's coordinates for the warm start, row-aligned with
+            the distances (NaN for new rows; see `load_previous_coordinates`). Optional.
+
+    Returns:
+        Tuple[pd.DataFrame, float, str]: Coordinates ('x', 'y'), raw stress and the method used.
+    """
+    n = n_from_condensed(len(condensed))
+    method = emb_config.get('method', 'smacof')
+    if method == 'auto':
+        method = 'smacof' if n <= emb_config.get('smacof_max_samples', 2000) else 'landmark'
+
+    if method == 'landmark':
+        df_emb, raw_stress = generate_landmark_embedding(
+            condensed, n_landmarks=emb_config.get('n_landmarks', 500), init=previous
+        )
+    elif method == 'smacof':
+        # SMACOF needs a starting point for every sample: only when every row was matched
+        init = previous if previous is not None and np.isfinite(previous).all() else None
+        df_emb, raw_stress = generate_embedding(squareform(condensed), init=init)
+    else:
+        raise ValueError(f"Unknown embedding method: {method}")
+    return df_emb, raw_stress, method
+
+@instrument()
 def train_mixed_clustering(config_path: str = "config/local.yaml") -> None:
     """
     Executes the full training pipeline: Load -> Transform -> Optimize K -> Train -> Save.
@@ -234,12 +359,13 @@ def train_mixed_clustering(config_path: str = "config/local.yaml") -> None:
         config = yaml.safe_load(f)
 
     input_path = Path(config['data']['processed_path'])
-    if not input_path.exists():
+    if not table_exists(input_path, config=config):
         logger.error(f"Input file not found: {input_path}")
         return
 
-    df = pd.read_csv(input_path)
+    df = read_table(input_path, config=config)
     logger.info(f"Loaded {len(df)} records for training.")
+    record_rows(len(df))
 
     # 2. Feature Preparation
     req_cols = ['Monto_Aprobado', 'CANTIDAD_APROBACIONES', 'Sector_Economico']
@@ -251,12 +377,17 @@ def train_mixed_clustering(config_path: str = "config/local.yaml") -> None:
     df_features = pd.DataFrame()
     df_features['log_Monto'] = np.log10(df['Monto_Aprobado'] + 1)
     df_features['log_Cant'] = np.log1p(df['CANTIDAD_APROBACIONES'])
-    df['Sector_Economico'] = df['Sector_Economico'].fillna('Unknown')
+    df['Sector_Economico'] = df['Sector_Economico'].astype(object).fillna('Unknown')
     df_features['Sector'] = df['Sector_Economico']
 
-    # 3. Gower Distance Matrix
+    # 3. Gower Distance Matrix (condensed float32, computed in row blocks)
     logger.info("Computing Gower Distance Matrix...")
-    dist_matrix = compute_gower_distance(df_features, cat_features=['Sector'])
+    with span('gower_distance', kind='fit') as gower_span:
+        gower_span.rows = len(df_features)
+        condensed = compute_gower_condensed(
+            df_features, num_features=['log_Monto', 'log_Cant'], cat_features=['Sector'],
+            memmap_path=config['model'].get('gower_memmap_path')
+        )
 
     # 4. K Optimization Loop
     logger.info("Starting Grid Search for Optimal K...")
@@ -268,27 +399,49 @@ def train_mixed_clustering(config_path: str = "config/local.yaml") -> None:
     k_min, k_max = 2, 15
     k_range = range(k_min, k_max + 1)
     method = "average"
+
+    # The hierarchy does not depend on K: build the tree once and cut it for every K.
+    # This is the memory peak of the pipeline: scipy works on two float64 copies of the
+    # condensed vector (~8N^2 bytes on top of the float32 one), even with gower_memmap_path.
+    with span('linkage', kind='fit', method=method):
+        linkage_matrix = linkage_from_distance(condensed, method=method)
+        labels_by_k = hierarchical_labels_for_ks(linkage_matrix, k_range)
     
-    for k in k_range:
-        score, parts = composite_score_for_k(
-            dist_matrix, k, k_min, k_max,
-            method=method,
-            lam=1.0,
-            B=50, frac=0.6 # High Rigor Bootstrapping
-        )
-        
-        logger.info(f"K={k}: Score={score:.3f} (Sil={parts['S_raw']:.3f}, Stab={parts['Stab']:.2f})")
-        
-        results[k] = {
-            'composite_score': score, 
-            'silhouette': parts['S_raw'],
-            'silhouette_norm': parts['S_star'],
-            'details': parts
-        }
-        
-        if score > best_score:
-            best_score = score
-            best_k = k
+    with span('model_selection', kind='metrics', k_max=k_max):
+        # Bootstrap stability for every K at once: one tree per replicate, replicates in parallel
+        with span('stability', kind='metrics', B=50):
+            stability_by_k = bootstrap_stability(
+                condensed, labels_by_k, method=method, B=50, frac=0.6,
+                n_jobs=config['model'].get('n_jobs', -1)
+            )
+        # Silhouette, cohesion and separation for every K in one blocked scan of the condensed distances
+        with span('silhouette', kind='metrics'):
+            cluster_stats_by_k = silhouette_stats(condensed, labels_by_k)
+
+        for k in k_range:
+            score, parts = composite_score_for_k(
+                condensed, k, k_min, k_max,
+                method=method,
+                lam=1.0,
+                B=50, frac=0.6, # High Rigor Bootstrapping
+                labels=labels_by_k[k],
+                stability=stability_by_k[k],
+                intra_inter=(cluster_stats_by_k[k]['W'], cluster_stats_by_k[k]['B']),
+                silhouette=cluster_stats_by_k[k]['score']
+            )
+
+            logger.info(f"K={k}: Score={score:.3f} (Sil={parts['S_raw']:.3f}, Stab={parts['Stab']:.2f})")
+
+            results[k] = {
+                'composite_score': score, 
+                'silhouette': parts['S_raw'],
+                'silhouette_norm': parts['S_star'],
+                'details': parts
+            }
+
+            if score > best_score:
+                best_score = score
+                best_k = k
 
     logger.info(f"mathematical Best K: {best_k} (Score: {best_score:.3f})")
 
@@ -308,14 +461,23 @@ def train_mixed_clustering(config_path: str = "config/local.yaml") -> None:
             best_k = 3
     
     # 6. Final Model Application
-    final_labels = hierarchical_labels_from_distance(dist_matrix, best_k, method=method)
-    
-    # 7. Embedding (MDS)
-    df_emb, raw_stress = generate_embedding(dist_matrix)
-    
-    # Normalized Stress-1 Calculation
-    d_sq_sum = np.sum(squareform(dist_matrix, checks=False)**2)
-    stress_1 = np.sqrt(raw_stress / d_sq_sum) if d_sq_sum > 0 else 0.0
+    with span('fit', kind='fit', k=int(best_k)):
+        # Cut of the cached tree (no new linkage)
+        final_labels = labels_by_k[best_k]
+
+        # 7. Embedding (MDS): full SMACOF or Landmark MDS, optionally warm-started
+        emb_config = config['model'].get('embedding', {})
+        previous = None
+        if emb_config.get('warm_start', False):
+            keys = emb_config.get('warm_start_keys', [config['data']['group_col'], 'Anio'])
+            previous = load_previous_coordinates(
+                Path("data/04-predictions") / "aprobaciones_clusters.csv", df, keys, config
+            )
+        df_emb, raw_stress, emb_method = compute_embedding(condensed, emb_config, previous)
+
+        # Normalized Stress-1 Calculation
+        d_sq_sum = float(np.sum(np.square(condensed, dtype=np.float64)))
+        stress_1 = np.sqrt(raw_stress / d_sq_sum) if d_sq_sum > 0 else 0.0
     
     # 8. Artifact Generation
     output_dir = Path("data/04-predictions")
@@ -324,17 +486,17 @@ def train_mixed_clustering(config_path: str = "config/local.yaml") -> None:
     df_out = df.copy()
     df_out['Cluster'] = final_labels
     
-    # Per-sample Confidence score mapping
-    try:
-        sample_sils = silhouette_samples(dist_matrix, final_labels, metric="precomputed")
+    # Per-sample Confidence score mapping (silhouette samples of the final K, same scan)
+    sample_sils = cluster_stats_by_k[best_k]['samples']
+    if sample_sils is not None:
         df_out['Confidence'] = (sample_sils + 1) / 2 # Normalize [-1,1] -> [0,1]
-    except Exception as e:
-        logger.warning(f"Could not compute silhouette samples: {e}")
+    else:
+        logger.warning(f"Could not compute silhouette samples: K={best_k} yields a single cluster")
         df_out['Confidence'] = 1.0
 
     df_out['x'] = df_emb['x']
     df_out['y'] = df_emb['y']
-    df_out.to_csv(output_dir / "aprobaciones_clusters.csv", index=False)
+    write_table(df_out, output_dir / "aprobaciones_clusters.csv", config)
     
     # Metrics JSON
     final_metrics = results[best_k]
@@ -343,7 +505,8 @@ def train_mixed_clustering(config_path: str = "config/local.yaml") -> None:
         'linkage': method, 
         'n_samples': len(df),
         'mds_stress': float(stress_1),
-        'mds_stress_raw': float(raw_stress)
+        'mds_stress_raw': float(raw_stress),
+        'mds_method': emb_method
     })
     
     with open(output_dir / "metrics.json", 'w') as f:
@@ -1,17 +1,31 @@
 import numpy as np
 import pandas as pd
 from sklearn.manifold import MDS
+from scipy.linalg import eigh, orthogonal_procrustes
+from scipy.spatial.distance import squareform
 import logging
+import sys
+from pathlib import Path
+
+# Shared lab package (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.cluster_metrics import condensed_chunks
+from bcie_common.stability import n_from_condensed
 
 logger = logging.getLogger(__name__)
 
-def generate_embedding(distance_matrix, random_state=42):
+# Rows per block when projecting points onto the landmarks
+PROJECTION_BLOCK_ROWS = 4096
+
+def generate_embedding(distance_matrix, random_state=42, init=None):
     """
     Generates a 2D embedding from a precomputed distance matrix using MDS.
     
     Args:
         distance_matrix (np.array): NxN distance matrix (e.g. Gower).
         random_state (int): Seed for reproducibility.
+        init (np.ndarray): Optional (N, 2) coordinates of a previous run; SMACOF starts
+            from them with a single initialization instead of 4 random ones.
         
     Returns:
         pd.DataFrame: DataFrame with 'x' and 'y' columns.
@@ -24,11 +38,11 @@ def generate_embedding(distance_matrix, random_state=42):
             metric=True, 
             dissimilarity='precomputed', 
             random_state=random_state,
-            n_init=4,
+            n_init=4 if init is None else 1,
             max_iter=300
         )
         
-        embedding = mds.fit_transform(distance_matrix)
+        embedding = mds.fit_transform(distance_matrix, init=init)
         
         df_embedding = pd.DataFrame(embedding, columns=['x', 'y'])
         
@@ -40,3 +54,123 @@ def generate_embedding(distance_matrix, random_state=42):
     except Exception as e:
         logger.error(f"MDS Embedding failed: {e}")
         raise
+
+def distances_to(D, rows, cols, n=None):
+    """
+    Distances D[rows][:, cols] from a condensed vector (or a square matrix) as float64.
+
+    Args:
+        D (np.ndarray): Condensed distance vector or square distance matrix.
+        rows (np.ndarray): Row indices.
+        cols (np.ndarray): Column indices.
+        n (int): Number of points (inferred from D if None).
+
+    Returns:
+        np.ndarray: (len(rows), len(cols)) distances; 0 on the diagonal.
+    """
+    if D.ndim == 2:
+        return np.asarray(D[np.ix_(rows, cols)], dtype=np.float64)
+    n = n or n_from_condensed(len(D))
+    i, j = np.asarray(rows)[:, None], np.asarray(cols)[None, :]
+    lo, hi = np.minimum(i, j), np.maximum(i, j)
+    pos = n * lo - lo * (lo + 1) // 2 + (hi - lo - 1)
+    out = np.asarray(D[np.where(lo == hi, 0, pos)], dtype=np.float64)
+    out[lo == hi] = 0.0
+    return out
+
+def embedding_raw_stress(D, coords):
+    """
+    Raw stress sum_{i<j} (d_ij - ||x_i - x_j||)^2, as sklearn's MDS.stress_.
+
+    Scans the condensed distances in bounded chunks (see `bcie_common.cluster_metrics`).
+    """
+    if D.ndim == 2:
+        D = squareform(D, checks=False)
+    n = n_from_condensed(len(D))
+    stress = 0.0
+    for pos_start, pos_stop, rows, cols in condensed_chunks(n):
+        fitted = np.sqrt(((coords[rows] - coords[cols]) ** 2).sum(axis=1))
+        stress += float(((np.asarray(D[pos_start:pos_stop], dtype=np.float64) - fitted) ** 2).sum())
+    return stress
+
+def align_to_previous(coords, previous):
+    """
+    Rotates/reflects and translates `coords` onto the previous run's coordinates (orthogonal
+    Procrustes on the rows both share), so the map keeps its orientation between runs.
+
+    `previous` must be row-aligned with `coords` (row i holds the previous position of the
+    same record, matched on a stable key; see `load_previous_coordinates`). Rows that are
+    NaN, i.e. records new in this run, are left out of the fit.
+    """
+    previous = np.asarray(previous, dtype=np.float64)
+    if previous.shape != coords.shape:
+        raise ValueError(f"Previous coordinates {previous.shape} are not row-aligned with {coords.shape}.")
+    shared = np.isfinite(previous).all(axis=1)
+    if shared.sum() < 3:
+        return coords
+    coords_mean, previous_mean = coords[shared].mean(axis=0), previous[shared].mean(axis=0)
+    rotation, _ = orthogonal_procrustes(coords[shared] - coords_mean, previous[shared] - previous_mean)
+    return (coords - coords_mean) @ rotation + previous_mean
+
+def generate_landmark_embedding(distance_matrix, n_landmarks=500, random_state=42, init=None):
+    """
+    Generates a 2D embedding with Landmark MDS (de Silva & Tenenbaum, 2004).
+
+    Classical MDS is solved on `n_landmarks` points picked by max-min distance; every other
+    point is placed by distance-based triangulation from its distances to the landmarks.
+    Time is O(N * L) plus one O(N^2) chunked scan for the stress, and memory is O(N * L)
+    per block instead of the O(N^2) SMACOF iterations.
+
+    Args:
+        distance_matrix (np.array): Condensed distance vector or NxN distance matrix.
+        n_landmarks (int): Number of landmarks (all points if N is smaller).
+        random_state (int): Seed for the first landmark.
+        init (np.ndarray): Optional (N, 2) coordinates of a previous run, row-aligned with the
+            distances (NaN for new records); the result is aligned to them
+            (rotation/reflection + translation) for a stable map orientation.
+
+    Returns:
+        Tuple[pd.DataFrame, float]: DataFrame with 'x' and 'y' columns and the raw stress.
+    """
+    D = distance_matrix
+    n = D.shape[0] if D.ndim == 2 else n_from_condensed(len(D))
+    n_landmarks = min(n_landmarks, n)
+    logger.info(f"Generating 2D embedding using Landmark MDS ({n_landmarks} landmarks, {n} points)...")
+
+    try:
+        # 1. Max-min landmark selection (spreads landmarks over the whole space)
+        rng = np.random.default_rng(random_state)
+        landmarks = [int(rng.integers(n))]
+        min_dist = distances_to(D, np.arange(n), landmarks, n)[:, 0]
+        for _ in range(n_landmarks - 1):
+            landmarks.append(int(np.argmax(min_dist)))
+            min_dist = np.minimum(min_dist, distances_to(D, np.arange(n), landmarks[-1:], n)[:, 0])
+        landmarks = np.asarray(landmarks)
+
+        # 2. Classical MDS on the landmarks: B = -1/2 J Delta^2 J
+        delta_sq = distances_to(D, landmarks, landmarks, n) ** 2
+        centering = np.eye(n_landmarks) - 1.0 / n_landmarks
+        gram = -0.5 * centering @ delta_sq @ centering
+        eigvals, eigvecs = eigh(gram, subset_by_index=[n_landmarks - 2, n_landmarks - 1])
+        order = np.argsort(eigvals)[::-1]
+        eigvals, eigvecs = np.clip(eigvals[order], 1e-12, None), eigvecs[:, order]
+
+        # 3. Triangulation of every point: x = -1/2 L# (delta_x - mean delta)
+        pseudo_inv = eigvecs / np.sqrt(eigvals)
+        mean_sq = delta_sq.mean(axis=0)
+        embedding = np.empty((n, 2))
+        for start in range(0, n, PROJECTION_BLOCK_ROWS):
+            rows = np.arange(start, min(start + PROJECTION_BLOCK_ROWS, n))
+            sq = distances_to(D, rows, landmarks, n) ** 2
+            embedding[rows] = -0.5 * (sq - mean_sq) @ pseudo_inv
+
+        if init is not None:
+            embedding = align_to_previous(embedding, np.asarray(init, dtype=np.float64))
+
+        stress = embedding_raw_stress(D, embedding)
+        logger.info(f"Embedding generation complete. Stress: {stress:.4f}")
+        return pd.DataFrame(embedding, columns=['x', 'y']), stress
+
+    except Exception as e:
+        logger.error(f"Landmark MDS Embedding failed: {e}")
+        raise
@@ -5,6 +5,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Elements per block (rows x columns) in the condensed engine: ~16 MB per float32 buffer
+BLOCK_ELEMENTS = 4_000_000
+
 def compute_gower_distance(df: pd.DataFrame, cat_features: list = None):
     """
     Computes the Gower Distance Matrix for a given DataFrame.
@@ -44,3 +47,86 @@ def compute_gower_distance(df: pd.DataFrame, cat_features: list = None):
     except Exception as e:
         logger.error(f"Gower computation failed: {e}")
         raise
+
+def condensed_size(n: int) -> int:
+    """Number of pairs i < j (length of the scipy condensed vector)."""
+    return n * (n - 1) // 2
+
+def condensed_offset(i: int, n: int) -> int:
+    """Position of the pair (i, i + 1) in the condensed vector."""
+    return i * n - i * (i + 1) // 2
+
+def compute_gower_condensed(
+    df: pd.DataFrame,
+    num_features: list,
+    cat_features: list,
+    dtype=np.float32,
+    memmap_path=None,
+    block_rows: int = None
+) -> np.ndarray:
+    """
+    Computes the Gower distance directly in condensed form (upper triangle, scipy order).
+
+    Same distance as `compute_gower_distance` (equal weights, range-normalized L1 for
+    numeric features, 0/1 mismatch for categorical ones), but without the N x N matrix:
+    pairs are computed in row blocks and written into a vector of N(N-1)/2 entries in
+    `dtype` (float32 by default: a quarter of the dense float64 matrix, 2N^2 bytes),
+    optionally a `np.memmap` backed by a file.
+
+    The memmap only moves the storage of the distances to disk; it does not make the
+    pipeline out-of-core. `scipy.cluster.hierarchy.linkage` converts its input to a
+    float64 array in RAM (4N^2 bytes) and the average-linkage routine works on a second
+    float64 copy (another 4N^2), so the linkage step peaks at about 10N^2 bytes with the
+    float32 vector resident (~1 GB at N = 10,000).
+
+    Args:
+        df: DataFrame with the features.
+        num_features: Numeric columns (e.g. ['log_Monto', 'log_Cant']).
+        cat_features: Categorical columns (e.g. ['Sector']).
+        dtype: Output dtype.
+        memmap_path: If given, the vector is a np.memmap backed by this file.
+        block_rows: Rows per block. Default: BLOCK_ELEMENTS // N.
+
+    Returns:
+        np.ndarray (or np.memmap) of shape (N(N-1)/2,), ready for `scipy.cluster.hierarchy.linkage`.
+    """
+    n = len(df)
+    n_features = len(num_features) + len(cat_features)
+    logger.info(f"Computing condensed Gower distances for {n} samples ({condensed_size(n)} pairs)...")
+
+    # Range-normalized numerics: |x_i - x_j| / range == |z_i - z_j| with z = (x - min) / range
+    num = df[num_features].to_numpy(dtype=np.float64)
+    mins = np.nanmin(num, axis=0) if n else np.zeros(len(num_features))
+    ranges = (np.nanmax(num, axis=0) - mins) if n else np.zeros(len(num_features))
+    scale = np.divide(1.0, ranges, out=np.zeros_like(ranges), where=ranges != 0)
+    num = ((num - mins) * scale).astype(dtype)
+    # Categories as integer codes (missing values form their own category)
+    codes = np.column_stack([pd.factorize(df[col], use_na_sentinel=False)[0] for col in cat_features]) \
+        if cat_features else np.empty((n, 0), dtype=np.int64)
+
+    size = condensed_size(n)
+    if memmap_path is not None:
+        out = np.memmap(memmap_path, dtype=dtype, mode='w+', shape=(size,))
+    else:
+        out = np.empty(size, dtype=dtype)
+
+    block_rows = block_rows or max(1, BLOCK_ELEMENTS // max(n, 1))
+    for start in range(0, max(n - 1, 0), block_rows):
+        stop = min(start + block_rows, n - 1)
+        # Rectangle rows [start, stop) x columns [start, n); only j > i is kept
+        acc = np.zeros((stop - start, n - start), dtype=dtype)
+        tmp = np.empty_like(acc)
+        for c in range(num.shape[1]):
+            np.subtract(num[start:stop, c, None], num[None, start:, c], out=tmp)
+            acc += np.abs(tmp, out=tmp)
+        for c in range(codes.shape[1]):
+            acc += codes[start:stop, c, None] != codes[None, start:, c]
+        acc /= n_features
+        for i in range(start, stop):
+            offset = condensed_offset(i, n)
+            out[offset:offset + n - i - 1] = acc[i - start, i - start + 1:]
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    logger.info("Condensed Gower computation complete.")
+    return out
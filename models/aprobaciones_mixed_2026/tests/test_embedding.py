@@ -0,0 +1,36 @@
+import numpy as np
+from scipy.spatial.distance import pdist, squareform
+
+from src.utils.embedding import (
+    align_to_previous, embedding_raw_stress, generate_embedding, generate_landmark_embedding
+)
+
+
+def test_landmark_recovers_euclidean_layout():
+    rng = np.random.default_rng(0)
+    points = rng.normal(size=(900, 2)) * [3.0, 1.0]
+    condensed = pdist(points)
+
+    df_emb, stress = generate_landmark_embedding(condensed, n_landmarks=60)
+    # Exact 2D distances: classical MDS + triangulation reproduce them up to rotation
+    assert np.allclose(pdist(df_emb[['x', 'y']].to_numpy()), condensed, atol=1e-6)
+    assert stress < 1e-8
+
+    # Square input and condensed input give the same map
+    df_square, _ = generate_landmark_embedding(squareform(condensed), n_landmarks=60)
+    assert np.allclose(df_square.to_numpy(), df_emb.to_numpy())
+
+
+def test_raw_stress_matches_smacof_and_alignment():
+    rng = np.random.default_rng(1)
+    D = squareform(pdist(rng.normal(size=(120, 4))))
+    df_emb, stress = generate_embedding(D)
+    assert np.isclose(embedding_raw_stress(D, df_emb.to_numpy()), stress)
+
+    coords = df_emb.to_numpy()
+    rotation = np.array([[0.0, -1.0], [-1.0, 0.0]])
+    assert np.allclose(align_to_previous(coords @ rotation + 5.0, coords), coords)
+    # Rows new in this run (NaN) do not take part in the fit but are still moved
+    partial = coords.copy()
+    partial[::7] = np.nan
+    assert np.allclose(align_to_previous(coords @ rotation + 5.0, partial), coords)
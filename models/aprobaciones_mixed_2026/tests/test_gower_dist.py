@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial.distance import squareform
+
+from src.utils.gower_dist import compute_gower_condensed, compute_gower_distance
+
+
+def make_features(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'log_Monto': np.log10(rng.lognormal(16, 2, n) + 1),
+        'log_Cant': np.log1p(rng.integers(1, 30, n)),
+        'Sector': pd.Series(rng.choice(['Sector Público', 'Sector Privado', 'Unknown'], n), dtype=object)
+    })
+
+
+def test_condensed_matches_gower_package(tmp_path):
+    df = make_features(400)
+    expected = squareform(compute_gower_distance(df, cat_features=['Sector']), checks=False)
+
+    for block_rows in (None, 1, 37):
+        condensed = compute_gower_condensed(df, ['log_Monto', 'log_Cant'], ['Sector'], block_rows=block_rows)
+        assert condensed.dtype == np.float32 and condensed.shape == expected.shape
+        np.testing.assert_allclose(condensed, expected, atol=1e-6)
+
+    mapped = compute_gower_condensed(df, ['log_Monto', 'log_Cant'], ['Sector'],
+                                     memmap_path=tmp_path / "gower.f32")
+    assert isinstance(mapped, np.memmap)
+    np.testing.assert_allclose(mapped, expected, atol=1e-6)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import pdist, squareform
+
+from src.pipelines.training_pipeline import (
+    hierarchical_labels_for_ks, linkage_from_distance, load_previous_coordinates
+)
+
+
+def baseline_labels(D, k, method="average"):
+    """Original per-K implementation: a fresh linkage on the square float64 matrix for every K."""
+    return fcluster(linkage(squareform(D, checks=False), method=method), t=k, criterion="maxclust") - 1
+
+
+def test_single_linkage_tree_matches_per_k_scipy_linkage():
+    rng = np.random.default_rng(0)
+    D = squareform(pdist(rng.normal(size=(120, 3))))
+
+    # Square matrix, condensed float64 and the pipeline's condensed float32 Gower vector
+    for distances in (D, squareform(D), squareform(D).astype(np.float32)):
+        labels_by_k = hierarchical_labels_for_ks(linkage_from_distance(distances), range(2, 16))
+        for k, labels in labels_by_k.items():
+            np.testing.assert_array_equal(labels, baseline_labels(D, k))
+
+
+def test_previous_coordinates_are_matched_on_key_not_row_order(tmp_path):
+    df = pd.DataFrame({'Pais': ['HONDURAS', 'GUATEMALA', 'PANAMA', 'HONDURAS'], 'Anio': [2020, 2020, 2021, 2021]})
+    # Previous output: other row order, one row that no longer exists and a new current row (PANAMA)
+    previous = pd.DataFrame({
+        'Pais': ['HONDURAS', 'MEXICO', 'GUATEMALA', 'HONDURAS'], 'Anio': [2021, 2019, 2020, 2020],
+        'x': [4.0, 9.0, 2.0, 1.0], 'y': [-4.0, -9.0, -2.0, -1.0]
+    })
+    path = tmp_path / "aprobaciones_clusters.csv"
+    previous.to_csv(path, index=False)
+
+    coords = load_previous_coordinates(path, df, ['Pais', 'Anio'], {'data': {'storage_format': 'csv'}})
+    np.testing.assert_array_equal(coords, [[1.0, -1.0], [2.0, -2.0], [np.nan, np.nan], [4.0, -4.0]])
@@ -1,4 +1,5 @@
 import pandas as pd
+import sys
 from neuralprophet import NeuralProphet, set_log_level
 import yaml
 import logging
@@ -6,12 +7,24 @@ from pathlib import Path
 import time
 import warnings
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists, write_table
+from bcie_common.instrumentation import instrument, span
+
 # Suprimir logs y warnings
 set_log_level("ERROR")
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 warnings.filterwarnings("ignore", category=FutureWarning)
 
-def train_country_model(group_name, df_group, periods, freq):
+def get_fit_kwargs(disable_logs=True):
+    # Sin MetricsLogger ni ModelCheckpoint no se crean lightning_logs/version_* ni checkpoints
+    if disable_logs:
+        return {'metrics': False, 'checkpointing': False}
+    return {}
+
+@instrument(kind='fit')
+def train_country_model(group_name, df_group, periods, freq, disable_logs=False):
     try:
         # 1. Preparar datos y Agrupar ANUALMENTE ('YS')
         df_prophet = df_group.rename(columns={'Fecha_Aprobacion': 'ds', 'Monto_Aprobado': 'y'})
@@ -34,7 +47,7 @@ def train_country_model(group_name, df_group, periods, freq):
         )
         
         # Fit con barra de progreso desactivada para logs limpios
-        metrics = m.fit(df_prophet, freq='YS', progress=None) # 'YS' es critico
+        metrics = m.fit(df_prophet, freq='YS', progress=None, **get_fit_kwargs(disable_logs)) # 'YS' es critico
         
         # 4. Predecir Futuro
         future = m.make_future_dataframe(df_prophet, periods=periods)
@@ -65,12 +78,77 @@ def train_country_model(group_name, df_group, periods, freq):
         logging.error(f"Fallo en {group_name}: {e}")
         return pd.DataFrame()
 
+@instrument(kind='fit')
+def train_global_model(df, periods, freq, trend_global_local='local',
+                       season_global_local='local', disable_logs=True):
+    """
+    Entrena un unico NeuralProphet para todos los paises usando la columna ID.
+
+    El coste de inicializar el trainer de PyTorch Lightning se paga una sola vez, de modo
+    que el tiempo total es practicamente independiente del numero de paises.
+    `trend_global_local` / `season_global_local` controlan si la tendencia y la
+    estacionalidad se comparten entre paises ('global') o son propias de cada uno ('local').
+    """
+    try:
+        # 1. Series anuales por pais en formato largo (ds, y, ID)
+        series = []
+        for group_name, df_group in df.groupby('Pais', sort=False, observed=True):
+            df_prophet = df_group.rename(columns={'Fecha_Aprobacion': 'ds', 'Monto_Aprobado': 'y'})
+            df_prophet = df_prophet.groupby(pd.Grouper(key='ds', freq='YS'))['y'].sum().reset_index()
+            if len(df_prophet) < 2: continue
+            df_prophet['ID'] = group_name
+            series.append(df_prophet)
+
+        if not series: return pd.DataFrame()
+        df_np = pd.concat(series, ignore_index=True)
+
+        # 2. Detectar la ULTIMA FECHA REAL de cada pais
+        last_real_date = df_np.groupby('ID')['ds'].max()
+
+        # 3. Entrenar NeuralProphet global
+        m = NeuralProphet(
+            quantiles=[0.1, 0.9],
+            yearly_seasonality=False,
+            weekly_seasonality=False,
+            daily_seasonality=False,
+            trend_global_local=trend_global_local,
+            season_global_local=season_global_local,
+            epochs=100,
+            learning_rate=0.01
+        )
+        m.fit(df_np, freq=freq, progress=None, **get_fit_kwargs(disable_logs))
+
+        # 4. Predecir Futuro (make_future_dataframe extiende cada ID por separado)
+        future = m.make_future_dataframe(df_np, periods=periods)
+        forecast = m.predict(future)
+
+        # 5. Mapeo de columnas NeuralProphet -> Formato Dashboard
+        forecast = forecast.rename(columns={
+            'yhat1': 'yhat',
+            'yhat1 10.0%': 'yhat_lower',
+            'yhat1 90.0%': 'yhat_upper'
+        })
+
+        # 6. FILTRO CRITICO: Solo fechas ESTRICTAMENTE MAYORES a la ultima real de cada pais
+        forecast = forecast[forecast['ds'] > forecast['ID'].map(last_real_date)]
+
+        res = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+        res['Pais'] = forecast['ID'].to_numpy()
+
+        logging.info(f"Modelo global completado ({len(series)} paises).")
+        return res.reset_index(drop=True)
+
+    except Exception as e:
+        logging.error(f"Fallo en el modelo global: {e}")
+        return pd.DataFrame()
+
+@instrument()
 def run_training(config_path):
     with open(config_path, 'r') as f: config = yaml.safe_load(f)
     data_path = config['data']['processed_path']
-    if not Path(data_path).exists(): return
+    if not table_exists(data_path, config=config): return
 
-    df = pd.read_csv(data_path)
+    df = read_table(data_path, config=config)
     df['Fecha_Aprobacion'] = pd.to_datetime(df['Fecha_Aprobacion'])
 
     # Parametros
@@ -79,12 +157,26 @@ def run_training(config_path):
     
     logging.info(f"Entrenando modelos para {len(paises)} paises (NeuralProphet)...")
 
-    # Ejecucion Secuencial
+    training_mode = config['model'].get('training_mode', 'global')
+    disable_logs = config['model'].get('disable_lightning_logs', True)
+
     resultados = []
     start_total = time.time()
-    for pais in paises:
-        res = train_country_model(pais, df[df['Pais'] == pais], horizonte, 'YS')
-        resultados.append(res)
+    with span('fit', kind='fit', mode=training_mode) as fit_span:
+        fit_span.rows = len(df)
+        if training_mode == 'global':
+            # Un solo modelo para todos los paises (columna ID)
+            resultados.append(train_global_model(
+                df, horizonte, 'YS',
+                trend_global_local=config['model'].get('trend_global_local', 'local'),
+                season_global_local=config['model'].get('season_global_local', 'local'),
+                disable_logs=disable_logs
+            ))
+        else:
+            # Ejecucion Secuencial
+            for pais in paises:
+                res = train_country_model(pais, df[df['Pais'] == pais], horizonte, 'YS', disable_logs=disable_logs)
+                resultados.append(res)
     
     duration_total = time.time() - start_total
     logging.info(f"Entrenamiento total completado en {duration_total:.2f} segundos.")
@@ -92,8 +184,7 @@ def run_training(config_path):
     if resultados:
         final_df = pd.concat(resultados, ignore_index=True)
         output_path = "data/04-predictions/predicciones_bcie.csv"
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        final_df.to_csv(output_path, index=False)
+        write_table(final_df, output_path, config)
         logging.info("Predicciones futuras guardadas correctamente (NeuralProphet).")
 
 if __name__ == "__main__":
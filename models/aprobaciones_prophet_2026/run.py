@@ -1,11 +1,15 @@
 import sys
 import os
+import yaml
+from pathlib import Path
 
 # Mensaje de prueba inmediato
 print("INICIANDO EJECUCION DEL SCRIPT...")
 
 # Ajuste de rutas para encontrar la carpeta src
 sys.path.append(os.getcwd())
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 try:
     from src.pipelines.etl_pipeline import run_etl
@@ -14,12 +18,38 @@ try:
     from src.pipelines.visualization_pipeline import generate_plots
     # Dashboard Ejecutivo (Histórico) - NUEVO
     from src.pipelines.historical_pipeline import generate_historical_report
+    from bcie_common.stages import Stage, main as run_pipeline
     
     print("Modulos importados correctamente.")
 except ImportError as e:
     print(f"ERROR CRITICO: No se pudieron importar los modulos. {e}")
     sys.exit(1)
 
+def build_stages(config_path):
+    """Etapas del pipeline; cada una se omite si sus entradas no cambiaron desde la ultima corrida."""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    processed_path = config['data']['processed_path']
+    predictions_path = "data/04-predictions/predicciones_bcie.csv"
+
+    return [
+        # Paso 1: ETL (siempre: la extraccion es incremental y con cache compartida)
+        Stage('etl', run_etl, [config_path], config=['api', 'data'],
+              outputs=[processed_path], always=True),
+        # Paso 2: Entrenamiento
+        Stage('training', run_training, [config_path], config=['data', 'model'],
+              deps=['etl'], outputs=[predictions_path]),
+        # Paso 3: Visualizacion (Predicciones); si falla se intenta igual el histórico
+        Stage('visualization', generate_plots, [config_path], config=['data'],
+              deps=['etl', 'training'], code=['src/dashboard'], required=False,
+              outputs=['src/dashboard/Estrategico/dashboard_estrategico.html',
+                       'src/dashboard/Ejecutivo/dashboard_ejecutivo.html']),
+        # Paso 4: Visualizacion (Histórico)
+        Stage('historical', generate_historical_report, [config_path], config=['data'],
+              deps=['etl'], code=['src/dashboard'], required=False,
+              outputs=['src/dashboard/dashboard_ejecutivo.html'])
+    ]
+
 def main():
     config_path = "config/local.yaml"
 
@@ -27,38 +57,13 @@ def main():
         print(f"ERROR: No se encuentra el archivo de configuracion en: {config_path}")
         return
 
-    # Paso 1: ETL
-    print("--- PASO 1: Extraccion y Transformacion (ETL) ---")
-    try:
-        run_etl(config_path)
-    except Exception as e:
-        print(f"FALLO EN ETL: {e}")
-        return
-
-    # Paso 2: Entrenamiento
-    print("\n--- PASO 2: Entrenamiento del Modelo ---")
-    try:
-        run_training(config_path)
-    except Exception as e:
-        print(f"FALLO EN ENTRENAMIENTO: {e}")
-        return
-
-    # Paso 3: Visualizacion (Predicciones)
-    print("\n--- PASO 3: Generacion Dashboard Predicciones (Prophet) ---")
-    try:
-        generate_plots(config_path)
-    except Exception as e:
-        print(f"FALLO EN GRAFICOS PREDICCION: {e}")
-        # No detenemos el script para intentar generar el histórico
-
-    # Paso 4: Visualizacion (Histórico)
-    print("\n--- PASO 4: Generacion Dashboard Ejecutivo (Historico) ---")
-    try:
-        generate_historical_report(config_path)
-    except Exception as e:
-        print(f"FALLO EN GRAFICOS HISTORICOS: {e}")
+    # python run.py [--force etl|training|visualization|historical|all]
+    report = run_pipeline(build_stages(config_path), config_path, description="Pipeline Prophet BCIE")
 
-    print("\nPROCESO COMPLETADO EXITOSAMENTE")
+    if report['success']:
+        print("\nPROCESO COMPLETADO EXITOSAMENTE")
+    else:
+        print("\nPROCESO INTERRUMPIDO (ver el resumen de etapas)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -6,9 +6,15 @@ limpieza, normalización y unificación de los datos históricos y predictivos.
 """
 
 import pandas as pd
+import sys
+from pathlib import Path
 from datetime import datetime
 from src.dashboard.config import SOCIO_MAP
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.schema import map_codes, pais_label
+
 def prepare_unified_data(df_hist, df_pred):
     """
     Unifica y normaliza los conjuntos de datos históricos y predictivos.
@@ -62,28 +68,15 @@ def prepare_unified_data(df_hist, df_pred):
             
     df_unico = pd.concat([hist[cols], pred[cols]], ignore_index=True)
     
-    df_unico['País_Upper'] = df_unico['País'].astype(str).str.upper().str.strip()
-    df_unico['País_Upper'] = df_unico['País_Upper'].replace({
-        'REPUBLICA DE CHINA (TAIWAN)': 'TAIWAN', 'REPUBLICA DE COREA': 'COREA', 'BELIZE': 'BELICE'
-    })
+    # País y Sector llegan normalizados desde el ETL (bcie_common.schema); aquí solo se
+    # traduce la clave canónica del país, una vez por categoría
+    pais = df_unico['País'].astype('category')
 
     mask_missing = (df_unico['Tipo de Socio'] == 'Otro') | (df_unico['Tipo de Socio'].isnull())
     if mask_missing.any():
-        df_unico.loc[mask_missing, 'Tipo de Socio'] = df_unico.loc[mask_missing, 'País_Upper'].map(SOCIO_MAP).fillna('Otro')
-    
-    df_unico['País'] = df_unico['País'].astype(str).str.title().str.strip()
-    df_unico['País'] = df_unico['País'].replace({
-        'Republica Dominicana': 'República Dominicana', 'Mexico': 'México', 'Panama': 'Panamá', 
-        'Taiwan': 'Taiwán', 'Corea': 'Corea', 'Espana': 'España'
-    })
-    
-    if 'Sector Institucional' in df_unico.columns:
-        df_unico['Sector Institucional'] = df_unico['Sector Institucional'].astype(str).str.title().str.strip()
-        df_unico['Sector Institucional'] = df_unico['Sector Institucional'].replace({
-            'Publico': 'Sector Público', 'Sector Publico': 'Sector Público',
-            'Privado': 'Sector Privado', 'Sector Privado': 'Sector Privado',
-            'No Definido': 'No Definido'
-        })
+        df_unico.loc[mask_missing, 'Tipo de Socio'] = map_codes(pais, SOCIO_MAP, 'Otro')[mask_missing]
+
+    df_unico['País'] = map_codes(pais, pais_label)
 
     df_unico['Fecha'] = pd.to_datetime(df_unico['Fecha'])
     df_unico['Año'] = df_unico['Fecha'].dt.year
@@ -129,26 +122,25 @@ def process_executive_data(df_raw):
     
     # 2. Agregación Sector
     if 'Cantidad' in df.columns:
-        agg_sector = df.groupby('Sector')[['Monto', 'Cantidad']].sum().reset_index().sort_values('Monto', ascending=False)
+        agg_sector = df.groupby('Sector', observed=True)[['Monto', 'Cantidad']].sum().reset_index().sort_values('Monto', ascending=False)
     else:
-        agg_sector = df.groupby('Sector')['Monto'].agg(['sum', 'count']).reset_index()
+        agg_sector = df.groupby('Sector', observed=True)['Monto'].agg(['sum', 'count']).reset_index()
         agg_sector.columns = ['Sector', 'Monto', 'Cantidad']
     
     # 3. Agregación Tipo Socio (Usando Mapa si es necesario)
     # 3. Agregación Tipo Socio
     if 'Tipo' not in df.columns:
-        df['País_Upper'] = df['País'].astype(str).str.upper().str.strip()
-        df['Tipo'] = df['País_Upper'].map(SOCIO_MAP).fillna('Otro')
+        df['Tipo'] = map_codes(df['País'], SOCIO_MAP, 'Otro')
         
     if 'Cantidad' in df.columns:
         agg_tipo = df.groupby('Tipo')[['Monto', 'Cantidad']].sum().reset_index().sort_values('Monto', ascending=True)
-        agg_pais = df.groupby('País')[['Monto', 'Cantidad']].sum().reset_index().sort_values('Monto', ascending=False)
+        agg_pais = df.groupby('País', observed=True)[['Monto', 'Cantidad']].sum().reset_index().sort_values('Monto', ascending=False)
     else:
         agg_tipo = df.groupby('Tipo')['Monto'].agg(['sum', 'count']).reset_index()
         agg_tipo.columns = ['Tipo', 'Monto', 'Cantidad']
         agg_tipo = agg_tipo.sort_values('Monto', ascending=True)
         
-        agg_pais = df.groupby('País')['Monto'].agg(['sum', 'count']).reset_index()
+        agg_pais = df.groupby('País', observed=True)['Monto'].agg(['sum', 'count']).reset_index()
         agg_pais.columns = ['País', 'Monto', 'Cantidad']
         agg_pais = agg_pais.sort_values('Monto', ascending=False)
     
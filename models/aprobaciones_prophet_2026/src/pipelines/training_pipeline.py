@@ -1,26 +1,64 @@
 import pandas as pd
+import sys
+import numpy as np
 from prophet import Prophet
 from joblib import Parallel, delayed
 import yaml
+import json
 import logging
 from pathlib import Path
 
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+from bcie_common.storage import read_table, table_exists, write_table
+from bcie_common.instrumentation import instrument, span
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
-def train_country_model(group_name, df_group, periods, freq):
-    try:
-        # 1. Preparar datos y Agrupar ANUALMENTE ('YS')
-        df_prophet = df_group.rename(columns={'Fecha_Aprobacion': 'ds', 'Monto_Aprobado': 'y'})
-        df_prophet = df_prophet.groupby(pd.Grouper(key='ds', freq='YS'))['y'].sum().reset_index()
+def aggregate_country_series(df_group):
+    # Agrupar ANUALMENTE ('YS') en el proceso principal: cada worker recibe solo su serie
+    df_prophet = df_group.rename(columns={'Fecha_Aprobacion': 'ds', 'Monto_Aprobado': 'y'})
+    return df_prophet.groupby(pd.Grouper(key='ds', freq='YS'))['y'].sum().reset_index()
 
-        if len(df_prophet) < 2: return pd.DataFrame()
+def extract_warm_start(m):
+    """
+    Extrae los parametros ajustados de Prophet en el formato `init` de Stan.
+    (Receta oficial de Prophet para 'warm-start' de modelos.)
+    """
+    res = {}
+    for pname in ['k', 'm', 'sigma_obs']:
+        if m.mcmc_samples == 0:
+            res[pname] = float(m.params[pname][0][0])
+        else:
+            res[pname] = float(np.mean(m.params[pname]))
+    for pname in ['delta', 'beta']:
+        if m.mcmc_samples == 0:
+            res[pname] = np.asarray(m.params[pname][0], dtype=float).tolist()
+        else:
+            res[pname] = np.mean(m.params[pname], axis=0).astype(float).tolist()
+    return res
+
+@instrument(kind='fit')
+def train_country_model(group_name, df_prophet, periods, freq, init=None):
+    try:
+        # 1. Serie anual ya agregada (ds, y)
+        if len(df_prophet) < 2: return pd.DataFrame(), None
 
         # 2. Detectar la ULTIMA FECHA REAL (Ej: 2025-01-01)
         last_real_date = df_prophet['ds'].max()
 
-        # 3. Entrenar
+        # 3. Entrenar (con warm-start si hay parametros de la corrida anterior)
         m = Prophet(seasonality_mode='multiplicative', yearly_seasonality=False)
-        m.fit(df_prophet)
+        if init is not None:
+            try:
+                m.fit(df_prophet, init=init)
+            except Exception as e:
+                # Dimensiones distintas (p. ej. nuevos changepoints): ajuste desde cero
+                logging.warning(f"Warm-start descartado para {group_name}: {e}")
+                m = Prophet(seasonality_mode='multiplicative', yearly_seasonality=False)
+                m.fit(df_prophet)
+        else:
+            m.fit(df_prophet)
         
         # 4. Predecir Futuro
         future = m.make_future_dataframe(periods=periods, freq='YS')
@@ -32,18 +70,29 @@ def train_country_model(group_name, df_group, periods, freq):
         
         res = forecast_future[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
         res['Pais'] = group_name
-        return res
+        return res, extract_warm_start(m)
 
     except Exception as e:
         logging.error(f"Fallo en {group_name}: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
+
+def load_warm_start(path):
+    if not Path(path).exists(): return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
+def save_warm_start(path, params_by_country):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(params_by_country, f, ensure_ascii=False, indent=2)
+
+@instrument()
 def run_training(config_path):
     with open(config_path, 'r') as f: config = yaml.safe_load(f)
     data_path = config['data']['processed_path']
-    if not Path(data_path).exists(): return
+    if not table_exists(data_path, config=config): return
 
-    df = pd.read_csv(data_path)
+    df = read_table(data_path, config=config)
     df['Fecha_Aprobacion'] = pd.to_datetime(df['Fecha_Aprobacion'])
 
     # Parametros
@@ -52,16 +101,34 @@ def run_training(config_path):
     
     logging.info(f"Entrenando modelos para {len(paises)} paises (Frecuencia Anual)...")
 
-    resultados = Parallel(n_jobs=-1, backend="threading")(
-        delayed(train_country_model)(pais, df[df['Pais'] == pais], horizonte, 'YS') for pais in paises
-    )
+    # Backend por procesos (loky): el ajuste de Stan es intensivo en CPU y con hilos se serializa
+    backend = config['model'].get('parallel_backend', 'loky')
+    n_jobs = config['model'].get('n_jobs', -1)
+    use_warm_start = config['model'].get('warm_start', True)
+
+    output_path = "data/04-predictions/predicciones_bcie.csv"
+    warm_start_path = str(Path(output_path).parent / "prophet_warm_start.json")
+    warm_start = load_warm_start(warm_start_path) if use_warm_start else {}
+    if warm_start:
+        logging.info(f"Warm-start disponible para {len(warm_start)} paises.")
+
+    series = {pais: aggregate_country_series(df_group) for pais, df_group in df.groupby('Pais', sort=False, observed=True)}
+
+    with span('fit', kind='fit', backend=backend) as fit_span:
+        fit_span.rows = len(df)
+        salidas = Parallel(n_jobs=n_jobs, backend=backend)(
+            delayed(train_country_model)(pais, series[pais], horizonte, 'YS', warm_start.get(pais)) for pais in paises
+        )
+    resultados = [res for res, _ in salidas]
     
     if resultados:
         final_df = pd.concat(resultados, ignore_index=True)
-        output_path = "data/04-predictions/predicciones_bcie.csv"
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        final_df.to_csv(output_path, index=False)
+        write_table(final_df, output_path, config)
         logging.info("Predicciones futuras guardadas correctamente.")
 
+    if use_warm_start:
+        warm_start.update({pais: params for pais, (_, params) in zip(paises, salidas) if params is not None})
+        save_warm_start(warm_start_path, warm_start)
+
 if __name__ == "__main__":
     run_training("config/local.yaml")
\ No newline at end of file
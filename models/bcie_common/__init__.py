@@ -0,0 +1,5 @@
+"""
+Utilidades compartidas por los proyectos del laboratorio (models/aprobaciones_*_2026).
+
+Cada proyecto las importa desde su `src/pipelines` agregando `models/` al sys.path.
+"""
@@ -0,0 +1,299 @@
+"""
+Benchmark de escalamiento de los modelos con datos sintéticos (`python models/run_benchmarks.py`).
+
+Para cada proyecto y escala (número de registros, y de países con `series`):
+1. Se generan aprobaciones con `bcie_common.synthetic` y se sirven con `StubCkanServer` (con
+   `datastore_search_sql` para los modelos que agregan en el servidor).
+2. En una carpeta de trabajo (`.cache/benchmarks/work/<proyecto>/<escala>/`) se copia la
+   configuración del proyecto apuntando al servidor local, sin cache compartida ni modo
+   incremental, y se ejecutan el ETL y el entrenamiento.
+3. Cada paso corre en un proceso nuevo dentro de un span (`bcie_common.instrumentation`): el
+   pico de RSS es el del paso y no arrastra el de escalas anteriores. Antes de cerrar el span
+   se apagan los workers de joblib/loky para que su pico entre en RUSAGE_CHILDREN
+   (`children_peak_rss_mb`, el mayor de ellos, no la suma). Del span se toman tiempo de
+   reloj, CPU, filas y el desglose ajuste / métricas / I/O.
+
+Al final se estima el exponente de crecimiento entre escalas consecutivas
+(log(t2 / t1) / log(n2 / n1)): ~1 es lineal, ~2 cuadrático. Los pasos con exponente mayor que
+SUPERLINEAR marcan cuellos de botella como matrices de distancias n × n. Un proyecto deja de
+escalar tras el primer fallo o timeout.
+
+Archivos (relativos a `models/`):
+    .cache/benchmarks/scaling.csv    Una fila por proyecto, escala y paso.
+    .cache/benchmarks/scaling.json   Lo mismo, con la configuración de la corrida.
+"""
+
+import argparse
+import importlib
+import logging
+import math
+import os
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+from bcie_common import instrumentation
+from bcie_common.ckan_stub import StubCkanServer
+from bcie_common.lab import MODELS_DIR, thread_env
+from bcie_common.stages import save_json
+from bcie_common.synthetic import generate_approvals
+
+logger = logging.getLogger(__name__)
+
+BENCH_DIR = Path(".cache") / "benchmarks"
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+SUPERLINEAR = 1.5
+RUN_ID = "benchmark"
+ETL = ('src.pipelines.etl_pipeline', 'run_etl')
+
+# Proyecto -> función de entrenamiento (módulo, función, argumentos después de config_path)
+BENCHMARKS = {
+    'aprobaciones_kmeans_2026': ('src.pipelines.training_pipeline', 'train_kmeans', ()),
+    'aprobaciones_kmedoids_2026': ('src.pipelines.training_pipeline', 'train_kmedoids', ()),
+    'aprobaciones_gmm_2026': ('src.pipelines.training_pipeline', 'train_gmm', ()),
+    'aprobaciones_hierarchical_2026': ('src.pipelines.training_pipeline', 'train_hierarchical', ()),
+    'aprobaciones_dbscan_2026': ('src.pipelines.training_pipeline', 'train_dbscan', (RUN_ID,)),
+    'aprobaciones_hdbscan_2026': ('src.pipelines.training_pipeline', 'train_hdbscan', (RUN_ID,)),
+    'aprobaciones_mixed_2026': ('src.pipelines.training_pipeline', 'train_mixed_clustering', ()),
+    'aprobaciones_eda_2026': ('src.pipelines.training_pipeline', 'train_mixed_clustering', ()),
+    'aprobaciones_prophet_2026': ('src.pipelines.training_pipeline', 'run_training', ()),
+    'aprobaciones_neu_prophet_2026': ('src.pipelines.training_pipeline', 'run_training', ()),
+    'aprobaciones_StatsForecast_2026': ('src.pipelines.training_pipeline', 'run_training', ()),
+}
+STEPS = ('etl', 'train')
+
+# Columnas crudas del sintético -> nombre interno (el `column_renames` de la mayoría de proyectos)
+INTERNAL_NAMES = {
+    'ANIO_APROBACION': 'Anio_Origen', 'MONTO_BRUTO_USD': 'Monto_Aprobado', 'PAIS': 'Pais',
+    'SECTOR_INSTITUCIONAL': 'Sector_Economico', 'CANTIDAD_APROBACIONES': 'CANTIDAD_APROBACIONES'
+}
+
+
+def step_target(project_name, step):
+    if step == 'etl':
+        return ETL[0], ETL[1], ()
+    return BENCHMARKS[project_name]
+
+
+def run_step(project_dir, step):
+    """
+    Modo worker (`--worker`): ejecuta un paso en el cwd (la carpeta de trabajo) dentro de un
+    span raíz con el nombre del paso.
+    """
+    project_dir = Path(project_dir).resolve()
+    # Los pipelines importan `src.*` y algunos módulos de `src/` (p. ej. utils.gower_dist)
+    sys.path[:0] = [str(project_dir), str(project_dir / "src")]
+    module_name, func_name, extra_args = step_target(project_dir.name, step)
+    func = getattr(importlib.import_module(module_name), func_name)
+
+    instrumentation.start_run(BENCH_DIR / f"{step}.jsonl", run_id=RUN_ID)
+    with instrumentation.span(step, kind='stage', project=project_dir.name):
+        func("config/local.yaml", *extra_args)
+        # Workers reutilizables de joblib: se esperan aquí para que cuenten en RUSAGE_CHILDREN
+        from joblib.externals.loky import get_reusable_executor
+        get_reusable_executor().shutdown(wait=True)
+
+
+def project_records(records, column_renames):
+    """
+    Renombra las columnas del sintético a las que espera el ETL del proyecto: las que el
+    proyecto no renombra se entregan con su nombre interno (p. ej. mixed y eda, que consumen
+    otro recurso con columnas 'Monto Aprobado', 'Año Aprobación', ...).
+    """
+    raw_names = {internal: raw for raw, internal in (column_renames or {}).items()}
+    renames = {}
+    for column, internal in INTERNAL_NAMES.items():
+        if column not in (column_renames or {}):
+            renames[column] = raw_names.get(internal, internal)
+    return records.rename(columns=renames) if renames else records
+
+
+def prepare_workdir(project_dir, workdir, server):
+    """Copia `config/` con la sección api apuntando al servidor local y las carpetas de `data/`."""
+    if workdir.exists():
+        shutil.rmtree(workdir)
+    shutil.copytree(project_dir / "config", workdir / "config")
+    # Algunos pipelines escriben en data/... sin crear la carpeta (vacías, sin los datos reales)
+    for folder in (project_dir / "data").rglob("*"):
+        if folder.is_dir():
+            (workdir / folder.relative_to(project_dir)).mkdir(parents=True, exist_ok=True)
+    config_path = workdir / "config" / "local.yaml"
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    config['api'].update(base_url=server.url, resource_id=server.resource_id,
+                         incremental=False, shared_cache=False)
+    with open(config_path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+
+
+def step_metrics(spans_path, step):
+    """Métricas del span raíz del paso y de la función del pipeline que contiene."""
+    spans = instrumentation.read_spans(spans_path)
+    root = next((s for s in spans if s['name'] == step and s['parent'] is None), None)
+    if root is None:
+        return {}
+    pipeline = next((s for s in spans if s['parent'] == root['span_id']), None)
+    return {
+        'wall_s': root['wall_s'],
+        'cpu_s': root['cpu_s'],
+        'peak_rss_mb': root['process_peak_rss_mb'],
+        'children_peak_rss_mb': root['children_peak_rss_mb'],
+        'rows': pipeline['rows'] if pipeline else None,
+        'breakdown': instrumentation.summarize(spans, root['span_id'])
+    }
+
+
+def bench_project(project_dir, scale, records, series, threads, work_root, timeout=None):
+    """Ejecuta el ETL y el entrenamiento de un proyecto a una escala; una entrada por paso."""
+    with open(project_dir / "config" / "local.yaml", 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    api_config = config['api']
+    records = project_records(records, config['data'].get('column_renames'))
+    use_sql = api_config.get('aggregate', False) and api_config.get('use_sql', True)
+    workdir = work_root / project_dir.name / str(scale)
+
+    entries = []
+    with StubCkanServer(records, sql=use_sql) as server:
+        prepare_workdir(project_dir, workdir, server)
+        env = thread_env(threads, project_dir)
+        env['PYTHONPATH'] = os.pathsep.join([str(MODELS_DIR), env['PYTHONPATH']])
+        for step in STEPS:
+            command = [sys.executable, "-m", "bcie_common.benchmarks", "--worker", step,
+                       "--project-dir", str(project_dir)]
+            log_path = workdir / f"{step}.log"
+            start = time.perf_counter()
+            with open(log_path, 'w', encoding='utf-8') as log:
+                try:
+                    returncode = subprocess.run(command, cwd=workdir, env=env, stdout=log,
+                                                stderr=subprocess.STDOUT, timeout=timeout).returncode
+                    status = 'ok' if returncode == 0 else 'failed'
+                except subprocess.TimeoutExpired:
+                    status = 'timeout'
+            entry = {
+                'project': project_dir.name, 'scale': scale, 'series': series, 'step': step,
+                'status': status, 'process_s': round(time.perf_counter() - start, 3),
+                'log': str(log_path)
+            }
+            entry.update(step_metrics(workdir / BENCH_DIR / f"{step}.jsonl", step))
+            entries.append(entry)
+            logger.info(f"[{project_dir.name}] {step} n={scale}: {status} "
+                        f"({entry.get('wall_s', entry['process_s']):.2f} s, "
+                        f"{entry.get('peak_rss_mb')} MB, workers {entry.get('children_peak_rss_mb')} MB).")
+            if status != 'ok':
+                break
+    return entries
+
+
+def growth_exponents(entries):
+    """Agrega `exponent` (vs. la escala anterior del mismo proyecto y paso) a cada entrada."""
+    previous = {}
+    for entry in sorted(entries, key=lambda e: (e['project'], e['step'], e['scale'])):
+        key = (entry['project'], entry['step'])
+        entry['exponent'] = None
+        prior = previous.get(key)
+        if entry['status'] == 'ok' and prior is not None and prior.get('wall_s') and entry.get('wall_s'):
+            entry['exponent'] = round(
+                math.log(entry['wall_s'] / prior['wall_s']) / math.log(entry['scale'] / prior['scale']), 2
+            )
+        if entry['status'] == 'ok':
+            previous[key] = entry
+    return entries
+
+
+def run_benchmarks(models_dir=MODELS_DIR, names=None, scales=DEFAULT_SCALES, series=None,
+                   timeout=None, threads=None, seed=42):
+    """
+    Ejecuta el benchmark de escalamiento.
+
+    Args:
+        models_dir: Carpeta `models/`.
+        names: Proyectos (por defecto, todos los de BENCHMARKS).
+        scales: Número de registros sintéticos por escala (ascendente).
+        series: Número de países (por defecto, los 13 del recurso real).
+        timeout: Segundos máximos por paso; tras un timeout el proyecto no sigue escalando.
+        threads: Hilos por proceso (por defecto, todos los núcleos).
+        seed: Semilla del generador.
+
+    Returns:
+        dict con la configuración y las entradas (`entries`) por proyecto, escala y paso.
+    """
+    models_dir = Path(models_dir)
+    bench_dir = models_dir / BENCH_DIR
+    names = list(names or BENCHMARKS)
+    unknown = sorted(set(names) - set(BENCHMARKS))
+    if unknown:
+        raise ValueError(f"Proyectos sin benchmark: {unknown}. Opciones: {sorted(BENCHMARKS)}")
+    threads = threads or os.cpu_count() or 1
+
+    entries, stopped = [], set()
+    for scale in sorted(scales):
+        records = generate_approvals(scale, n_countries=series, seed=seed)
+        for name in names:
+            if name in stopped:
+                continue
+            project_entries = bench_project(models_dir / name, scale, records, series, threads,
+                                            bench_dir / "work", timeout)
+            entries.extend(project_entries)
+            if any(entry['status'] != 'ok' for entry in project_entries):
+                stopped.add(name)
+
+    report = {
+        'started_at': datetime.now().isoformat(), 'scales': sorted(scales), 'series': series,
+        'threads': threads, 'seed': seed, 'entries': growth_exponents(entries)
+    }
+    save_json(bench_dir / "scaling.json", report)
+    scaling_frame(report).to_csv(bench_dir / "scaling.csv", index=False)
+    logger.info("Escalamiento:\n" + format_scaling(report))
+    return report
+
+
+def scaling_frame(report):
+    rows = []
+    for entry in report['entries']:
+        breakdown = entry.get('breakdown') or {}
+        rows.append({
+            'Modelo': entry['project'], 'Paso': entry['step'], 'Registros': entry['scale'],
+            'Series': entry['series'], 'Estado': entry['status'], 'Segundos': entry.get('wall_s'),
+            'CPU_Segundos': entry.get('cpu_s'), 'Pico_RSS_MB': entry.get('peak_rss_mb'),
+            'Pico_RSS_Workers_MB': entry.get('children_peak_rss_mb'),
+            'Filas': entry.get('rows'), 'Fit_Segundos': breakdown.get('fit'),
+            'Metricas_Segundos': breakdown.get('metrics'), 'IO_Segundos': breakdown.get('io'),
+            'Exponente': entry.get('exponent'), 'Log': entry['log']
+        })
+    return pd.DataFrame(rows)
+
+
+def format_scaling(report):
+    lines = [f"{'Proyecto':<34}{'Paso':<7}{'Registros':>10}{'Segundos':>10}{'RSS MB':>9}{'Workers':>9}{'Exp.':>7}  Estado"]
+    for entry in sorted(report['entries'], key=lambda e: (e['project'], e['step'], e['scale'])):
+        wall = entry.get('wall_s')
+        rss = entry.get('peak_rss_mb')
+        workers = entry.get('children_peak_rss_mb')
+        exponent = entry.get('exponent')
+        flag = '  <- superlineal' if exponent is not None and exponent > SUPERLINEAR else ''
+        lines.append(
+            f"{entry['project']:<34}{entry['step']:<7}{entry['scale']:>10}"
+            f"{'' if wall is None else f'{wall:.2f}':>10}{'' if rss is None else f'{rss:.0f}':>9}"
+            f"{'' if workers is None else f'{workers:.0f}':>9}"
+            f"{'' if exponent is None else f'{exponent:.2f}':>7}  {entry['status']}{flag}"
+        )
+    return '\n'.join(lines)
+
+
+def _worker_main(argv=None):
+    parser = argparse.ArgumentParser(description="Paso de benchmark (uso interno)")
+    parser.add_argument("--worker", choices=STEPS, required=True)
+    parser.add_argument("--project-dir", required=True)
+    args = parser.parse_args(argv)
+    run_step(args.project_dir, args.worker)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    _worker_main()
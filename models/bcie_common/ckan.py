@@ -0,0 +1,449 @@
+"""
+Cliente CKAN compartido para la extracción del recurso de aprobaciones del BCIE.
+
+Descarga `datastore_search` ordenado por `_id` (paginando de a `api.limit` registros) y
+mantiene la copia cruda de cada proyecto (`data.raw_path`).
+
+Modo incremental (`api.incremental: true`): junto al archivo crudo se guarda un checkpoint
+(`<raw>.checkpoint.json`) con la marca de agua (`_id` máximo), el número de filas y el hash
+SHA-256 del archivo. En la siguiente ejecución solo se piden los registros posteriores a la
+marca de agua (offset = filas ya descargadas). Se vuelve a una descarga completa cuando el
+checkpoint deja de coincidir: archivo crudo alterado, recurso distinto, registros eliminados
+en el servidor o una marca de agua que ya no ocupa la misma posición.
+
+Descarga concurrente (`api.max_workers` > 1): la primera página informa `result.total` y el
+resto de offsets se piden en paralelo (hilos acotados) sobre una única `requests.Session`
+con pool de conexiones y reintentos con backoff exponencial (`api.retries`, `api.backoff`).
+Cada página se convierte directamente en un bloque columnar (DataFrame). Para pruebas sin red
+ver `bcie_common.ckan_stub`.
+
+Cache compartida (`api.shared_cache: true`): la sincronización anterior se hace una sola vez
+sobre la entrada de `bcie_common.raw_cache` y cada proyecto copia el resultado a su
+`data.raw_path`; con la entrada vigente (`api.cache_ttl_hours`) no se consulta el API.
+
+Cubo agregado (`api.aggregate: true`, modelos de pronóstico): en lugar de los registros se
+descarga la suma de `api.aggregate_sum` por `api.aggregate_by` (por defecto PAIS,
+ANIO_APROBACION y SECTOR_INSTITUCIONAL). Con `api.use_sql: true` la agregación se resuelve
+en el servidor con `datastore_search_sql` y el archivo crudo del proyecto guarda solo el cubo;
+si el SQL está deshabilitado (en la configuración o en el portal) se descargan los registros
+como siempre y se agregan en el cliente, con el mismo resultado.
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from bcie_common import raw_cache
+from bcie_common.instrumentation import span
+from bcie_common.raw_cache import file_sha256
+
+logger = logging.getLogger(__name__)
+
+ID_COL = '_id'
+DEFAULT_TIMEOUT = 60
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# Cubo que consumen los modelos de pronóstico (suma por país, año y sector)
+AGGREGATE_BY = ('PAIS', 'ANIO_APROBACION', 'SECTOR_INSTITUCIONAL')
+AGGREGATE_SUM = ('MONTO_BRUTO_USD', 'CANTIDAD_APROBACIONES')
+
+
+def checkpoint_path(raw_path):
+    """Ruta del checkpoint incremental asociado a un archivo crudo."""
+    raw_path = Path(raw_path)
+    return raw_path.with_name(f"{raw_path.stem}.checkpoint.json")
+
+
+def fetch_page(url, resource_id, limit, offset=0, session=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Descarga una página de `datastore_search` ordenada por `_id`.
+
+    Returns:
+        records (list[dict]), total (int o None si el API no lo informa)
+    """
+    params = {
+        'resource_id': resource_id,
+        'limit': limit,
+        'offset': offset,
+        'sort': f'{ID_COL} asc'
+    }
+    response = (session or requests).get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+
+    data_json = response.json()
+    if not data_json.get('success'):
+        raise Exception(f"API Error: La consulta fallo (offset={offset}).")
+
+    result = data_json['result']
+    return result['records'], result.get('total')
+
+
+def make_session(pool_size=1, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    """
+    Sesión HTTP con pool de conexiones reutilizables y reintentos con backoff exponencial
+    ante errores de conexión y respuestas 429/5xx.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def records_to_chunk(records, columns=None):
+    """Convierte una página de registros en un bloque columnar con orden de columnas fijo."""
+    return pd.DataFrame.from_records(records, columns=columns)
+
+
+def fetch_records(url, resource_id, limit, offset=0, session=None, max_workers=1):
+    """
+    Descarga todos los registros desde `offset` hasta el final del recurso.
+
+    La primera página informa `result.total`; con `max_workers` > 1 los offsets restantes se
+    descargan en paralelo y se concatenan en orden. Si el recurso crece durante la descarga,
+    el remanente se completa de forma secuencial.
+    """
+    records, total = fetch_page(url, resource_id, limit, offset, session)
+    columns = list(records[0]) if records else None
+    chunks = [records_to_chunk(records, columns)] if records else []
+    offset += len(records)
+    last_size = len(records)
+
+    if max_workers > 1 and total is not None and last_size == limit and offset < total:
+        offsets = list(range(offset, total, limit))
+        logger.info(f"Descargando {len(offsets)} paginas con {max_workers} workers (total={total}).")
+
+        def fetch_offset(page_offset):
+            return records_to_chunk(fetch_page(url, resource_id, limit, page_offset, session)[0], columns)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for chunk in pool.map(fetch_offset, offsets):
+                chunks.append(chunk)
+                offset += len(chunk)
+                last_size = len(chunk)
+
+    while last_size == limit and (total is None or offset < total):
+        records, total = fetch_page(url, resource_id, limit, offset, session)
+        if records:
+            chunks.append(records_to_chunk(records, columns))
+        offset += len(records)
+        last_size = len(records)
+
+    logger.info(f"Paginas descargadas: {len(chunks)} ({offset} registros hasta el offset final).")
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+def load_checkpoint(raw_path):
+    path = checkpoint_path(raw_path)
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_checkpoint(raw_path, resource_id, df):
+    """Registra la marca de agua y el hash del archivo crudo recién escrito."""
+    checkpoint = {
+        'resource_id': resource_id,
+        'max_id': int(df[ID_COL].max()),
+        'row_count': int(len(df)),
+        'sha256': file_sha256(raw_path),
+        'updated_at': datetime.now().isoformat()
+    }
+    with open(checkpoint_path(raw_path), 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    return checkpoint
+
+
+def checkpoint_mismatch(raw_path, checkpoint, resource_id):
+    """Devuelve el motivo por el que el checkpoint local no es válido, o None si coincide."""
+    if checkpoint is None:
+        return "no existe checkpoint"
+    if not Path(raw_path).exists():
+        return "no existe el archivo crudo"
+    if checkpoint.get('resource_id') != resource_id:
+        return "el checkpoint corresponde a otro recurso"
+    if not checkpoint.get('row_count'):
+        return "el checkpoint no tiene registros"
+    if checkpoint.get('sha256') != file_sha256(raw_path):
+        return "el hash del archivo crudo no coincide"
+    return None
+
+
+def full_refresh(url, resource_id, limit, raw_path, session=None, max_workers=1):
+    """Descarga completa del recurso; reescribe el archivo crudo y su checkpoint."""
+    df = fetch_records(url, resource_id, limit, session=session, max_workers=max_workers)
+    logger.info(f"Descarga completa: {len(df)} registros.")
+
+    raw_path = Path(raw_path)
+    raw_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(raw_path, index=False)
+
+    if ID_COL in df.columns and len(df):
+        save_checkpoint(raw_path, resource_id, df)
+    return df
+
+
+def extract_incremental(url, resource_id, limit, raw_path, checkpoint, session=None, max_workers=1):
+    """
+    Descarga solo los registros posteriores a la marca de agua y los agrega al archivo crudo.
+
+    La consulta se solapa en una fila (offset = row_count - 1): ese registro debe ser el de
+    la marca de agua, lo que confirma que el servidor no eliminó ni reordenó filas previas.
+
+    Returns:
+        df, motivo. `df` es None (con el motivo) cuando corresponde una descarga completa.
+    """
+    row_count, max_id = checkpoint['row_count'], checkpoint['max_id']
+
+    probe, total = fetch_page(url, resource_id, limit, offset=row_count - 1, session=session)
+    if total is not None and total < row_count:
+        return None, f"el servidor reporta {total} registros y el checkpoint {row_count}"
+    if not probe or int(probe[0][ID_COL]) != max_id:
+        return None, "la marca de agua ya no coincide con el servidor"
+
+    df_new = pd.DataFrame(probe[1:])
+    if len(probe) == limit:
+        df_rest = fetch_records(
+            url, resource_id, limit, offset=row_count - 1 + limit,
+            session=session, max_workers=max_workers
+        )
+        df_new = pd.concat([df_new, df_rest], ignore_index=True)
+
+    df_old = pd.read_csv(raw_path)
+    if df_new.empty:
+        logger.info(f"Sin registros nuevos despues de _id={max_id}; se reutiliza {raw_path}.")
+        return df_old, None
+
+    if set(df_new.columns) != set(df_old.columns):
+        return None, "cambiaron las columnas del recurso"
+    if (pd.to_numeric(df_new[ID_COL]) <= max_id).any():
+        return None, "se recibieron registros anteriores a la marca de agua"
+
+    df_new = df_new[df_old.columns]
+    df_new.to_csv(raw_path, mode='a', header=False, index=False)
+    df = pd.concat([df_old, df_new], ignore_index=True)
+    checkpoint = save_checkpoint(raw_path, resource_id, df)
+
+    logger.info(
+        f"Descarga incremental: {len(df_new)} registros nuevos "
+        f"(_id {max_id} -> {checkpoint['max_id']}, total {len(df)})."
+    )
+    return df, None
+
+
+def sync_raw(api_config, raw_path, session=None):
+    """
+    Sincroniza `raw_path` con el API: descarga incremental si `api.incremental` y el
+    checkpoint coincide, o descarga completa en caso contrario.
+    """
+    url = api_config['base_url']
+    resource_id = api_config['resource_id']
+    limit = api_config.get('limit', 32000)
+    max_workers = int(api_config.get('max_workers', 1))
+    raw_path = Path(raw_path)
+
+    if session is None:
+        session = make_session(
+            pool_size=max_workers,
+            retries=api_config.get('retries', DEFAULT_RETRIES),
+            backoff=api_config.get('backoff', DEFAULT_BACKOFF)
+        )
+
+    if api_config.get('incremental', False):
+        checkpoint = load_checkpoint(raw_path)
+        reason = checkpoint_mismatch(raw_path, checkpoint, resource_id)
+        if reason is None:
+            df, reason = extract_incremental(
+                url, resource_id, limit, raw_path, checkpoint, session, max_workers
+            )
+            if df is not None:
+                return df
+        logger.info(f"Descarga completa ({reason}).")
+
+    return full_refresh(url, resource_id, limit, raw_path, session, max_workers)
+
+
+def sql_url(base_url):
+    """Endpoint `datastore_search_sql` del mismo portal que `datastore_search`."""
+    return base_url.rstrip('/').rsplit('/', 1)[0] + '/datastore_search_sql'
+
+
+def aggregate_spec(api_config):
+    """Columnas de agrupación y de suma del cubo (`api.aggregate_by`, `api.aggregate_sum`)."""
+    group_by = list(api_config.get('aggregate_by', AGGREGATE_BY))
+    measures = list(api_config.get('aggregate_sum', AGGREGATE_SUM))
+    return group_by, measures
+
+
+def build_aggregate_sql(resource_id, group_by, measures):
+    """SELECT ... SUM(...) GROUP BY sobre la tabla del recurso (SQL estándar, sin paginación)."""
+    keys = ', '.join(f'"{col}"' for col in group_by)
+    sums = ', '.join(f'SUM(CAST("{col}" AS NUMERIC)) AS "{col}"' for col in measures)
+    return f'SELECT {keys}, {sums} FROM "{resource_id}" GROUP BY {keys} ORDER BY {keys}'
+
+
+def fetch_sql(url, sql, limit, session=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Ejecuta una consulta `datastore_search_sql` paginando con LIMIT/OFFSET (el portal limita
+    las filas por respuesta).
+    """
+    chunks, offset, columns = [], 0, None
+    while True:
+        params = {'sql': f'{sql} LIMIT {limit} OFFSET {offset}'}
+        response = (session or requests).get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+
+        data_json = response.json()
+        if not data_json.get('success'):
+            raise Exception(f"API Error: La consulta SQL fallo (offset={offset}).")
+
+        records = data_json['result']['records']
+        if columns is None and records:
+            columns = list(records[0])
+        if records:
+            chunks.append(records_to_chunk(records, columns))
+        offset += len(records)
+        if len(records) < limit:
+            break
+
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+
+
+def aggregate_records(df, group_by, measures):
+    """Agregación en el cliente equivalente a `build_aggregate_sql` (los nulos forman su grupo)."""
+    df = df[group_by + measures].copy()
+    for col in measures:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df.groupby(group_by, dropna=False, sort=True)[measures].sum(min_count=1).reset_index()
+
+
+def sync_aggregate(api_config, raw_path, session=None):
+    """Descarga el cubo agregado con `datastore_search_sql` y lo escribe en `raw_path`."""
+    group_by, measures = aggregate_spec(api_config)
+    sql = build_aggregate_sql(api_config['resource_id'], group_by, measures)
+    session = session or make_session(
+        retries=api_config.get('retries', DEFAULT_RETRIES),
+        backoff=api_config.get('backoff', DEFAULT_BACKOFF)
+    )
+    df = fetch_sql(sql_url(api_config['base_url']), sql, api_config.get('limit', 32000), session)
+    if df.empty:
+        raise Exception("API Error: La consulta SQL no devolvio registros.")
+    df = df[group_by + measures]
+    for col in measures:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    logger.info(f"Cubo agregado en el servidor: {len(df)} filas ({', '.join(group_by)}).")
+
+    raw_path = Path(raw_path)
+    raw_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(raw_path, index=False)
+    return df
+
+
+def extract_aggregate(api_config, raw_path, session=None):
+    """
+    Extracción del cubo agregado: `datastore_search_sql` si `api.use_sql` y el portal lo
+    permite; en caso contrario, registros completos (incremental / cache compartida) agregados
+    en el cliente.
+    """
+    group_by, measures = aggregate_spec(api_config)
+
+    if api_config.get('use_sql', True):
+        try:
+            if api_config.get('shared_cache', False):
+                query = {'sql': build_aggregate_sql(api_config['resource_id'], group_by, measures)}
+                return extract_shared(api_config, raw_path, session, query=query, sync=sync_aggregate)
+            return sync_aggregate(api_config, raw_path, session)
+        except Exception as e:
+            logger.warning(f"datastore_search_sql no disponible ({e}); se agrega en el cliente.")
+
+    if api_config.get('shared_cache', False):
+        df = extract_shared(api_config, raw_path, session)
+    else:
+        df = sync_raw(api_config, raw_path, session)
+    df = aggregate_records(df, group_by, measures)
+    logger.info(f"Cubo agregado en el cliente: {len(df)} filas ({', '.join(group_by)}).")
+    return df
+
+
+def extract_shared(api_config, raw_path, session=None, query=None, sync=None):
+    """
+    Extracción a través de la cache compartida del laboratorio (`bcie_common.raw_cache`).
+
+    Solo el primer proyecto que encuentra la entrada vencida consulta el API; los demás
+    reutilizan el mismo archivo y lo copian a su `raw_path` si el contenido cambió. `query`
+    forma parte de la clave de la entrada y `sync` la actualiza (por defecto, los registros
+    ordenados por `_id` con `sync_raw`).
+    """
+    query = query or {'sort': f'{ID_COL} asc'}
+    sync = sync or sync_raw
+    key = raw_cache.cache_key(api_config['base_url'], api_config['resource_id'], query)
+    entry_dir = raw_cache.get_cache_dir(api_config) / key
+    entry_dir.mkdir(parents=True, exist_ok=True)
+    data_path = entry_dir / "raw.csv"
+    ttl_hours = api_config.get('cache_ttl_hours', raw_cache.DEFAULT_TTL_HOURS)
+
+    df = None
+    with raw_cache.entry_lock(entry_dir):
+        meta = raw_cache.read_meta(entry_dir)
+        if raw_cache.is_fresh(meta, data_path, ttl_hours):
+            logger.info(f"Cache compartida vigente ({key}, {meta['rows']} registros, {meta['fetched_at']}).")
+        else:
+            df = sync(api_config, data_path, session)
+            meta = raw_cache.write_meta(entry_dir, {
+                'key': key,
+                'base_url': api_config['base_url'],
+                'resource_id': api_config['resource_id'],
+                'query': query,
+                'sha256': file_sha256(data_path),
+                'rows': int(len(df)),
+                'fetched_at': datetime.now().isoformat()
+            })
+
+        if raw_cache.materialize(data_path, meta['sha256'], raw_path):
+            logger.info(f"Copia cruda actualizada desde la cache compartida: {raw_path}")
+
+    return df if df is not None else pd.read_csv(raw_path)
+
+
+def extract_raw(api_config, raw_path, session=None):
+    """
+    Punto de entrada de la extracción para los `run_etl` de cada proyecto.
+
+    Args:
+        api_config: Sección `api` de local.yaml (base_url, resource_id, limit, incremental,
+            max_workers, retries, backoff, shared_cache, cache_ttl_hours, cache_dir,
+            aggregate, use_sql, aggregate_by, aggregate_sum).
+        raw_path: Ruta del archivo crudo del proyecto (`data.raw_path`).
+        session: Sesión HTTP opcional. Por defecto se crea una con `make_session`.
+
+    Returns:
+        pd.DataFrame con todos los registros crudos del recurso, o el cubo agregado si
+        `api.aggregate`.
+    """
+    with span('extract_raw', kind='io', aggregate=api_config.get('aggregate', False)) as current:
+        if api_config.get('aggregate', False):
+            df = extract_aggregate(api_config, raw_path, session)
+        elif api_config.get('shared_cache', False):
+            df = extract_shared(api_config, raw_path, session)
+        else:
+            df = sync_raw(api_config, raw_path, session)
+        current.rows = len(df)
+    return df
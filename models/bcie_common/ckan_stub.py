@@ -0,0 +1,181 @@
+"""
+Servidor CKAN local (stand-in) para probar la descarga sin acceso a red.
+
+Atiende `/api/3/action/datastore_search` sobre una lista de registros en memoria con la misma
+semántica de `limit`/`offset`/`total` que el API del BCIE, y permite inyectar latencia por
+solicitud y fallos transitorios (HTTP 503) para medir throughput y validar los reintentos.
+Con `sql=True` atiende también `datastore_search_sql` (ejecutado sobre SQLite en memoria, con
+el recurso como tabla); por defecto responde 403, como un portal con el SQL deshabilitado.
+Los registros pueden ser un DataFrame (p. ej. de `bcie_common.synthetic`): las páginas se
+convierten a dicts al servirlas, sin materializar millones de registros a la vez.
+
+Uso:
+    with StubCkanServer(records, latency=0.01, failures_per_page=1) as server:
+        df = fetch_records(server.url, server.resource_id, 100, session=make_session())
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+DATASTORE_PATH = "/api/3/action/datastore_search"
+SQL_PATH = "/api/3/action/datastore_search_sql"
+
+
+class StubCkanServer:
+    """
+    Args:
+        records: Lista de dicts o DataFrame servido por el recurso (ya ordenado por `_id`).
+        resource_id: Identificador aceptado por el servidor.
+        latency: Segundos de espera por solicitud.
+        failures_per_page: Respuestas 503 que recibe cada offset antes de responder con éxito.
+        sql: Habilita `datastore_search_sql`.
+    """
+
+    def __init__(self, records, resource_id="stub-resource", latency=0.0, failures_per_page=0, sql=False):
+        self.records = records if isinstance(records, pd.DataFrame) else list(records)
+        self.resource_id = resource_id
+        self.latency = latency
+        self.failures_per_page = failures_per_page
+        self.sql = sql
+        self.request_count = 0
+        self.sql_count = 0
+        self.failure_count = 0
+        self._hits = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{DATASTORE_PATH}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, params):
+        """Devuelve (status, payload) para una solicitud datastore_search."""
+        if params.get('resource_id') != self.resource_id:
+            return 404, {'success': False, 'error': {'message': 'Not found: Resource'}}
+
+        limit = int(params.get('limit', 100))
+        offset = int(params.get('offset', 0))
+
+        with self._lock:
+            self.request_count += 1
+            self._hits[offset] += 1
+            if self._hits[offset] <= self.failures_per_page:
+                self.failure_count += 1
+                return 503, {'success': False}
+            records = self._page(offset, limit)
+
+        fields = [{'id': key} for key in self._columns()]
+        return 200, {
+            'success': True,
+            'result': {
+                'resource_id': self.resource_id,
+                'fields': fields,
+                'records': records,
+                'total': len(self.records),
+                'limit': limit,
+                'offset': offset
+            }
+        }
+
+    def _columns(self):
+        if isinstance(self.records, pd.DataFrame):
+            return list(self.records.columns)
+        return list(self.records[0]) if self.records else []
+
+    def _page(self, offset, limit):
+        if isinstance(self.records, pd.DataFrame):
+            return self.records.iloc[offset:offset + limit].to_dict('records')
+        return self.records[offset:offset + limit]
+
+    def _respond_sql(self, params):
+        """Devuelve (status, payload) para una solicitud datastore_search_sql."""
+        if not self.sql:
+            return 403, {'success': False, 'error': {'message': 'Access denied: datastore_search_sql'}}
+
+        with self._lock:
+            self.request_count += 1
+            self.sql_count += 1
+            records = self.records
+
+        columns = self._columns()
+        conn = sqlite3.connect(':memory:')
+        try:
+            quoted = ', '.join(f'"{col}"' for col in columns)
+            conn.execute(f'CREATE TABLE "{self.resource_id}" ({quoted})')
+            if isinstance(records, pd.DataFrame):
+                rows = records.itertuples(index=False, name=None)
+            else:
+                rows = ([record.get(col) for col in columns] for record in records)
+            conn.executemany(f'INSERT INTO "{self.resource_id}" VALUES ({", ".join("?" * len(columns))})', rows)
+            cursor = conn.execute(params.get('sql', ''))
+        except sqlite3.Error as e:
+            return 409, {'success': False, 'error': {'message': str(e)}}
+        else:
+            fields = [desc[0] for desc in cursor.description]
+            rows = [dict(zip(fields, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+        return 200, {
+            'success': True,
+            'result': {'fields': [{'id': key} for key in fields], 'records': rows, 'sql': params.get('sql')}
+        }
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path not in (DATASTORE_PATH, SQL_PATH):
+                    self.send_error(404)
+                    return
+
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                if parsed.path == SQL_PATH:
+                    status, payload = stub._respond_sql(params)
+                else:
+                    status, payload = stub._respond(params)
+                body = json.dumps(payload).encode('utf-8')
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,175 @@
+"""
+Métricas de clustering sobre distancias condensadas, en un solo recorrido para todos los K.
+
+Las métricas basadas en pares (distancia media intra / inter cluster) se acumulan recorriendo
+el vector condensado (orden de scipy) por bloques contiguos de pares: cada bloque cubre un
+rango de filas i y sus columnas j > i, y se evalúa contra las etiquetas de todos los K a la
+vez. La memoria queda acotada por `CHUNK_PAIRS` (índices y máscaras del bloque), en lugar de
+los ~5 arreglos de N²/2 elementos de `np.triu_indices` + `D[iu]` + etiquetas por par.
+
+La silueta (`silhouette_stats`) usa el mismo recorrido para acumular, por punto y por
+cluster, la suma de distancias de cada K: de ahí salen a(i), b(i), la silueta por muestra y
+la global, sin la matriz cuadrada que lee `silhouette_score(metric="precomputed")`.
+
+Uso:
+    stats = intra_inter_stats(condensed, {k: labels_k for k in ks})
+    W, B = stats[3]['W'], stats[3]['B']
+    sil = silhouette_stats(condensed, {k: labels_k for k in ks})
+    sil[3]['score'], sil[3]['samples']
+"""
+
+import numpy as np
+
+from bcie_common.stability import n_from_condensed
+
+# Pares por bloque (~8 MB de índices int32 más las máscaras de los K)
+CHUNK_PAIRS = 1_000_000
+
+
+def row_offset(i, n):
+    """Posición del par (i, i + 1) en el condensado."""
+    return i * n - i * (i + 1) // 2
+
+
+def condensed_chunks(n, chunk_pairs=CHUNK_PAIRS):
+    """
+    Recorre el condensado por bloques de filas completas.
+
+    Yields:
+        (pos_start, pos_stop, rows, cols): el bloque es condensed[pos_start:pos_stop] y
+        rows / cols son los índices (i, j) de cada par, i < j.
+    """
+    offsets = row_offset(np.arange(n, dtype=np.int64), n)
+    start = 0
+    while start < n - 1:
+        # Filas [start, stop) con a lo sumo chunk_pairs pares (al menos una fila)
+        stop = int(np.searchsorted(offsets, offsets[start] + chunk_pairs, side='right')) - 1
+        stop = min(max(stop, start + 1), n - 1)
+        pairs = int(offsets[stop] - offsets[start])
+        lengths = n - 1 - np.arange(start, stop)
+        rows = np.repeat(np.arange(start, stop, dtype=np.int32), lengths)
+        # Columnas: i+1..n-1 de cada fila (arange por tramo sin bucle de Python)
+        first = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        cols = np.arange(pairs, dtype=np.int32) - np.repeat(first, lengths).astype(np.int32) + rows + 1
+        yield row_offset(start, n), row_offset(stop, n), rows, cols
+        start = stop
+
+
+def intra_inter_stats(condensed, labels_by_k, chunk_pairs=CHUNK_PAIRS):
+    """
+    Distancia media intra-cluster (W) e inter-cluster (B) para todos los K en un recorrido.
+
+    Args:
+        condensed: Distancias condensadas (np.ndarray o np.memmap) de los N puntos.
+        labels_by_k: {k: etiquetas (N,) con valores 0..k-1}.
+        chunk_pairs: Pares por bloque.
+
+    Returns:
+        {k: {'W', 'B', 'intra_sum', 'intra_pairs'}}: W y B como en `mean_intra_inter`
+        (1.0 / 0.0 si no hay pares intra / inter) y las sumas y pares intra por cluster.
+    """
+    n = n_from_condensed(len(condensed))
+    ks = list(labels_by_k)
+    labels = np.vstack([np.asarray(labels_by_k[k], dtype=np.int64) for k in ks])
+    sizes = [int(labels[row].max()) + 1 if n else 0 for row in range(len(ks))]
+    intra_sum = [np.zeros(size) for size in sizes]
+    intra_pairs = [np.zeros(size, dtype=np.int64) for size in sizes]
+    total_sum = 0.0
+
+    for pos_start, pos_stop, rows, cols in condensed_chunks(n, chunk_pairs):
+        d = np.asarray(condensed[pos_start:pos_stop], dtype=np.float64)
+        total_sum += d.sum()
+        for row in range(len(ks)):
+            left = labels[row, rows]
+            same = left == labels[row, cols]
+            intra_sum[row] += np.bincount(left[same], weights=d[same], minlength=sizes[row])
+            intra_pairs[row] += np.bincount(left[same], minlength=sizes[row])
+
+    total_pairs = n * (n - 1) // 2
+    stats = {}
+    for row, k in enumerate(ks):
+        n_intra = int(intra_pairs[row].sum())
+        s_intra = float(intra_sum[row].sum())
+        n_inter = total_pairs - n_intra
+        stats[k] = {
+            'W': s_intra / n_intra if n_intra else 1.0,
+            'B': (total_sum - s_intra) / n_inter if n_inter else 0.0,
+            'intra_sum': intra_sum[row],
+            'intra_pairs': intra_pairs[row]
+        }
+    return stats
+
+
+def silhouette_stats(condensed, labels_by_k, chunk_pairs=CHUNK_PAIRS):
+    """
+    Silueta (global y por muestra) para todos los K en un recorrido del condensado.
+
+    Por cada K se acumula la suma de distancias de cada punto a cada cluster (k × N en
+    float64) con dos productos matriciales por bloque denso de filas (a lo sumo
+    `chunk_pairs` elementos); a(i) es la media a su propio cluster y b(i) la menor media a
+    otro cluster, igual que `sklearn.metrics.silhouette_samples` (0 en clusters de un solo punto).
+
+    Args:
+        condensed: Distancias condensadas (np.ndarray o np.memmap) de los N puntos.
+        labels_by_k: {k: etiquetas (N,) con valores 0..k-1}.
+        chunk_pairs: Pares por bloque.
+
+    Returns:
+        {k: {'score', 'samples', 'W', 'B'}}: silueta media y por muestra (0.0 / None si hay
+        menos de 2 o más de N - 1 clusters, donde sklearn no la define) y W, B como en
+        `intra_inter_stats`, del mismo recorrido.
+    """
+    n = n_from_condensed(len(condensed))
+    ks = list(labels_by_k)
+    labels = np.vstack([np.asarray(labels_by_k[k], dtype=np.int64) for k in ks])
+    sizes = [int(labels[row].max()) + 1 if n else 0 for row in range(len(ks))]
+    # Pertenencia one-hot de todos los K apilada (N × sum(k)): un producto por bloque
+    offsets = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+    onehot = np.zeros((n, int(offsets[-1])))
+    for row in range(len(ks)):
+        onehot[np.arange(n), offsets[row] + labels[row]] = 1.0
+    # sums[offsets[row] + c, i]: suma de distancias del punto i a los puntos del cluster c
+    sums = np.zeros((int(offsets[-1]), n))
+
+    # Filas por bloque denso: U ocupa a lo sumo chunk_pairs elementos (las últimas filas del
+    # condensado tienen pocos pares y un bloque de pares puede abarcar miles de filas)
+    block_rows = max(1, chunk_pairs // max(n, 1))
+    for pos_start, pos_stop, rows, cols in condensed_chunks(n, chunk_pairs):
+        for start in range(int(rows[0]), int(rows[-1]) + 1, block_rows):
+            stop = min(start + block_rows, int(rows[-1]) + 1)
+            lo, hi = np.searchsorted(rows, [start, stop])
+            # Bloque triangular superior de las filas [start, stop): U[i, j] = d_ij si j > i
+            upper = np.zeros((stop - start, n))
+            upper[rows[lo:hi] - start, cols[lo:hi]] = condensed[pos_start + lo:pos_start + hi]
+            # Lado i de cada par (i, j), por cluster de j; y lado j, por cluster de i
+            sums[:, start:stop] += (upper @ onehot).T
+            sums += onehot[start:stop].T @ upper
+
+    total_pairs = n * (n - 1) // 2
+    stats = {}
+    for row, k in enumerate(ks):
+        lab, sums_k = labels[row], sums[offsets[row]:offsets[row + 1]]
+        counts = np.bincount(lab, minlength=sizes[row])
+        own = sums_k[lab, np.arange(n)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = own / (counts[lab] - 1)
+            means = sums_k / counts[:, None]
+        # b(i): menor distancia media a un cluster distinto (y no vacío)
+        means[counts == 0] = np.inf
+        means[lab, np.arange(n)] = np.inf
+        b = means.min(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            samples = np.nan_to_num((b - a) / np.maximum(a, b))
+
+        n_clusters = int(np.count_nonzero(counts))
+        valid = 2 <= n_clusters <= n - 1
+        n_intra = int((counts * (counts - 1) // 2).sum())
+        s_intra = float(own.sum()) / 2
+        n_inter = total_pairs - n_intra
+        stats[k] = {
+            'score': float(samples.mean()) if valid else 0.0,
+            'samples': samples if valid else None,
+            'W': s_intra / n_intra if n_intra else 1.0,
+            'B': (float(sums_k.sum()) / 2 - s_intra) / n_inter if n_inter else 0.0
+        }
+    return stats
@@ -0,0 +1,315 @@
+"""
+Instrumentación de los pipelines: spans JSON con tiempo, CPU, memoria y filas por paso.
+
+Cada `span` registra al cerrarse una línea JSON con:
+    name, kind        Paso y categoría: 'stage' (etapa de run.py), 'pipeline' (run_etl,
+                      train_*, generate_*...), 'fit' (ajuste o inferencia del modelo),
+                      'metrics' o 'io' (lectura/escritura de tablas y descarga del API).
+    wall_s, cpu_s     Tiempo de reloj y de CPU del proceso (todos los hilos) dentro del span.
+    rss_delta_mb      Memoria residente actual al cerrar menos la de la apertura (lo que el
+                      span deja retenido; negativo si libera).
+    peak_growth_mb    Cuánto subió el pico de RSS del proceso durante el span (> 0: el span
+                      marcó un nuevo máximo del proceso).
+    process_peak_rss_mb
+                      Pico de RSS del proceso desde su inicio (ru_maxrss), no del span.
+    children_peak_rss_mb
+                      Mayor pico de RSS de los procesos hijos ya terminados (RUSAGE_CHILDREN):
+                      solo cuenta workers (joblib/loky) que cerraron antes del fin del span.
+    rows              Filas procesadas (si el paso las informa con `record_rows`).
+    parent, status    Span contenedor y 'ok' / 'error' (con el mensaje).
+
+Los spans se agregan a `.cache/pipeline/spans.jsonl` (el directorio de corrida de
+`bcie_common.stages`, que lo reinicia en cada corrida) o a la ruta de BCIE_SPANS_PATH. Los
+spans abiertos en hilos o procesos de joblib (p. ej. `train_country_model`) no ven la pila del
+span que lanzó el `Parallel`: se registran con `parent` nulo.
+
+Perfilado opcional (`python run.py --profile cprofile|pyinstrument` o BCIE_PROFILE): el span
+más externo se perfila y el resultado queda en `<directorio de spans>/profiles/`
+(`<nombre>.prof` + resumen de texto, o `<nombre>.html` con pyinstrument si está instalado).
+
+Uso:
+    @instrument()
+    def run_etl(config_path): ...
+
+    with span('fit', kind='fit') as s:
+        model.fit(X)
+        s.rows = len(X)
+"""
+
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SPANS_PATH_ENV = "BCIE_SPANS_PATH"
+PROFILE_ENV = "BCIE_PROFILE"
+RUN_ID_ENV = "BCIE_RUN_ID"
+RUN_PID_ENV = "BCIE_RUN_PID"
+DEFAULT_SPANS_PATH = Path(".cache") / "pipeline" / "spans.jsonl"
+PROFILERS = ('cprofile', 'pyinstrument')
+
+_state = threading.local()
+_write_lock = threading.Lock()
+_run_id = os.environ.get(RUN_ID_ENV) or datetime.now().strftime("run_%Y%m%d_%H%M%S")
+
+
+def _maxrss_mb(who):
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(getattr(resource, who)).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return round(peak / (1024 * 1024 if os.uname().sysname == 'Darwin' else 1024), 1)
+
+
+def children_peak_rss_mb():
+    """Mayor pico de RSS (MB) entre los procesos hijos terminados y esperados (None sin `resource`)."""
+    return _maxrss_mb('RUSAGE_CHILDREN')
+
+
+def current_rss_mb():
+    """Memoria residente actual del proceso en MB (None si la plataforma no la expone)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso (desde su inicio) en MB (None si la plataforma no lo expone)."""
+    peak = _maxrss_mb('RUSAGE_SELF')
+    if peak is not None:
+        return peak
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+
+
+def spans_path():
+    return Path(os.environ.get(SPANS_PATH_ENV) or DEFAULT_SPANS_PATH)
+
+
+def start_run(path=None, run_id=None, profile=None):
+    """
+    Inicia una corrida: los spans siguientes van a `path` (que se vacía) con `run_id`.
+    Lo llama `bcie_common.stages.run_stages`; los procesos hijos lo heredan por entorno.
+    """
+    global _run_id
+    _run_id = run_id or datetime.now().strftime("run_%Y%m%d_%H%M%S")
+    path = Path(path or spans_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('', encoding='utf-8')
+    os.environ[SPANS_PATH_ENV] = str(path.resolve())
+    os.environ[RUN_ID_ENV] = _run_id
+    os.environ[RUN_PID_ENV] = str(os.getpid())
+    if profile:
+        if profile not in PROFILERS:
+            raise ValueError(f"Perfilador desconocido: {profile}. Opciones: {PROFILERS}")
+        os.environ[PROFILE_ENV] = profile
+    else:
+        os.environ.pop(PROFILE_ENV, None)
+    return path
+
+
+def _stack():
+    if not hasattr(_state, 'stack'):
+        _state.stack = []
+    return _state.stack
+
+
+class Span:
+    def __init__(self, name, kind, attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.rows = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def current_span():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def record_rows(rows):
+    """Informa las filas procesadas por el span activo (si hay uno)."""
+    active = current_span()
+    if active is not None and rows is not None:
+        active.rows = int(rows)
+
+
+def _write(record):
+    path = spans_path()
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+
+class _Profiler:
+    """cProfile o pyinstrument alrededor del span más externo."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.profiler = None
+        if mode == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+                self.profiler = Profiler()
+            except ImportError:
+                logger.warning("pyinstrument no está instalado; se usa cProfile.")
+                self.mode = 'cprofile'
+        if self.mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+
+    def start(self):
+        if self.mode == 'cprofile':
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self, name):
+        out_dir = spans_path().parent / "profiles"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{_run_id}_{name}"
+        if self.mode == 'cprofile':
+            self.profiler.disable()
+            path = out_dir / f"{stem}.prof"
+            self.profiler.dump_stats(str(path))
+            text = io.StringIO()
+            pstats.Stats(self.profiler, stream=text).sort_stats('cumulative').print_stats(30)
+            (out_dir / f"{stem}.txt").write_text(text.getvalue(), encoding='utf-8')
+        else:
+            self.profiler.stop()
+            path = out_dir / f"{stem}.html"
+            path.write_text(self.profiler.output_html(), encoding='utf-8')
+        return path
+
+
+@contextmanager
+def span(name, kind='pipeline', **attrs):
+    """Mide el bloque y registra su span al salir (también si lanza una excepción)."""
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    current = Span(name, kind, attrs)
+    # Solo el span raíz del hilo principal del proceso de la corrida: los perfiladores no se
+    # pueden anidar y los workers de joblib (spans raíz en su propio proceso) no se perfilan
+    profile_mode = os.environ.get(PROFILE_ENV)
+    is_root = (parent is None and threading.current_thread() is threading.main_thread()
+               and os.environ.get(RUN_PID_ENV, str(os.getpid())) == str(os.getpid()))
+    profiler = _Profiler(profile_mode) if profile_mode and is_root else None
+
+    stack.append(current)
+    started_at = datetime.now().isoformat()
+    rss_start, peak_start = current_rss_mb(), peak_rss_mb()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    if profiler is not None:
+        profiler.start()
+    status, error = 'ok', None
+    try:
+        yield current
+    except BaseException as e:
+        status, error = 'error', f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        wall_s, cpu_s = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        profile_path = profiler.stop(name) if profiler is not None else None
+        stack.pop()
+        rss_end, peak_end = current_rss_mb(), peak_rss_mb()
+        record = {
+            'run_id': _run_id,
+            'span_id': current.id,
+            'parent': parent.id if parent else None,
+            'name': name,
+            'kind': kind,
+            'started_at': started_at,
+            'wall_s': round(wall_s, 4),
+            'cpu_s': round(cpu_s, 4),
+            'rss_delta_mb': _delta(rss_start, rss_end),
+            'peak_growth_mb': _delta(peak_start, peak_end),
+            'process_peak_rss_mb': peak_end,
+            'children_peak_rss_mb': children_peak_rss_mb(),
+            'rows': current.rows,
+            'status': status,
+            'error': error,
+            'attrs': current.attrs
+        }
+        if profile_path is not None:
+            record['profile'] = str(profile_path)
+        _write(record)
+
+
+def _delta(start, end):
+    return None if start is None or end is None else round(end - start, 1)
+
+
+def _rows_of(value):
+    """Filas del valor devuelto (DataFrame, o dict con 'rows'), si se pueden inferir."""
+    if hasattr(value, 'shape') and hasattr(value, 'columns'):
+        return len(value)
+    if isinstance(value, dict) and isinstance(value.get('rows'), int):
+        return value['rows']
+    return None
+
+
+def instrument(name=None, kind='pipeline'):
+    """Decorador: ejecuta la función dentro de un span con su nombre."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__, kind=kind) as current:
+                value = func(*args, **kwargs)
+                if current.rows is None:
+                    current.rows = _rows_of(value)
+                return value
+        return wrapper
+    return decorator
+
+
+def read_spans(path=None):
+    path = Path(path or spans_path())
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(spans, root_id):
+    """Segundos por categoría ('fit', 'metrics', 'io'...) de los spans bajo `root_id`."""
+    children = {}
+    for record in spans:
+        children.setdefault(record['parent'], []).append(record)
+    totals = {}
+    pending = list(children.get(root_id, []))
+    while pending:
+        record = pending.pop()
+        if record['kind'] in ('fit', 'metrics', 'io'):
+            # Un span de categoría ya incluye a sus hijos
+            totals[record['kind']] = round(totals.get(record['kind'], 0.0) + record['wall_s'], 4)
+            continue
+        pending.extend(children.get(record['span_id'], []))
+    return totals
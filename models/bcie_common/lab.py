@@ -0,0 +1,273 @@
+"""
+Ejecución de todos los proyectos del laboratorio en paralelo (`python models/run_lab.py`).
+
+Cada proyecto (`models/aprobaciones_*`) corre su `run.py` (o `entrypoint/main.py`) en un proceso
+propio con su carpeta como directorio de trabajo, porque los pipelines resuelven rutas y
+módulos (`src`) relativos al cwd. El orden es:
+
+1. Extracción compartida: se sincroniza una vez cada consulta distinta a CKAN que usan los
+   proyectos con `api.shared_cache: true` (registros completos o cubo agregado). Cuando los
+   proyectos arrancan, su ETL encuentra la cache vigente y no consulta el API.
+2. Proyectos: un pool de `workers` procesos. Cada uno recibe una cuota de hilos
+   (`cpu_count // workers`) vía OMP/MKL/OpenBLAS/torch y `LOKY_MAX_CPU_COUNT` (joblib
+   `n_jobs=-1`), para no sobresuscribir los núcleos. Los proyectos más lentos en la corrida
+   anterior se lanzan primero.
+
+Archivos (relativos a `models/`):
+    .cache/lab/logs/<proyecto>.log   Salida completa de cada proyecto.
+    reporte_modelos.csv              Estado, duración y etapas por proyecto (reemplaza a
+                                     checklist_modelos.csv).
+    .cache/lab/report.json           El mismo reporte con el detalle de etapas de cada proyecto.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+from bcie_common import ckan
+from bcie_common.stages import save_json
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = Path(__file__).resolve().parents[1]
+PROJECT_PATTERN = "aprobaciones_*"
+ENTRY_POINTS = ("run.py", "entrypoint/main.py")
+LAB_DIR = Path(".cache") / "lab"
+REPORT_CSV = "reporte_modelos.csv"
+THREAD_VARS = (
+    "OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS", "TORCH_NUM_THREADS", "LOKY_MAX_CPU_COUNT"
+)
+
+
+def entry_point(project_dir):
+    """Script de orquestación del proyecto (el primero no vacío de ENTRY_POINTS), o None."""
+    for name in ENTRY_POINTS:
+        path = Path(project_dir) / name
+        if path.is_file() and path.stat().st_size > 0:
+            return path
+    return None
+
+
+def discover_projects(models_dir=MODELS_DIR, names=None):
+    """Proyectos con `config/local.yaml` y punto de entrada, en orden alfabético."""
+    projects = []
+    for project_dir in sorted(Path(models_dir).glob(PROJECT_PATTERN)):
+        if names and project_dir.name not in names:
+            continue
+        script = entry_point(project_dir)
+        if script is None or not (project_dir / "config" / "local.yaml").exists():
+            logger.warning(f"{project_dir.name}: sin run.py o config/local.yaml; se omite.")
+            continue
+        projects.append({'name': project_dir.name, 'dir': project_dir, 'script': script})
+    missing = set(names or ()) - {p['name'] for p in projects}
+    if missing:
+        raise ValueError(f"Proyectos no encontrados: {sorted(missing)}")
+    return projects
+
+
+def thread_env(threads, project_dir):
+    """Entorno del proceso del proyecto: cuota de hilos y el proyecto en PYTHONPATH."""
+    env = dict(os.environ)
+    env.update({var: str(threads) for var in THREAD_VARS})
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(project_dir), env.get('PYTHONPATH')]))
+    env['PYTHONIOENCODING'] = 'utf-8'
+    return env
+
+
+def shared_queries(projects):
+    """Consultas CKAN distintas (clave de la cache compartida) -> (proyecto, sección api)."""
+    queries = {}
+    for project in projects:
+        with open(project['dir'] / "config" / "local.yaml", 'r', encoding='utf-8') as f:
+            api_config = (yaml.safe_load(f) or {}).get('api')
+        if not api_config or not api_config.get('shared_cache', False):
+            continue
+        aggregate = api_config.get('aggregate', False)
+        key = (api_config['base_url'], api_config['resource_id'], aggregate,
+               aggregate and api_config.get('use_sql', True))
+        queries.setdefault(key, (project['name'], api_config))
+    return queries
+
+
+def warm_shared_cache(projects, lab_dir):
+    """
+    Paso 1: sincroniza una vez cada consulta compartida. Un fallo no detiene la corrida (cada
+    ETL lo reintentará y quedará registrado en su proyecto).
+    """
+    entries = []
+    for i, (project_name, api_config) in enumerate(shared_queries(projects).values()):
+        start = time.perf_counter()
+        kind = 'aggregate' if api_config.get('aggregate', False) else 'records'
+        entry = {'query': kind, 'project': project_name, 'status': 'ok', 'error': None}
+        try:
+            ckan.extract_raw(api_config, Path(lab_dir) / "raw" / f"{kind}_{i}.csv")
+        except Exception as e:
+            logger.warning(f"Extracción compartida ({kind}) fallida: {e}")
+            entry.update(status='failed', error=str(e))
+        entry['seconds'] = round(time.perf_counter() - start, 3)
+        entries.append(entry)
+        logger.info(f"Extracción compartida ({kind}, config de {project_name}): {entry['status']} "
+                    f"en {entry['seconds']:.1f} s.")
+    return entries
+
+
+def stage_summary(project_dir):
+    """Etapas de la última corrida del proyecto (`.cache/pipeline/report.json` de stages.py)."""
+    path = Path(project_dir) / ".cache" / "pipeline" / "report.json"
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('stages', [])
+
+
+def run_project(project, threads, log_dir, extra_args=(), timeout=None):
+    """Ejecuta un proyecto en su propio proceso y devuelve su entrada del reporte."""
+    log_path = Path(log_dir) / f"{project['name']}.log"
+    report_path = Path(project['dir']) / ".cache" / "pipeline" / "report.json"
+    previous_report = report_path.stat().st_mtime if report_path.exists() else None
+    command = [sys.executable, str(project['script'].relative_to(project['dir']))] + list(extra_args)
+
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log:
+        try:
+            returncode = subprocess.run(
+                command, cwd=project['dir'], env=thread_env(threads, project['dir']),
+                stdout=log, stderr=subprocess.STDOUT, timeout=timeout
+            ).returncode
+            status = 'ok' if returncode == 0 else 'failed'
+        except subprocess.TimeoutExpired:
+            returncode, status = None, 'timeout'
+    seconds = round(time.perf_counter() - start, 3)
+
+    fresh_report = report_path.exists() and report_path.stat().st_mtime != previous_report
+    return {
+        'project': project['name'],
+        'status': status,
+        'returncode': returncode,
+        'seconds': seconds,
+        'threads': threads,
+        'stages': stage_summary(project['dir']) if fresh_report else [],
+        'log': str(log_path)
+    }
+
+
+def force_args(project_name, force):
+    """
+    Argumentos `--force` de un proyecto. 'etapa' (o 'all') se reenvía a todos los proyectos con
+    `--ignore-unknown-stages`, para que cada run.py descarte las etapas que no define;
+    'proyecto:etapa' solo se reenvía a ese proyecto.
+    """
+    stages, shared = [], False
+    for entry in force:
+        project, sep, stage = entry.rpartition(':')
+        if not sep:
+            stages.append(stage)
+            shared = True
+        elif project == project_name:
+            stages.append(stage)
+    args = [arg for stage in stages for arg in ("--force", stage)]
+    return args + ["--ignore-unknown-stages"] if shared else args
+
+
+def previous_durations(lab_dir):
+    path = Path(lab_dir) / "report.json"
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {entry['project']: entry['seconds'] for entry in json.load(f).get('projects', [])}
+
+
+def run_lab(models_dir=MODELS_DIR, names=None, workers=None, extra_args=(), timeout=None,
+            warm_cache=True, force=()):
+    """
+    Ejecuta los proyectos del laboratorio en paralelo.
+
+    Args:
+        models_dir: Carpeta `models/`.
+        names: Proyectos a ejecutar (por defecto, todos los descubiertos).
+        workers: Proyectos simultáneos (por defecto, min(proyectos, núcleos)).
+        extra_args: Argumentos para cada run.py (p. ej. ['--force', 'all']).
+        timeout: Segundos máximos por proyecto.
+        warm_cache: Sincroniza antes la extracción compartida.
+        force: Etapas a forzar: 'etapa' en todos los proyectos que la definen (o 'all') y
+            'proyecto:etapa' solo en ese proyecto (ver `force_args`).
+
+    Returns:
+        dict con el reporte consolidado (`success`, `shared_etl`, `projects`).
+    """
+    models_dir = Path(models_dir)
+    lab_dir = models_dir / LAB_DIR
+    log_dir = lab_dir / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    projects = discover_projects(models_dir, names)
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, len(projects) or 1))
+    threads = max(1, cpus // workers)
+    logger.info(f"{len(projects)} proyectos, {workers} en paralelo, {threads} hilos por proyecto.")
+
+    report = {'started_at': datetime.now().isoformat(), 'workers': workers, 'threads_per_project': threads}
+    start_all = time.perf_counter()
+    report['shared_etl'] = warm_shared_cache(projects, lab_dir) if warm_cache else []
+
+    # Los más lentos de la corrida anterior primero: acortan la cola final del pool
+    durations = previous_durations(lab_dir)
+    projects.sort(key=lambda p: -durations.get(p['name'], float('inf')))
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_project, p, threads, log_dir, list(extra_args) + force_args(p['name'], force), timeout): p
+            for p in projects
+        }
+        for future in as_completed(futures):
+            entry = future.result()
+            results.append(entry)
+            logger.info(f"[{entry['project']}] {entry['status']} en {entry['seconds']:.1f} s.")
+
+    report['projects'] = sorted(results, key=lambda entry: entry['project'])
+    report['success'] = all(entry['status'] == 'ok' for entry in results)
+    report['total_seconds'] = round(time.perf_counter() - start_all, 3)
+    save_json(lab_dir / "report.json", report)
+    report_frame(report).to_csv(models_dir / REPORT_CSV, index=False)
+    logger.info("Resumen del laboratorio:\n" + format_lab_report(report))
+    return report
+
+
+def report_frame(report):
+    """Una fila por proyecto: estado, duración, código de salida y etapas (estado/cache)."""
+    rows = []
+    for entry in report['projects']:
+        stages = entry['stages']
+        rows.append({
+            'Modelo': entry['project'],
+            'Estado': entry['status'],
+            'Segundos': entry['seconds'],
+            'Codigo_Salida': entry['returncode'],
+            'Hilos': entry['threads'],
+            'Etapas': ' '.join(f"{s['stage']}:{s['status']}" for s in stages),
+            'Etapas_Cache': sum(s.get('cache_hit', False) for s in stages),
+            'Log': entry['log']
+        })
+    return pd.DataFrame(rows, columns=['Modelo', 'Estado', 'Segundos', 'Codigo_Salida', 'Hilos',
+                                       'Etapas', 'Etapas_Cache', 'Log'])
+
+
+def format_lab_report(report):
+    lines = [f"{'Proyecto':<34}{'Estado':<9}{'Segundos':>10}  Etapas"]
+    for entry in report['projects']:
+        stages = ' '.join(f"{s['stage']}:{s['status']}" for s in entry['stages'])
+        lines.append(f"{entry['project']:<34}{entry['status']:<9}{entry['seconds']:>10.1f}  {stages}")
+    ok = sum(entry['status'] == 'ok' for entry in report['projects'])
+    lines.append(f"Total: {report['total_seconds']:.1f} s, {ok}/{len(report['projects'])} proyectos correctos.")
+    return '\n'.join(lines)
@@ -0,0 +1,121 @@
+"""
+Cache compartida de datos crudos para todos los proyectos del laboratorio.
+
+Cada consulta al API se identifica por la clave (base_url, resource_id, consulta) y se guarda
+una sola vez en `models/.cache/ckan/<clave>/` (configurable con `api.cache_dir` o la variable
+de entorno BCIE_CKAN_CACHE_DIR). La entrada contiene:
+    raw.csv                  Copia cruda sincronizada con el API (completa o incremental).
+    raw.checkpoint.json      Marca de agua de la extracción incremental.
+    meta.json                Clave, consulta, hash SHA-256 del contenido, filas y fecha.
+
+Mientras la entrada esté vigente (`api.cache_ttl_hours`) y su hash coincida, ningún proyecto
+consulta el API: el archivo se copia a `data.raw_path` solo si el contenido es distinto. Un
+bloqueo por entrada evita descargas duplicadas cuando varios proyectos corren en paralelo.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "ckan"
+CACHE_DIR_ENV = "BCIE_CKAN_CACHE_DIR"
+DEFAULT_TTL_HOURS = 12
+LOCK_TIMEOUT = 600
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hash SHA-256 del contenido de un archivo, leído por bloques."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(base_url, resource_id, query=None):
+    """Clave estable de la consulta: hash de (base_url, resource_id, consulta)."""
+    payload = json.dumps(
+        {'base_url': base_url, 'resource_id': resource_id, 'query': query or {}},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+def get_cache_dir(api_config):
+    return Path(api_config.get('cache_dir') or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+
+
+def read_meta(entry_dir):
+    path = Path(entry_dir) / "meta.json"
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_meta(entry_dir, meta):
+    path = Path(entry_dir) / "meta.json"
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, path)
+    return meta
+
+
+def is_fresh(meta, data_path, ttl_hours):
+    """La entrada es válida si no venció el TTL y el archivo conserva el hash registrado."""
+    if not meta or not Path(data_path).exists():
+        return False
+    fetched_at = datetime.fromisoformat(meta['fetched_at'])
+    if datetime.now() - fetched_at > timedelta(hours=ttl_hours):
+        return False
+    return meta.get('sha256') == file_sha256(data_path)
+
+
+@contextmanager
+def entry_lock(entry_dir, timeout=LOCK_TIMEOUT, poll=0.5):
+    """Bloqueo exclusivo entre procesos (archivo .lock); libera bloqueos abandonados tras `timeout`."""
+    lock_path = Path(entry_dir) / ".lock"
+    start = time.monotonic()
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            break
+        except FileExistsError:
+            try:
+                stale = time.time() - lock_path.stat().st_mtime > timeout
+            except FileNotFoundError:
+                continue
+            if stale:
+                logger.warning(f"Liberando bloqueo abandonado: {lock_path}")
+                lock_path.unlink(missing_ok=True)
+            elif time.monotonic() - start > timeout:
+                raise TimeoutError(f"No se obtuvo el bloqueo de la cache: {lock_path}")
+            else:
+                time.sleep(poll)
+    try:
+        yield
+    finally:
+        lock_path.unlink(missing_ok=True)
+
+
+def materialize(data_path, sha256, target_path):
+    """Copia la entrada de la cache a la ruta del proyecto si el contenido difiere."""
+    target_path = Path(target_path)
+    if target_path.exists() and file_sha256(target_path) == sha256:
+        return False
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target_path.with_name(f".{target_path.name}.tmp")
+    shutil.copyfile(data_path, tmp_path)
+    os.replace(tmp_path, target_path)
+    return True
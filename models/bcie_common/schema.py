@@ -0,0 +1,183 @@
+"""
+Esquema declarado de la tabla de aprobaciones (salida del ETL de todos los modelos).
+
+La normalización de textos se hace una sola vez, en la ingesta (`apply_schema`):
+    Pais               Mayúsculas, espacios y alias ('BELIZE', 'PANAMA', ...) a una clave
+                       canónica; categórica con vocabulario fijo.
+    Sector_Economico   Nombre canónico ('Sector Público', 'Sector Privado', 'No Definido');
+                       categórica con vocabulario fijo.
+    Anio, Anio_Origen  Entero (int16); Mes int8.
+    Monto_Aprobado     float64.
+    CANTIDAD_APROBACIONES  int32.
+
+Las etapas posteriores no vuelven a normalizar cadenas: filtran y agrupan sobre los códigos de
+las categóricas (groupby con observed=True) y traducen etiquetas con `map_codes`, que hace una
+búsqueda por categoría y no por fila.
+"""
+
+import logging
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Vocabulario de países: clave canónica (como la escribe el ETL) -> nombre para mostrar
+PAISES = {
+    'GUATEMALA': 'Guatemala',
+    'EL SALVADOR': 'El Salvador',
+    'HONDURAS': 'Honduras',
+    'NICARAGUA': 'Nicaragua',
+    'COSTA RICA': 'Costa Rica',
+    'PANAMÁ': 'Panamá',
+    'REPÚBLICA DOMINICANA': 'República Dominicana',
+    'BELICE': 'Belice',
+    'MÉXICO': 'México',
+    'TAIWÁN': 'Taiwán',
+    'ARGENTINA': 'Argentina',
+    'COLOMBIA': 'Colombia',
+    'ESPAÑA': 'España',
+    'COREA': 'Corea',
+    'CUBA': 'Cuba',
+    'REGIONAL': 'Regional'
+}
+
+# Variantes de nombre que llegan del API o de archivos antiguos -> clave canónica
+PAIS_ALIASES = {
+    'PANAMA': 'PANAMÁ',
+    'REPUBLICA DOMINICANA': 'REPÚBLICA DOMINICANA',
+    'BELIZE': 'BELICE',
+    'MEXICO': 'MÉXICO',
+    'TAIWAN': 'TAIWÁN',
+    'REPUBLICA DE CHINA (TAIWAN)': 'TAIWÁN',
+    'REPÚBLICA DE CHINA (TAIWÁN)': 'TAIWÁN',
+    'ESPANA': 'ESPAÑA',
+    'REPUBLICA DE COREA': 'COREA',
+    'REPÚBLICA DE COREA': 'COREA',
+    'COREA DEL SUR': 'COREA'
+}
+
+SECTORES = ('Sector Público', 'Sector Privado', 'No Definido')
+
+# Clave sin acentos en mayúsculas -> sector canónico
+SECTOR_ALIASES = {
+    'SECTOR PUBLICO': 'Sector Público',
+    'PUBLICO': 'Sector Público',
+    'SECTOR PRIVADO': 'Sector Privado',
+    'PRIVADO': 'Sector Privado',
+    'NO DEFINIDO': 'No Definido'
+}
+
+YEAR_COLS = ('Anio', 'Anio_Origen')
+YEAR_DTYPE = 'int16'
+MONTH_DTYPE = 'int8'
+AMOUNT_COL = 'Monto_Aprobado'
+AMOUNT_DTYPE = 'float64'
+COUNT_COL = 'CANTIDAD_APROBACIONES'
+COUNT_DTYPE = 'int32'
+
+
+def _collapse_upper(value):
+    return ' '.join(str(value).upper().split())
+
+
+def _strip_accents(value):
+    return ''.join(c for c in unicodedata.normalize('NFKD', value) if not unicodedata.combining(c))
+
+
+def pais_key(value):
+    """Clave canónica de un país ('  panama ' -> 'PANAMÁ')."""
+    key = _collapse_upper(value)
+    return PAIS_ALIASES.get(key, key)
+
+
+def pais_label(key):
+    """Nombre para mostrar de una clave canónica; los países fuera del vocabulario en Title Case."""
+    return PAISES.get(key, str(key).title())
+
+
+def sector_key(value):
+    """Nombre canónico de un sector ('SECTOR PUBLICO' -> 'Sector Público')."""
+    key = _strip_accents(_collapse_upper(value))
+    return SECTOR_ALIASES.get(key, ' '.join(str(value).split()).title())
+
+
+def to_vocabulary(series, normalizer, vocabulary, name):
+    """
+    Normaliza una columna de texto a una categórica con vocabulario fijo.
+
+    El normalizador se aplica a los valores únicos (no por fila). Los valores fuera del
+    vocabulario se conservan como categorías adicionales y se registran en el log. Las
+    categorías se ordenan alfabéticamente para que groupby y sort_values den el mismo orden
+    que con cadenas.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        uniques = series.cat.categories
+    else:
+        uniques = pd.unique(series.dropna())
+    mapping = {value: normalizer(value) for value in uniques}
+
+    extra = sorted(set(mapping.values()) - set(vocabulary))
+    if extra:
+        logger.warning(f"Valores fuera del vocabulario de {name}: {extra}")
+    dtype = pd.CategoricalDtype(sorted(set(vocabulary) | set(extra)))
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return map_codes(series, mapping).astype(dtype)
+    return series.map(mapping).astype(dtype)
+
+
+def map_codes(series, mapping, default=None):
+    """
+    Traduce una categórica con `mapping` (dict o función) mediante sus códigos.
+
+    Se evalúa una vez por categoría; los valores nulos y las categorías sin traducción
+    reciben `default`.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype('category')
+    translate = mapping if callable(mapping) else (lambda value: mapping.get(value, default))
+    lookup = np.array([translate(value) for value in series.cat.categories] + [default], dtype=object)
+    return pd.Series(lookup[series.cat.codes.to_numpy()], index=series.index, name=series.name)
+
+
+def cast_schema(df):
+    """Aplica los tipos numéricos del esquema a las columnas presentes (sin normalizar textos)."""
+    for col in YEAR_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(YEAR_DTYPE)
+    if 'Mes' in df.columns:
+        df['Mes'] = pd.to_numeric(df['Mes'], errors='coerce').astype(MONTH_DTYPE)
+    if AMOUNT_COL in df.columns:
+        df[AMOUNT_COL] = pd.to_numeric(df[AMOUNT_COL], errors='coerce').astype(AMOUNT_DTYPE)
+    if COUNT_COL in df.columns:
+        # Un conteo ausente equivale a cero aprobaciones
+        df[COUNT_COL] = pd.to_numeric(df[COUNT_COL], errors='coerce').fillna(0).astype(COUNT_DTYPE)
+    return df
+
+
+def apply_schema(df, pais_labels='key'):
+    """
+    Normaliza y tipa la tabla de aprobaciones en la ingesta (una sola vez).
+
+    Args:
+        df: DataFrame con las columnas ya renombradas (Pais, Sector_Economico, ...).
+        pais_labels: 'key' para las claves canónicas en mayúsculas (por defecto) o 'display'
+            para los nombres para mostrar ('Panamá', 'República Dominicana', ...).
+
+    Returns:
+        El mismo DataFrame con las columnas normalizadas y tipadas.
+    """
+    if 'Pais' in df.columns:
+        if pais_labels == 'display':
+            df['Pais'] = to_vocabulary(
+                df['Pais'], lambda value: pais_label(pais_key(value)), PAISES.values(), 'Pais'
+            )
+        else:
+            df['Pais'] = to_vocabulary(df['Pais'], pais_key, PAISES.keys(), 'Pais')
+    if 'Sector_Economico' in df.columns:
+        df['Sector_Economico'] = to_vocabulary(
+            df['Sector_Economico'], sector_key, SECTORES, 'Sector_Economico'
+        )
+    return cast_schema(df)
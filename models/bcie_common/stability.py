@@ -0,0 +1,165 @@
+"""
+Estabilidad por bootstrap (ARI) del clustering jerárquico sobre distancias precomputadas.
+
+Cada réplica toma una submuestra sin reemplazo (`frac` de los N puntos), arma su árbol de
+linkage una sola vez y lo corta para todos los K de la búsqueda; el ARI de cada K compara
+esas etiquetas con las del modelo completo restringidas a la submuestra.
+
+- Las distancias se leen del vector condensado (orden de scipy) sin armar la matriz N × N
+  ni la submatriz cuadrada: solo el condensado de la submuestra, fila por fila.
+- Las réplicas corren en procesos (joblib/loky). El condensado se vuelca una vez a un
+  archivo temporal (o se usa el del `np.memmap`, si ya lo es) y los workers lo abren como
+  memmap de solo lectura: ni copias por réplica ni una copia por proceso.
+- Cada réplica sí materializa en RAM su condensado float64 y la copia de trabajo del
+  linkage (~16 bytes por par de la submuestra, ~2.6 GB con N = 30.000 y frac = 0.6), así que
+  los workers se acotan por la memoria disponible (`stability_workers`), no solo por CPUs.
+- Las submuestras se sortean en el proceso principal con `seed`, en el mismo orden que el
+  bucle secuencial original: el resultado no depende de `n_jobs`.
+
+Uso:
+    stats = bootstrap_stability(condensed, {k: labels_k for k in ks}, B=50, frac=0.6)
+    stats[3]['mean']
+"""
+
+import logging
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy.cluster.hierarchy import fcluster, linkage
+from sklearn.metrics import adjusted_rand_score
+
+logger = logging.getLogger(__name__)
+
+# Memoria de una réplica: condensado float64 de la submuestra + copia float64 del linkage
+REPLICATE_BYTES_PER_PAIR = 16
+# Proceso worker de loky con numpy/scipy/sklearn importados
+WORKER_BASE_BYTES = 200 * 1024 ** 2
+# Fracción de la memoria disponible que pueden ocupar las réplicas simultáneas
+MEMORY_FRACTION = 0.5
+
+
+def n_from_condensed(size):
+    """N tal que N(N-1)/2 == size."""
+    n = int(round((1 + np.sqrt(1 + 8 * size)) / 2))
+    if n * (n - 1) // 2 != size:
+        raise ValueError(f"Longitud {size} no corresponde a un vector condensado.")
+    return n
+
+
+def subsample_condensed(condensed, idx, n=None, dtype=np.float64):
+    """
+    Condensado de la submatriz D[idx][:, idx] (en el orden de `idx`) leído del condensado
+    completo, sin materializar matrices cuadradas.
+    """
+    n = n or n_from_condensed(len(condensed))
+    idx = np.asarray(idx, dtype=np.int64)
+    m = len(idx)
+    out = np.empty(m * (m - 1) // 2, dtype=dtype)
+    pos = 0
+    for a in range(m - 1):
+        # Fila a de la submatriz: pares (idx[a], idx[b]) con b > a
+        i, j = idx[a], idx[a + 1:]
+        lo, hi = np.minimum(i, j), np.maximum(i, j)
+        # Posición de (lo, hi), lo < hi, en el condensado de scipy
+        out[pos:pos + len(j)] = condensed[n * lo - lo * (lo + 1) // 2 + (hi - lo - 1)]
+        pos += len(j)
+    return out
+
+
+def _replicate(condensed, n, idx, ks, labels_full, method):
+    """Una réplica: un árbol para la submuestra y el ARI de cada K."""
+    tree = linkage(subsample_condensed(condensed, idx, n), method=method)
+    return [
+        adjusted_rand_score(labels_full[row, idx], fcluster(tree, t=k, criterion="maxclust") - 1)
+        for row, k in enumerate(ks)
+    ]
+
+
+def available_memory_bytes():
+    """Memoria disponible del sistema en bytes (MemAvailable o psutil; None si no se conoce)."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return int(psutil.virtual_memory().available)
+
+
+def stability_workers(n, frac=0.6, n_jobs=-1):
+    """
+    Procesos para las réplicas: `n_jobs` acotado por MEMORY_FRACTION de la memoria
+    disponible dividida por la memoria de una réplica (al menos 1).
+    """
+    requested = effective_n_jobs(n_jobs)
+    available = available_memory_bytes()
+    if requested == 1 or available is None:
+        return requested
+    m = int(frac * n)
+    per_worker = WORKER_BASE_BYTES + REPLICATE_BYTES_PER_PAIR * (m * (m - 1) // 2)
+    workers = max(1, min(requested, int(available * MEMORY_FRACTION // per_worker)))
+    if workers < requested:
+        logger.info(f"Estabilidad: {workers} procesos en lugar de {requested} "
+                    f"({per_worker / 1024 ** 2:.0f} MB por réplica, {available / 1024 ** 2:.0f} MB disponibles).")
+    return workers
+
+
+def bootstrap_indices(n, B=50, frac=0.6, seed=42):
+    """Submuestras de cada réplica (mismo sorteo que el bucle secuencial por K)."""
+    rng = np.random.default_rng(seed)
+    return [rng.choice(n, size=int(frac * n), replace=False) for _ in range(B)]
+
+
+def bootstrap_stability(condensed, labels_by_k, method="average", B=50, frac=0.6, seed=42, n_jobs=-1):
+    """
+    ARI por bootstrap para todos los K con un árbol por réplica.
+
+    Args:
+        condensed: Distancias condensadas (np.ndarray o np.memmap) de los N puntos.
+        labels_by_k: {k: etiquetas del modelo completo (N,)}.
+        method: Método de linkage.
+        B: Réplicas.
+        frac: Fracción de puntos por réplica.
+        seed: Semilla del sorteo de submuestras.
+        n_jobs: Procesos (joblib) como máximo; se reducen si las réplicas simultáneas no
+            caben en la memoria disponible (`stability_workers`). 1 ejecuta en el proceso actual.
+
+    Returns:
+        {k: {'mean', 'std', 'min', 'max'}} del ARI entre réplicas.
+    """
+    n = n_from_condensed(len(condensed))
+    ks = list(labels_by_k)
+    labels_full = np.vstack([np.asarray(labels_by_k[k]) for k in ks])
+    replicates = bootstrap_indices(n, B=B, frac=frac, seed=seed)
+    n_jobs = stability_workers(n, frac=frac, n_jobs=n_jobs)
+
+    with tempfile.TemporaryDirectory(prefix="bcie_stability_") as tmp:
+        shared = condensed
+        if n_jobs != 1 and not isinstance(condensed, np.memmap):
+            shared = np.memmap(Path(tmp) / "condensed.dat", dtype=condensed.dtype, mode='w+',
+                               shape=condensed.shape)
+            shared[:] = condensed
+            shared.flush()
+            shared = np.memmap(shared.filename, dtype=condensed.dtype, mode='r', shape=condensed.shape)
+        # joblib envía los np.memmap como referencia al archivo (sin serializar los datos)
+        scores = Parallel(n_jobs=n_jobs)(
+            delayed(_replicate)(shared, n, idx, ks, labels_full, method) for idx in replicates
+        )
+        del shared
+    aris = np.asarray(scores, dtype=float).reshape(len(replicates), len(ks))
+    return {
+        k: {
+            "mean": float(np.mean(aris[:, col])),
+            "std": float(np.std(aris[:, col])),
+            "min": float(np.min(aris[:, col])),
+            "max": float(np.max(aris[:, col]))
+        }
+        for col, k in enumerate(ks)
+    }
@@ -0,0 +1,359 @@
+"""
+Orquestador de etapas para el `run.py` de cada proyecto (ETL -> entrenamiento -> dashboards).
+
+Cada etapa declara lo que consume: secciones de local.yaml, archivos (plantillas, catálogos),
+las salidas de etapas previas (`deps`) y el código que la implementa (módulo de la función,
+todo el `src/` del proyecto, carpetas adicionales y `bcie_common`). Antes de ejecutarla se calcula la huella SHA-256 de esas
+entradas; si coincide con la de la última ejecución exitosa y sus salidas siguen en disco sin
+cambios, la etapa se omite (acierto de cache).
+
+Las etapas `always=True` se ejecutan siempre: es el caso de la extracción, cuyo origen (el API
+CKAN) no se puede hashear. Con extracción incremental y cache compartida cuesta pocos segundos
+y, si no llegaron datos nuevos, la tabla procesada tiene el mismo hash y las etapas siguientes
+se omiten.
+
+Archivos (relativos al directorio del proyecto):
+    .cache/pipeline/state.json    Huellas de entradas y salidas, y valor devuelto, por etapa.
+    .cache/pipeline/report.json   Duración, CPU, memoria, estado y motivo de cada etapa de la
+                                  última corrida, con el tiempo en fit / metrics / io.
+    .cache/pipeline/spans.jsonl   Spans de la última corrida (`bcie_common.instrumentation`).
+
+CLI (en cada run.py):
+    python run.py                      Ejecuta solo las etapas cuyas entradas cambiaron
+    python run.py --force training     Fuerza una etapa (repetible; 'all' fuerza todas)
+    python run.py --force training --ignore-unknown-stages
+                                       Ignora las etapas forzadas que el proyecto no define
+                                       (lo usa run_lab.py al reenviar --force a todos)
+    python run.py --profile cprofile   Perfila cada etapa ejecutada (o pyinstrument)
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+
+import yaml
+
+from bcie_common import instrumentation
+from bcie_common.raw_cache import file_sha256
+from bcie_common.storage import columnar_candidates
+
+logger = logging.getLogger(__name__)
+
+STATE_DIR = Path(".cache") / "pipeline"
+COMMON_DIR = Path(__file__).resolve().parent
+FORCE_ALL = 'all'
+
+
+class Stage:
+    """
+    Args:
+        name: Nombre de la etapa (el que se usa en `--force`).
+        func: Función de la etapa; se llama como `func(*args)`, más `results=` si `with_results`.
+        args: Argumentos posicionales de `func` (normalmente la ruta de local.yaml). No forman
+            parte de la huella: valores por corrida como un run_id no invalidan la cache.
+        config: Secciones de local.yaml que lee la etapa.
+        inputs: Archivos que lee además de las salidas de `deps`.
+        outputs: Artefactos que produce: lista de rutas o función(results) -> rutas.
+        deps: Etapas cuyas salidas consume.
+        code: Archivos o carpetas (se toman sus *.py) además del módulo de `func` y del `src/`
+            del proyecto (ver `project_src`).
+        always: Se ejecuta siempre (origen externo no hasheable).
+        required: Si falla se detiene el pipeline; si no, se registra el fallo y se continúa.
+        with_results: Pasa `results` (valor devuelto por cada etapa previa, o el de la última
+            ejecución registrada si se omitió).
+    """
+
+    def __init__(self, name, func, args=(), config=(), inputs=(), outputs=(), deps=(), code=(),
+                 always=False, required=True, with_results=False):
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.config = tuple(config)
+        self.inputs = tuple(inputs)
+        self.outputs = outputs
+        self.deps = tuple(deps)
+        self.code = tuple(code)
+        self.always = always
+        self.required = required
+        self.with_results = with_results
+
+    def output_paths(self, results):
+        outputs = self.outputs(results) if callable(self.outputs) else self.outputs
+        return [Path(path) for path in outputs]
+
+    def code_paths(self):
+        # functools.partial y decoradores (`instrument`) apuntan al módulo real con __wrapped__
+        func = inspect.unwrap(getattr(self.func, 'func', self.func))
+        source = Path(inspect.getsourcefile(func)).resolve()
+        paths = [source]
+        # Módulos del proyecto que la etapa importa (utils, registros de modelos, ...)
+        src = project_src(source)
+        if src is not None:
+            paths.extend(sorted(src.rglob('*.py')))
+        for entry in self.code:
+            entry = Path(entry)
+            paths.extend(sorted(entry.rglob('*.py')) if entry.is_dir() else [entry])
+        paths.extend(sorted(p for p in COMMON_DIR.glob('*.py')))
+        return paths
+
+
+def project_src(source):
+    """
+    Carpeta `src/` del proyecto que contiene `source` (un módulo dentro de `src/` o el run.py
+    de la raíz del proyecto); None si no la hay antes de llegar a `models/`.
+    """
+    for parent in Path(source).resolve().parents:
+        if parent == COMMON_DIR.parent:
+            return None
+        if parent.name == 'src':
+            return parent
+        if (parent / 'src').is_dir():
+            return parent / 'src'
+    return None
+
+
+def _digest(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def files_fingerprint(paths):
+    """
+    Huella del contenido de una lista de archivos. Para una tabla .csv se incluyen también sus
+    versiones columnares (`bcie_common.storage`). Un archivo ausente cuenta como 'missing'.
+    """
+    entries = {}
+    for path in paths:
+        path = Path(path)
+        candidates = [path]
+        if path.suffix == '.csv':
+            candidates += [c for c in columnar_candidates(path) if c.exists()]
+        for candidate in candidates:
+            entries[candidate.as_posix()] = file_sha256(candidate) if candidate.is_file() else 'missing'
+    return _digest(entries)
+
+
+def outputs_missing(paths):
+    return [str(path) for path in paths if not Path(path).exists()]
+
+
+def input_fingerprint(stage, config, stages_by_name, results):
+    """Huella de todo lo que consume la etapa: configuración, archivos, salidas previas y código."""
+    upstream = []
+    for dep in stage.deps:
+        upstream.extend(stages_by_name[dep].output_paths(results))
+    return _digest({
+        'config': {section: config.get(section) for section in stage.config},
+        'files': files_fingerprint(list(stage.inputs) + upstream),
+        'code': files_fingerprint(stage.code_paths())
+    })
+
+
+def load_state(state_dir=STATE_DIR):
+    path = Path(state_dir) / "state.json"
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json(path, payload):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2, default=str)
+    tmp_path.replace(path)
+
+
+def jsonable(value):
+    """Valor devuelto por la etapa si se puede guardar en el estado (dict con run_id, rutas...)."""
+    if not isinstance(value, (dict, list, str, int, float, bool, type(None))):
+        return None
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        return None
+    return value
+
+
+def skip_reason(stage, fingerprint, previous, outputs):
+    """Motivo por el que la etapa debe ejecutarse, o None si se puede omitir."""
+    if stage.always:
+        return "always"
+    if previous is None:
+        return "sin ejecucion previa"
+    if previous.get('inputs') != fingerprint:
+        return "cambiaron las entradas"
+    missing = outputs_missing(outputs)
+    if missing:
+        return f"faltan salidas: {', '.join(missing)}"
+    if previous.get('outputs') != files_fingerprint(outputs):
+        return "las salidas cambiaron fuera del pipeline"
+    return None
+
+
+def run_stages(stages, config_path, force=(), skip=(), state_dir=STATE_DIR, profile=None,
+               ignore_unknown=False):
+    """
+    Ejecuta las etapas en orden, omitiendo las que no cambiaron.
+
+    Args:
+        stages: Lista de `Stage` en orden topológico.
+        config_path: Ruta de local.yaml del proyecto.
+        force: Nombres de etapas a ejecutar aunque estén vigentes ('all' = todas).
+        skip: Nombres de etapas a no ejecutar (se usa su último resultado registrado).
+        state_dir: Carpeta del estado, del reporte y de los spans.
+        profile: 'cprofile' o 'pyinstrument' para perfilar las etapas ejecutadas.
+        ignore_unknown: Descarta de `force` las etapas que no existen en lugar de fallar.
+
+    Returns:
+        dict con el reporte de la corrida (`success`, `stages`: nombre, estado, segundos,
+        segundos de CPU, pico de RSS, tiempo por categoría, cache_hit y motivo).
+    """
+    stages_by_name = {stage.name: stage for stage in stages}
+    if ignore_unknown:
+        ignored = sorted(set(force) - set(stages_by_name) - {FORCE_ALL})
+        if ignored:
+            logger.info(f"Etapas forzadas que este proyecto no define (se ignoran): {ignored}")
+        force = [name for name in force if name not in ignored]
+    unknown = (set(force) | set(skip)) - set(stages_by_name) - {FORCE_ALL}
+    if unknown:
+        raise ValueError(f"Etapas desconocidas: {sorted(unknown)}. Disponibles: {list(stages_by_name)}")
+    force_all = FORCE_ALL in force
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    state_path = Path(state_dir) / "state.json"
+    spans_path = instrumentation.start_run(Path(state_dir) / "spans.jsonl", profile=profile)
+    state = load_state(state_dir)
+    results = {name: entry.get('result') for name, entry in state.items()}
+    report = {'started_at': datetime.now().isoformat(), 'config_path': str(config_path), 'stages': []}
+    start_all = time.perf_counter()
+    success = True
+
+    for stage in stages:
+        start = time.perf_counter()
+        entry = {'stage': stage.name, 'status': None, 'cache_hit': False, 'seconds': 0.0, 'reason': None}
+        report['stages'].append(entry)
+
+        if stage.name in skip:
+            entry.update(status='skipped', reason="omitida por argumento")
+            logger.info(f"[{stage.name}] omitida por argumento.")
+            continue
+
+        fingerprint = input_fingerprint(stage, config, stages_by_name, results)
+        previous = state.get(stage.name)
+        if force_all or stage.name in force:
+            reason = "forzada"
+        else:
+            reason = skip_reason(stage, fingerprint, previous, stage.output_paths(results))
+
+        if reason is None:
+            entry.update(status='cached', cache_hit=True, reason="entradas sin cambios",
+                         seconds=round(time.perf_counter() - start, 3))
+            logger.info(f"[{stage.name}] sin cambios en las entradas; se omite.")
+            continue
+
+        logger.info(f"[{stage.name}] ejecutando ({reason})...")
+        kwargs = {'results': results} if stage.with_results else {}
+        try:
+            with instrumentation.span(stage.name, kind='stage') as stage_span:
+                value = stage.func(*stage.args, **kwargs)
+        except Exception as e:
+            entry.update(status='failed', reason=f"{reason}; error: {e}",
+                         seconds=round(time.perf_counter() - start, 3),
+                         **span_metrics(spans_path, stage_span.id))
+            logger.exception(f"[{stage.name}] fallo: {e}")
+            if stage.required:
+                success = False
+                break
+            continue
+
+        results[stage.name] = jsonable(value)
+        outputs = stage.output_paths(results)
+        missing = outputs_missing(outputs)
+        if missing:
+            logger.warning(f"[{stage.name}] termino sin generar: {', '.join(missing)}; no se registra en cache.")
+            state.pop(stage.name, None)
+        else:
+            state[stage.name] = {
+                'inputs': fingerprint,
+                'outputs': files_fingerprint(outputs),
+                'result': results[stage.name],
+                'finished_at': datetime.now().isoformat()
+            }
+        save_json(state_path, state)
+        entry.update(status='ran', reason=reason, seconds=round(time.perf_counter() - start, 3),
+                     **span_metrics(spans_path, stage_span.id))
+
+    report['success'] = success
+    report['total_seconds'] = round(time.perf_counter() - start_all, 3)
+    save_json(Path(state_dir) / "report.json", report)
+    logger.info("Resumen del pipeline:\n" + format_report(report))
+    return report
+
+
+def span_metrics(spans_path, span_id):
+    """CPU, memoria (pico del proceso y crecimiento en la etapa) y segundos por categoría del span de una etapa."""
+    spans = instrumentation.read_spans(spans_path)
+    record = next((s for s in spans if s['span_id'] == span_id), None)
+    if record is None:
+        return {}
+    return {
+        'cpu_seconds': record['cpu_s'],
+        'process_peak_rss_mb': record['process_peak_rss_mb'],
+        'peak_growth_mb': record['peak_growth_mb'],
+        'children_peak_rss_mb': record['children_peak_rss_mb'],
+        'breakdown': instrumentation.summarize(spans, span_id)
+    }
+
+
+def format_report(report):
+    """Tabla de texto con estado, duración y motivo por etapa."""
+    # Pico MB: pico de RSS del proceso al cerrar la etapa; +Pico: cuánto lo subió la etapa
+    lines = [f"{'Etapa':<16}{'Estado':<10}{'Segundos':>10}{'CPU':>9}{'Pico MB':>9}{'+Pico':>8}  Motivo"]
+    for entry in report['stages']:
+        cpu = f"{entry['cpu_seconds']:.2f}" if entry.get('cpu_seconds') is not None else '-'
+        rss = f"{entry['process_peak_rss_mb']:.0f}" if entry.get('process_peak_rss_mb') is not None else '-'
+        growth = f"{entry['peak_growth_mb']:.0f}" if entry.get('peak_growth_mb') is not None else '-'
+        lines.append(
+            f"{entry['stage']:<16}{entry['status']:<10}{entry['seconds']:>10.2f}{cpu:>9}{rss:>9}{growth:>8}"
+            f"  {entry['reason'] or ''}"
+        )
+    hits = sum(entry['cache_hit'] for entry in report['stages'])
+    lines.append(f"Total: {report['total_seconds']:.2f} s, {hits}/{len(report['stages'])} etapas desde cache.")
+    return '\n'.join(lines)
+
+
+def add_arguments(parser):
+    """
+    Agrega `--force`, `--ignore-unknown-stages` y `--profile` a un parser existente (run.py con
+    argumentos propios).
+    """
+    parser.add_argument(
+        "--force", action="append", default=[], metavar="ETAPA",
+        help=f"Ejecuta la etapa aunque sus entradas no hayan cambiado (repetible; '{FORCE_ALL}' = todas)"
+    )
+    parser.add_argument(
+        "--ignore-unknown-stages", action="store_true",
+        help="Ignora en --force las etapas que este proyecto no define (ejecución desde run_lab.py)"
+    )
+    parser.add_argument(
+        "--profile", choices=instrumentation.PROFILERS, default=None,
+        help="Perfila cada etapa ejecutada (.cache/pipeline/profiles/)"
+    )
+    return parser
+
+
+def main(stages, config_path, argv=None, description=None, state_dir=STATE_DIR):
+    """Punto de entrada para run.py: interpreta `--force` / `--profile` y ejecuta las etapas."""
+    parser = add_arguments(argparse.ArgumentParser(description=description))
+    args = parser.parse_args(argv)
+    return run_stages(stages, config_path, force=args.force, state_dir=state_dir, profile=args.profile,
+                      ignore_unknown=args.ignore_unknown_stages)
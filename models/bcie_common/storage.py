@@ -0,0 +1,165 @@
+"""
+Almacenamiento columnar tipado para las etapas 02-preprocessed y 04-predictions.
+
+Con `data.storage_format` en 'parquet' (por defecto) o 'feather', `write_table` guarda la tabla
+junto a la ruta configurada (misma ruta, extensión .parquet/.feather) con `Pais` y
+`Sector_Economico` como categóricas y las fechas como datetime nativo. El CSV solo se escribe
+como exportación (`data.export_csv`) y antes que el archivo columnar.
+
+`read_table` recibe la misma ruta .csv de la configuración y lee el archivo del formato
+configurado (`config`, por defecto 'parquet'); si ese archivo no existe, prueba los demás
+formatos columnares y al final el CSV (también sin pyarrow). La elección no depende de las
+fechas de modificación: un CSV de exportación editado a mano no reemplaza al Parquet. Así los
+lectores no dependen del formato almacenado.
+"""
+
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from bcie_common.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_SUFFIXES = {'parquet': '.parquet', 'feather': '.feather'}
+DEFAULT_FORMAT = 'parquet'
+DEFAULT_CATEGORICAL_COLS = ('Pais', 'Sector_Economico')
+DEFAULT_DATE_COLS = ('Fecha_Aprobacion',)
+
+
+def columnar_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def storage_options(config=None):
+    """Opciones de almacenamiento de la sección `data` de local.yaml."""
+    data_cfg = (config or {}).get('data', {})
+    return {
+        'format': data_cfg.get('storage_format', DEFAULT_FORMAT),
+        'export_csv': data_cfg.get('export_csv', True),
+        'categorical_cols': data_cfg.get('categorical_cols', list(DEFAULT_CATEGORICAL_COLS)),
+        'date_cols': data_cfg.get('date_cols', list(DEFAULT_DATE_COLS))
+    }
+
+
+def to_typed(df, categorical_cols=DEFAULT_CATEGORICAL_COLS, date_cols=DEFAULT_DATE_COLS):
+    """Convierte columnas de texto a categóricas y fechas en texto a datetime nativo."""
+    df = df.copy()
+    for col in categorical_cols:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in date_cols:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    return df
+
+
+def columnar_candidates(path):
+    path = Path(path)
+    if path.suffix in COLUMNAR_SUFFIXES.values():
+        return [path]
+    return [path.with_suffix(suffix) for suffix in COLUMNAR_SUFFIXES.values()]
+
+
+def resolve_table(path, config=None):
+    """
+    Archivo que se leerá para `path`: el del formato configurado (`data.storage_format`)
+    si existe; si no, el primer columnar existente y, en último caso, la propia ruta (CSV).
+    """
+    path = Path(path)
+    fmt = storage_options(config)['format']
+    if fmt == 'csv' or not columnar_available():
+        return path
+
+    candidates = columnar_candidates(path)
+    preferred = path.with_suffix(COLUMNAR_SUFFIXES.get(fmt, COLUMNAR_SUFFIXES[DEFAULT_FORMAT]))
+    if path.suffix not in COLUMNAR_SUFFIXES.values():
+        candidates = [preferred] + [c for c in candidates if c != preferred]
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    return path
+
+
+def table_exists(path, config=None):
+    return resolve_table(path, config).exists()
+
+
+def read_table(path, columns=None, config=None, **csv_kwargs):
+    """
+    Lee una tabla de cualquier etapa a partir de su ruta configurada.
+
+    Args:
+        path: Ruta de la configuración (normalmente .csv).
+        columns: Subconjunto opcional de columnas.
+        config: Configuración del proyecto (sección `data`); decide el formato que se lee.
+        **csv_kwargs: Argumentos de `pd.read_csv` (solo aplican si se lee el CSV).
+    """
+    source = resolve_table(path, config)
+    with span('read_table', kind='io', path=str(source)) as current:
+        if source.suffix == COLUMNAR_SUFFIXES['parquet']:
+            df = pd.read_parquet(source, columns=columns)
+        elif source.suffix == COLUMNAR_SUFFIXES['feather']:
+            df = pd.read_feather(source, columns=columns)
+        else:
+            df = pd.read_csv(source, usecols=columns, **csv_kwargs)
+        current.rows = len(df)
+    return df
+
+
+def records_json(df):
+    """JSON de registros para los dashboards, con las fechas como 'YYYY-MM-DD' (igual que en el CSV)."""
+    out = df.copy()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime('%Y-%m-%d')
+    return out.to_json(orient='records')
+
+
+def write_table(df, path, config=None, **overrides):
+    """
+    Guarda una tabla en el formato configurado (`data.storage_format`).
+
+    Args:
+        df: DataFrame a guardar.
+        path: Ruta de la configuración (.csv); el archivo columnar usa la misma ruta con
+            extensión .parquet/.feather.
+        config: Configuración del proyecto (sección `data`).
+        **overrides: Reemplaza opciones de `storage_options` (format, export_csv, ...).
+
+    Returns:
+        Ruta del archivo principal escrito.
+    """
+    opts = storage_options(config)
+    opts.update(overrides)
+    with span('write_table', kind='io', path=str(path)) as current:
+        current.rows = len(df)
+        return _write_table(df, Path(path), opts)
+
+
+def _write_table(df, path, opts):
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fmt = opts['format']
+    if fmt not in COLUMNAR_SUFFIXES or not columnar_available():
+        if fmt != 'csv':
+            logger.warning(f"Formato '{fmt}' no disponible (requiere pyarrow); se guarda en CSV.")
+        df.to_csv(path, index=False)
+        return path
+
+    # El CSV de exportación se escribe primero para que el columnar sea el más reciente
+    if opts['export_csv']:
+        df.to_csv(path, index=False)
+
+    typed = to_typed(df, opts['categorical_cols'], opts['date_cols']).reset_index(drop=True)
+    target = path.with_suffix(COLUMNAR_SUFFIXES[fmt])
+    if fmt == 'parquet':
+        typed.to_parquet(target, index=False)
+    else:
+        typed.to_feather(target)
+    return target
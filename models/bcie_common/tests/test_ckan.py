@@ -0,0 +1,112 @@
+import time
+
+import pandas as pd
+
+from bcie_common.ckan import extract_raw, fetch_records, make_session
+from bcie_common.ckan_stub import StubCkanServer
+
+
+def make_records(n, start=1):
+    return [
+        {'_id': i, 'PAIS': 'Honduras', 'ANIO_APROBACION': 2000 + i % 25, 'MONTO_BRUTO_USD': float(i)}
+        for i in range(start, start + n)
+    ]
+
+
+def test_concurrent_download_matches_sequential():
+    with StubCkanServer(make_records(2500)) as server:
+        sequential = fetch_records(server.url, server.resource_id, 100, session=make_session())
+        concurrent = fetch_records(
+            server.url, server.resource_id, 100, session=make_session(pool_size=8), max_workers=8
+        )
+
+    assert len(concurrent) == 2500
+    assert concurrent['_id'].tolist() == list(range(1, 2501))
+    pd.testing.assert_frame_equal(sequential, concurrent)
+
+
+def test_concurrent_download_throughput():
+    with StubCkanServer(make_records(2000), latency=0.02) as server:
+        start = time.perf_counter()
+        fetch_records(server.url, server.resource_id, 100, session=make_session())
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fetch_records(server.url, server.resource_id, 100, session=make_session(pool_size=8), max_workers=8)
+        concurrent_time = time.perf_counter() - start
+
+    assert concurrent_time < sequential_time * 0.6
+
+
+def test_transient_failures_are_retried():
+    with StubCkanServer(make_records(1000), failures_per_page=2) as server:
+        session = make_session(pool_size=4, retries=3, backoff=0)
+        df = fetch_records(server.url, server.resource_id, 100, session=session, max_workers=4)
+
+        assert len(df) == 1000
+        assert server.failure_count == 2 * 10
+
+
+def test_incremental_extraction_fetches_only_new_records(tmp_path):
+    raw_path = tmp_path / "aprobaciones_bcie.csv"
+    server = StubCkanServer(make_records(500))
+    with server:
+        api = {'base_url': server.url, 'resource_id': server.resource_id, 'limit': 100,
+               'incremental': True, 'max_workers': 4}
+        assert len(extract_raw(api, raw_path)) == 500
+
+        server.records += make_records(30, start=501)
+        server.request_count = 0
+        df = extract_raw(api, raw_path)
+
+    assert server.request_count == 1
+    assert df['_id'].tolist() == list(range(1, 531))
+    assert pd.read_csv(raw_path)['_id'].tolist() == list(range(1, 531))
+
+
+def test_shared_cache_downloads_once_for_all_projects(tmp_path):
+    server = StubCkanServer(make_records(300))
+    with server:
+        api = {'base_url': server.url, 'resource_id': server.resource_id, 'limit': 100,
+               'incremental': True, 'shared_cache': True, 'cache_dir': str(tmp_path / "cache"),
+               'cache_ttl_hours': 12}
+        projects = [tmp_path / name / "aprobaciones_bcie.csv" for name in ("prophet", "dbscan", "kmeans")]
+        frames = [extract_raw(api, raw_path) for raw_path in projects]
+        requests_after_first_refresh = server.request_count
+
+        server.records += make_records(5, start=301)
+        api['cache_ttl_hours'] = 0
+        df = extract_raw(api, projects[0])
+
+    assert requests_after_first_refresh == 3
+    assert all(len(frame) == 300 for frame in frames)
+    assert server.request_count == requests_after_first_refresh + 1
+    assert len(df) == 305 and len(pd.read_csv(projects[0])) == 305
+
+
+def test_sql_aggregation_matches_client_side_fallback(tmp_path):
+    records = [
+        {'_id': i, 'PAIS': ('Honduras', 'Guatemala', 'Panamá')[i % 3], 'ANIO_APROBACION': 2000 + i % 7,
+         'SECTOR_INSTITUCIONAL': ('Sector Público', 'Sector Privado')[i % 2],
+         'MONTO_BRUTO_USD': float(i), 'CANTIDAD_APROBACIONES': 1}
+        for i in range(1, 1001)
+    ]
+    api = {'resource_id': 'stub-resource', 'limit': 10, 'aggregate': True, 'use_sql': True}
+
+    with StubCkanServer(records, sql=True) as server:
+        pushed = extract_raw({**api, 'base_url': server.url}, tmp_path / "sql.csv")
+        assert server.sql_count == 5  # 42 grupos en paginas de 10
+        assert server.request_count == server.sql_count
+
+    with StubCkanServer(records) as server:
+        fallback = extract_raw({**api, 'base_url': server.url}, tmp_path / "client.csv")
+
+    assert len(pushed) == 42 and pushed['CANTIDAD_APROBACIONES'].sum() == 1000
+    assert pushed['MONTO_BRUTO_USD'].sum() == sum(range(1, 1001))
+    keys = ['PAIS', 'ANIO_APROBACION', 'SECTOR_INSTITUCIONAL']
+    pd.testing.assert_frame_equal(
+        pushed.sort_values(keys).reset_index(drop=True),
+        fallback.sort_values(keys).reset_index(drop=True),
+        check_dtype=False
+    )
+    assert pd.read_csv(tmp_path / "sql.csv").shape == (42, 5)
@@ -0,0 +1,62 @@
+import numpy as np
+from scipy.spatial.distance import pdist, squareform
+from sklearn.metrics import silhouette_samples, silhouette_score
+
+from bcie_common.cluster_metrics import condensed_chunks, intra_inter_stats, silhouette_stats
+
+
+def test_chunks_cover_condensed_in_order():
+    n = 47
+    condensed = pdist(np.random.default_rng(0).normal(size=(n, 2)))
+    D = squareform(condensed)
+    position = 0
+    for pos_start, pos_stop, rows, cols in condensed_chunks(n, chunk_pairs=100):
+        assert pos_start == position and pos_stop - pos_start <= max(100, n - 1)
+        np.testing.assert_array_equal(condensed[pos_start:pos_stop], D[rows, cols])
+        position = pos_stop
+    assert position == len(condensed)
+
+
+def test_intra_inter_matches_triu_means_for_all_k():
+    rng = np.random.default_rng(1)
+    n = 200
+    condensed = pdist(rng.normal(size=(n, 3)))
+    iu = np.triu_indices(n, k=1)
+    labels_by_k = {k: rng.integers(0, k, n) for k in (2, 4, 7)}
+
+    stats = intra_inter_stats(condensed, labels_by_k, chunk_pairs=1000)
+    for k, labels in labels_by_k.items():
+        same = labels[iu[0]] == labels[iu[1]]
+        assert np.isclose(stats[k]['W'], condensed[same].mean())
+        assert np.isclose(stats[k]['B'], condensed[~same].mean())
+        assert stats[k]['intra_pairs'].sum() == same.sum()
+
+    # Un solo cluster: sin pares inter
+    assert intra_inter_stats(condensed, {1: np.zeros(n, dtype=int)})[1]['B'] == 0.0
+
+
+def test_silhouette_matches_sklearn_for_all_k():
+    rng = np.random.default_rng(2)
+    n = 150
+    condensed = pdist(rng.normal(size=(n, 3))).astype(np.float32)
+    D = squareform(condensed)
+    labels_by_k = {k: rng.integers(0, k, n) for k in (2, 5)}
+    # Cluster de un solo punto y etiqueta 1 sin puntos
+    labels_by_k[3] = np.where(np.arange(n) == 7, 2, 0)
+
+    stats = silhouette_stats(condensed, labels_by_k, chunk_pairs=500)
+    reference = intra_inter_stats(condensed, labels_by_k)
+    for k, labels in labels_by_k.items():
+        np.testing.assert_allclose(stats[k]['samples'], silhouette_samples(D, labels, metric='precomputed'),
+                                   atol=1e-6)
+        assert np.isclose(stats[k]['score'], silhouette_score(D, labels, metric='precomputed'))
+        assert np.isclose(stats[k]['W'], reference[k]['W']) and np.isclose(stats[k]['B'], reference[k]['B'])
+
+    # Bloques densos de una fila (chunk_pairs < N): mismo resultado
+    narrow = silhouette_stats(condensed, labels_by_k, chunk_pairs=100)
+    for k in labels_by_k:
+        np.testing.assert_allclose(narrow[k]['samples'], stats[k]['samples'], atol=1e-9)
+
+    # Un solo cluster: silueta no definida
+    single = silhouette_stats(condensed, {1: np.zeros(n, dtype=int)})[1]
+    assert single['score'] == 0.0 and single['samples'] is None
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bcie_common import instrumentation
+from bcie_common.instrumentation import instrument, read_spans, span, start_run, summarize
+
+
+def test_spans_record_nesting_rows_and_errors(tmp_path):
+    path = start_run(tmp_path / "spans.jsonl")
+
+    @instrument()
+    def run_etl():
+        with span('fit', kind='fit') as fit_span:
+            fit_span.rows = 3
+        return pd.DataFrame({'a': [1, 2]})
+
+    with span('etl', kind='stage') as stage_span:
+        run_etl()
+    with pytest.raises(ValueError):
+        with span('training', kind='stage'):
+            raise ValueError("sin datos")
+
+    spans = {record['name']: record for record in read_spans(path)}
+    assert spans['run_etl']['parent'] == stage_span.id
+    assert spans['run_etl']['rows'] == 2
+    assert spans['fit']['parent'] == spans['run_etl']['span_id'] and spans['fit']['rows'] == 3
+    assert spans['training']['status'] == 'error' and 'sin datos' in spans['training']['error']
+    assert all(record['wall_s'] >= 0 and record['cpu_s'] >= 0 for record in spans.values())
+    assert summarize(read_spans(path), stage_span.id) == {'fit': spans['fit']['wall_s']}
+
+
+def test_profile_mode_writes_profile_for_root_span(tmp_path):
+    path = start_run(tmp_path / "spans.jsonl", profile='cprofile')
+    try:
+        with span('training', kind='stage'):
+            with span('fit', kind='fit'):
+                sum(range(1000))
+        spans = {record['name']: record for record in read_spans(path)}
+    finally:
+        start_run(path)
+
+    # Solo se perfila el span raíz
+    assert spans['training']['profile'].endswith("_training.prof")
+    assert 'profile' not in spans['fit']
+    assert len(list((tmp_path / "profiles").glob("*.prof"))) == 1
+    assert instrumentation.PROFILE_ENV not in os.environ
+
+
+def test_memory_fields_cover_span_and_finished_children(tmp_path):
+    path = start_run(tmp_path / "spans.jsonl")
+
+    with span('alloc', kind='fit'):
+        block = np.ones(40 * 1024 * 1024 // 8)  # 40 MB retenidos al cerrar el span
+    with span('child', kind='fit'):
+        subprocess.run([sys.executable, "-c", "b = bytearray(120 * 1024 * 1024)"], check=True)
+    del block
+
+    spans = {record['name']: record for record in read_spans(path)}
+    assert spans['alloc']['rss_delta_mb'] >= 35
+    assert spans['alloc']['process_peak_rss_mb'] >= spans['alloc']['rss_delta_mb']
+    assert spans['child']['children_peak_rss_mb'] >= 120
+    assert spans['child']['rss_delta_mb'] < 35
@@ -0,0 +1,61 @@
+import json
+
+import pandas as pd
+
+from bcie_common.lab import REPORT_CSV, discover_projects, force_args, run_lab
+
+RUN_PY = """
+import json, os, sys
+from pathlib import Path
+Path('threads.json').write_text(json.dumps({'omp': os.environ['OMP_NUM_THREADS'], 'cwd': os.getcwd()}))
+sys.exit(CODE)
+"""
+
+
+def make_project(models_dir, name, code=0, script="run.py"):
+    project_dir = models_dir / name
+    (project_dir / "config").mkdir(parents=True)
+    (project_dir / "config" / "local.yaml").write_text("data: {}\n", encoding='utf-8')
+    (project_dir / script).parent.mkdir(parents=True, exist_ok=True)
+    (project_dir / script).write_text(RUN_PY.replace('CODE', str(code)), encoding='utf-8')
+    return project_dir
+
+
+def test_discover_projects_uses_first_non_empty_entry_point(tmp_path):
+    make_project(tmp_path, "aprobaciones_a_2026")
+    dbscan = make_project(tmp_path, "aprobaciones_b_2026", script="entrypoint/main.py")
+    (dbscan / "run.py").write_text("", encoding='utf-8')
+    (tmp_path / "bcie_common").mkdir()
+
+    projects = discover_projects(tmp_path)
+
+    assert [p['name'] for p in projects] == ["aprobaciones_a_2026", "aprobaciones_b_2026"]
+    assert projects[1]['script'] == dbscan / "entrypoint" / "main.py"
+
+
+def test_run_lab_reports_status_per_project(tmp_path):
+    ok = make_project(tmp_path, "aprobaciones_ok_2026")
+    make_project(tmp_path, "aprobaciones_falla_2026", code=1)
+
+    report = run_lab(tmp_path, workers=2, warm_cache=False)
+
+    assert not report['success']
+    assert {p['project']: p['status'] for p in report['projects']} == {
+        'aprobaciones_falla_2026': 'failed', 'aprobaciones_ok_2026': 'ok'
+    }
+    child = json.loads((ok / "threads.json").read_text())
+    assert child['cwd'] == str(ok) and int(child['omp']) == report['threads_per_project']
+
+    table = pd.read_csv(tmp_path / REPORT_CSV)
+    assert table['Modelo'].tolist() == ['aprobaciones_falla_2026', 'aprobaciones_ok_2026']
+    assert table['Estado'].tolist() == ['failed', 'ok']
+
+
+def test_force_args_per_project():
+    force = ['training', 'aprobaciones_TimesFM_2026:evaluation']
+
+    assert force_args('aprobaciones_TimesFM_2026', force) == [
+        '--force', 'training', '--force', 'evaluation', '--ignore-unknown-stages'
+    ]
+    assert force_args('aprobaciones_eda_2026', ['aprobaciones_TimesFM_2026:evaluation']) == []
+    assert force_args('aprobaciones_eda_2026', ['all']) == ['--force', 'all', '--ignore-unknown-stages']
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from bcie_common.schema import PAISES, SECTORES, apply_schema, map_codes, pais_label
+
+
+def make_frame():
+    return pd.DataFrame({
+        'Pais': [' Panama', 'BELIZE', 'Costa Rica ', 'honduras', 'Narnia'],
+        'Sector_Economico': ['Sector Publico', 'sector privado', 'Sector Público', 'PRIVADO', None],
+        'Anio': [2012, 2015, 2020, 2021, 2022],
+        'Monto_Aprobado': ['1.5', '2', '3', '4', '5'],
+        'CANTIDAD_APROBACIONES': [1, None, 3, 4, 5],
+    })
+
+
+def test_apply_schema_normalizes_once_with_fixed_vocabulary():
+    df = apply_schema(make_frame())
+
+    assert df['Pais'].tolist() == ['PANAMÁ', 'BELICE', 'COSTA RICA', 'HONDURAS', 'NARNIA']
+    assert list(df['Pais'].cat.categories) == sorted(list(PAISES) + ['NARNIA'])
+    assert df['Sector_Economico'].tolist()[:4] == ['Sector Público', 'Sector Privado', 'Sector Público', 'Sector Privado']
+    assert list(df['Sector_Economico'].cat.categories) == sorted(SECTORES)
+    assert df['Anio'].dtype == 'int16'
+    assert df['Monto_Aprobado'].dtype == 'float64'
+    assert df['CANTIDAD_APROBACIONES'].dtype == 'int32'
+    assert df['CANTIDAD_APROBACIONES'].tolist() == [1, 0, 3, 4, 5]
+
+
+def test_apply_schema_is_idempotent_and_supports_display_labels():
+    once = apply_schema(make_frame())
+    pd.testing.assert_frame_equal(apply_schema(once.copy()), once)
+
+    display = apply_schema(make_frame(), pais_labels='display')
+    assert display['Pais'].tolist() == ['Panamá', 'Belice', 'Costa Rica', 'Honduras', 'Narnia']
+
+
+def test_map_codes_translates_per_category():
+    pais = apply_schema(make_frame())['Pais']
+    assert map_codes(pais, pais_label).tolist() == ['Panamá', 'Belice', 'Costa Rica', 'Honduras', 'Narnia']
+    assert map_codes(pais, {'HONDURAS': 'Fundador'}, 'Otro').tolist() == ['Otro', 'Otro', 'Otro', 'Fundador', 'Otro']
@@ -0,0 +1,52 @@
+import numpy as np
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import pdist, squareform
+from sklearn.metrics import adjusted_rand_score
+
+from bcie_common import stability
+from bcie_common.stability import bootstrap_stability, stability_workers, subsample_condensed
+
+
+def test_subsample_condensed_matches_square_submatrix():
+    rng = np.random.default_rng(0)
+    condensed = pdist(rng.normal(size=(60, 2))).astype(np.float32)
+    idx = rng.choice(60, size=35, replace=False)
+
+    expected = squareform(squareform(condensed)[np.ix_(idx, idx)], checks=False)
+    np.testing.assert_array_equal(subsample_condensed(condensed, idx), expected)
+
+
+def test_bootstrap_matches_sequential_loop_for_any_n_jobs():
+    rng = np.random.default_rng(1)
+    condensed = pdist(rng.normal(size=(150, 2)))
+    D = squareform(condensed)
+    tree = linkage(condensed, method='average')
+    labels_by_k = {k: fcluster(tree, t=k, criterion='maxclust') - 1 for k in (2, 3, 4)}
+
+    # Bucle original: por cada K, B submatrices cuadradas y un linkage por réplica
+    expected = {}
+    for k, labels in labels_by_k.items():
+        draw = np.random.default_rng(7)
+        aris = []
+        for _ in range(10):
+            idx = draw.choice(150, size=90, replace=False)
+            sub = fcluster(linkage(squareform(D[np.ix_(idx, idx)], checks=False), method='average'),
+                           t=k, criterion='maxclust') - 1
+            aris.append(adjusted_rand_score(labels[idx], sub))
+        expected[k] = np.mean(aris)
+
+    sequential = bootstrap_stability(condensed, labels_by_k, B=10, frac=0.6, seed=7, n_jobs=1)
+    parallel = bootstrap_stability(condensed, labels_by_k, B=10, frac=0.6, seed=7, n_jobs=2)
+    assert sequential == parallel
+    assert all(abs(sequential[k]['mean'] - expected[k]) < 1e-12 for k in labels_by_k)
+
+
+def test_workers_are_capped_by_available_memory(monkeypatch):
+    # Réplica con N = 10.000 y frac = 0.6: ~288 MB de condensados + el proceso worker
+    per_worker = stability.WORKER_BASE_BYTES + 16 * (6000 * 5999 // 2)
+    monkeypatch.setattr(stability, 'available_memory_bytes', lambda: 3 * per_worker)
+    assert stability_workers(10_000, frac=0.6, n_jobs=8) == 1
+    monkeypatch.setattr(stability, 'available_memory_bytes', lambda: 100 * per_worker)
+    assert stability_workers(10_000, frac=0.6, n_jobs=8) == 8
+    monkeypatch.setattr(stability, 'available_memory_bytes', lambda: 0)
+    assert stability_workers(10_000, frac=0.6, n_jobs=8) == 1
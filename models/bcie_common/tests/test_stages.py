@@ -0,0 +1,121 @@
+import pytest
+import yaml
+
+from bcie_common.instrumentation import instrument
+from bcie_common.stages import Stage, run_stages
+
+
+def make_project(tmp_path):
+    config_path = tmp_path / "local.yaml"
+    config_path.write_text(yaml.safe_dump({'data': {'scale': 2}, 'model': {'k': 3}}), encoding='utf-8')
+    (tmp_path / "input.txt").write_text("1,2,3", encoding='utf-8')
+    return config_path
+
+
+def make_stages(tmp_path, config_path, calls):
+    def etl(config_path):
+        calls.append('etl')
+        values = (tmp_path / "input.txt").read_text(encoding='utf-8')
+        (tmp_path / "processed.txt").write_text(values, encoding='utf-8')
+
+    def training(config_path):
+        calls.append('training')
+        config = yaml.safe_load(open(config_path, encoding='utf-8'))
+        values = [int(v) for v in (tmp_path / "processed.txt").read_text(encoding='utf-8').split(',')]
+        (tmp_path / "model.txt").write_text(str(sum(values) * config['model']['k']), encoding='utf-8')
+        return {'k': config['model']['k']}
+
+    return [
+        Stage('etl', etl, [config_path], config=['data'], always=True,
+              outputs=[tmp_path / "processed.txt"]),
+        Stage('training', training, [config_path], config=['model'], deps=['etl'],
+              outputs=[tmp_path / "model.txt"]),
+    ]
+
+
+def statuses(report):
+    return {entry['stage']: entry['status'] for entry in report['stages']}
+
+
+def test_unchanged_inputs_are_served_from_cache(tmp_path):
+    config_path = make_project(tmp_path)
+    state_dir = tmp_path / ".cache"
+    calls = []
+
+    first = run_stages(make_stages(tmp_path, config_path, calls), config_path, state_dir=state_dir)
+    second = run_stages(make_stages(tmp_path, config_path, calls), config_path, state_dir=state_dir)
+
+    assert first['success'] and second['success']
+    assert statuses(first) == {'etl': 'ran', 'training': 'ran'}
+    assert statuses(second) == {'etl': 'ran', 'training': 'cached'}
+    assert calls == ['etl', 'training', 'etl']
+    assert (state_dir / "report.json").exists()
+
+
+def test_changed_inputs_and_force_rerun_the_stage(tmp_path):
+    config_path = make_project(tmp_path)
+    state_dir = tmp_path / ".cache"
+    calls = []
+    run_stages(make_stages(tmp_path, config_path, calls), config_path, state_dir=state_dir)
+
+    # Datos nuevos: la salida del ETL cambia y el entrenamiento se repite
+    (tmp_path / "input.txt").write_text("1,2,3,4", encoding='utf-8')
+    report = run_stages(make_stages(tmp_path, config_path, calls), config_path, state_dir=state_dir)
+    assert statuses(report)['training'] == 'ran'
+    assert (tmp_path / "model.txt").read_text(encoding='utf-8') == "30"
+
+    # Cambio en una sección de configuración que lee la etapa
+    config_path.write_text(yaml.safe_dump({'data': {'scale': 2}, 'model': {'k': 1}}), encoding='utf-8')
+    report = run_stages(make_stages(tmp_path, config_path, calls), config_path, state_dir=state_dir)
+    assert statuses(report)['training'] == 'ran'
+
+    # Salida borrada o forzada
+    (tmp_path / "model.txt").unlink()
+    assert statuses(run_stages(make_stages(tmp_path, config_path, calls), config_path, state_dir=state_dir))['training'] == 'ran'
+    forced = run_stages(make_stages(tmp_path, config_path, calls), config_path, force=['training'], state_dir=state_dir)
+    assert statuses(forced)['training'] == 'ran'
+    assert statuses(run_stages(make_stages(tmp_path, config_path, calls), config_path, state_dir=state_dir))['training'] == 'cached'
+
+    # Etapa que el proyecto no define: error, salvo en modo laboratorio (se ignora)
+    with pytest.raises(ValueError):
+        run_stages(make_stages(tmp_path, config_path, calls), config_path, force=['evaluation'], state_dir=state_dir)
+    lab = run_stages(make_stages(tmp_path, config_path, calls), config_path, force=['evaluation', 'training'],
+                     state_dir=state_dir, ignore_unknown=True)
+    assert statuses(lab)['training'] == 'ran'
+
+
+def test_required_failure_stops_the_pipeline(tmp_path):
+    config_path = make_project(tmp_path)
+
+    def broken(config_path):
+        raise ValueError("sin datos")
+
+    stages = [Stage('etl', broken, [config_path], always=True), make_stages(tmp_path, config_path, [])[1]]
+    report = run_stages(stages, config_path, state_dir=tmp_path / ".cache")
+
+    assert not report['success']
+    assert statuses(report) == {'etl': 'failed'}
+
+
+def test_code_fingerprint_covers_project_src(tmp_path, monkeypatch):
+    import bcie_common.stages as stages
+
+    project = tmp_path / "models" / "aprobaciones_demo_2026"
+    (project / "src" / "pipelines").mkdir(parents=True)
+    (project / "src" / "utils").mkdir()
+    (project / "src" / "pipelines" / "training_pipeline.py").write_text("def train(path):\n    pass\n",
+                                                                        encoding='utf-8')
+    (project / "src" / "utils" / "helpers.py").write_text("SCALE = 1\n", encoding='utf-8')
+    monkeypatch.setattr(stages, 'COMMON_DIR', tmp_path / "models" / "bcie_common")
+    namespace = {}
+    source = project / "src" / "pipelines" / "training_pipeline.py"
+    exec(compile(source.read_text(encoding='utf-8'), str(source), 'exec'), namespace)
+
+    # Etapa decorada con `instrument`: la huella es la del módulo real, no la del decorador
+    stage = Stage('training', instrument()(namespace['train']))
+    assert stage.code_paths()[0] == source.resolve()
+    assert stages.project_src(source) == (project / "src").resolve()
+    before = stages.files_fingerprint(stage.code_paths())
+    # Un módulo importado por la etapa (no su propio archivo) cambia: la huella también
+    (project / "src" / "utils" / "helpers.py").write_text("SCALE = 2\n", encoding='utf-8')
+    assert stages.files_fingerprint(stage.code_paths()) != before
@@ -0,0 +1,59 @@
+import os
+
+import pandas as pd
+
+from bcie_common.storage import read_table, records_json, table_exists, write_table
+
+
+def make_frame():
+    return pd.DataFrame({
+        'Pais': ['Honduras', 'Guatemala', 'Honduras'],
+        'Sector_Economico': ['Sector Público', 'Sector Privado', None],
+        'Fecha_Aprobacion': ['2012-01-01', '2015-01-01', '2020-01-01'],
+        'Monto_Aprobado': [1.5, 2.0, 3.25],
+    })
+
+
+def test_parquet_round_trip_is_typed(tmp_path):
+    path = tmp_path / "aprobaciones_limpias.csv"
+    target = write_table(make_frame(), path)
+
+    assert target == path.with_suffix(".parquet")
+    assert path.exists() and table_exists(path)
+
+    df = read_table(path)
+    assert isinstance(df['Pais'].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(df['Fecha_Aprobacion'])
+    assert df['Monto_Aprobado'].tolist() == [1.5, 2.0, 3.25]
+    assert read_table(path, columns=['Pais']).columns.tolist() == ['Pais']
+
+
+def test_configured_format_wins_over_newer_files(tmp_path):
+    path = tmp_path / "aprobaciones_limpias.csv"
+    write_table(make_frame(), path)
+
+    # Exportación CSV editada y un feather de otra corrida, ambos más recientes que el Parquet
+    edited = make_frame().assign(Monto_Aprobado=0.0)
+    edited.to_csv(path, index=False)
+    write_table(edited, path, export_csv=False, format='feather')
+    parquet_mtime = path.with_suffix(".parquet").stat().st_mtime
+    os.utime(path, (parquet_mtime + 10, parquet_mtime + 10))
+
+    assert read_table(path)['Monto_Aprobado'].tolist() == [1.5, 2.0, 3.25]
+    feather = {'data': {'storage_format': 'feather'}}
+    assert read_table(path, config=feather)['Monto_Aprobado'].tolist() == [0.0, 0.0, 0.0]
+    csv = {'data': {'storage_format': 'csv'}}
+    assert read_table(path, config=csv)['Monto_Aprobado'].tolist() == [0.0, 0.0, 0.0]
+
+    path.with_suffix(".parquet").unlink()
+    assert read_table(path)['Monto_Aprobado'].tolist() == [0.0, 0.0, 0.0]
+
+
+def test_csv_format_and_records_json(tmp_path):
+    path = tmp_path / "aprobaciones_clusters.csv"
+    config = {'data': {'storage_format': 'csv'}}
+    assert write_table(make_frame(), path, config) == path
+    assert not path.with_suffix(".parquet").exists()
+
+    write_table(make_frame(), path)
+    assert '"Fecha_Aprobacion":"2012-01-01"' in records_json(read_table(path))
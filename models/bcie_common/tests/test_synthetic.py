@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from bcie_common.benchmarks import growth_exponents, project_records
+from bcie_common.ckan import fetch_records, make_session
+from bcie_common.ckan_stub import StubCkanServer
+from bcie_common.synthetic import RAW_COLUMNS, generate_approvals
+
+
+def test_generator_is_deterministic_and_calibrated():
+    df = generate_approvals(20_000, seed=3)
+
+    assert list(df.columns) == RAW_COLUMNS
+    assert df['_id'].tolist() == list(range(1, 20_001))
+    pd.testing.assert_frame_equal(df, generate_approvals(20_000, seed=3))
+    assert df['PAIS'].nunique() == 13 and df['CANTIDAD_APROBACIONES'].min() >= 1
+    log_amount = np.log(df['MONTO_BRUTO_USD'][df['MONTO_BRUTO_USD'] > 0])
+    assert abs(log_amount.mean() - 17.0) < 0.2 and abs(log_amount.std() - 1.9) < 0.2
+    # Cola pesada, como en el recurso real (percentil 99 ~27 veces la mediana)
+    assert df['MONTO_BRUTO_USD'].quantile(0.99) > 20 * df['MONTO_BRUTO_USD'].median()
+
+    many = generate_approvals(5_000, n_countries=200, seed=3)
+    assert many['PAIS'].nunique() > 150 and 'País 200' in set(many['PAIS'])
+
+
+def test_stub_serves_dataframe_and_project_columns():
+    df = generate_approvals(1_200, seed=1)
+    with StubCkanServer(df) as server:
+        fetched = fetch_records(server.url, server.resource_id, 500, session=make_session())
+    assert fetched['_id'].tolist() == df['_id'].tolist()
+
+    # Proyectos sobre el otro recurso: columnas 'Monto Aprobado', 'Año Aprobación', ...
+    renames = {'Monto Aprobado': 'Monto_Aprobado', 'Año Aprobación': 'Anio_Origen'}
+    columns = project_records(df, renames).columns
+    assert {'Monto Aprobado', 'Año Aprobación', 'Pais', 'Sector_Economico'} <= set(columns)
+    standard = {'ANIO_APROBACION': 'Anio_Origen', 'MONTO_BRUTO_USD': 'Monto_Aprobado', 'PAIS': 'Pais',
+                'SECTOR_INSTITUCIONAL': 'Sector_Economico'}
+    assert project_records(df, standard).columns.tolist() == RAW_COLUMNS
+
+
+def test_growth_exponent_flags_quadratic_steps():
+    entries = [
+        {'project': 'p', 'step': 'train', 'scale': scale, 'status': 'ok', 'wall_s': seconds}
+        for scale, seconds in [(1_000, 0.5), (10_000, 50.0)]
+    ]
+    assert [entry['exponent'] for entry in growth_exponents(entries)] == [None, 2.0]
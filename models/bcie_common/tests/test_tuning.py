@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from bcie_common import tuning
+from bcie_common.tuning import evaluate_params, fixed_cutoffs, successive_halving
+
+FITS = []
+
+
+class TrendModel:
+    """Modelo de prueba con la interfaz de Prophet: tendencia lineal escalada por `damping`."""
+
+    def __init__(self, damping):
+        self.damping = damping
+
+    def fit(self, df):
+        FITS.append(self.damping)
+        t = df['ds'].dt.year.to_numpy(dtype=float)
+        self.slope, self.intercept = np.polyfit(t, df['y'].to_numpy(), 1)
+        self.last_t, self.last_y = t[-1], df['y'].iloc[-1]
+        return self
+
+    def predict(self, df):
+        t = df['ds'].dt.year.to_numpy(dtype=float)
+        yhat = self.last_y + self.damping * self.slope * (t - self.last_t)
+        return pd.DataFrame({'ds': df['ds'], 'yhat': yhat, 'yhat_lower': yhat, 'yhat_upper': yhat})
+
+
+def build_trend_model(params):
+    return TrendModel(params['damping'])
+
+
+def annual_series(years):
+    return pd.DataFrame({
+        'ds': pd.to_datetime([f'{year}-12-31' for year in years]),
+        'y': [100.0 + 7 * (year - 2000) for year in years]
+    })
+
+
+def test_append_keeps_cutoffs_and_reuses_cached_cells(tmp_path):
+    horizon, initial, period = pd.Timedelta('365 days'), pd.Timedelta('730 days'), pd.Timedelta('180 days')
+    df = annual_series(range(2000, 2012))
+    extended = annual_series(range(2000, 2013))
+
+    before = fixed_cutoffs(df, horizon, initial, period)
+    after = fixed_cutoffs(extended, horizon, initial, period)
+    assert after[:len(before)] == before and len(after) > len(before)
+
+    FITS.clear()
+    params = {'damping': 0.5}
+    first = evaluate_params(build_trend_model, params, df, '365 days', cache_dir=str(tmp_path))
+    assert first['status'] == 'OK' and len(FITS) == len(before)
+    # Un año más de datos: solo se ajustan los cortes nuevos
+    second = evaluate_params(build_trend_model, params, extended, '365 days', cache_dir=str(tmp_path))
+    assert second['status'] == 'OK' and len(FITS) == len(after)
+
+
+def test_rmse_matches_overall_error_of_all_cutoffs():
+    df = annual_series(range(2000, 2012))
+    horizon = pd.Timedelta('365 days')
+    cutoffs = fixed_cutoffs(df, horizon, pd.Timedelta('730 days'), pd.Timedelta('180 days'))
+
+    df_cv = pd.concat([
+        tuning.fit_cutoff_forecast(build_trend_model, {'damping': 0.5}, df[df['ds'] <= c + horizon], c, horizon)
+        for c in cutoffs
+    ])
+    expected = np.sqrt(np.mean((df_cv['y'] - df_cv['yhat']) ** 2))
+
+    result = evaluate_params(build_trend_model, {'damping': 0.5}, df, '365 days', cutoffs=cutoffs)
+    assert np.isclose(result['rmse'], expected)
+
+
+def test_successive_halving_keeps_best_candidate_until_all_cutoffs():
+    df = annual_series(range(2000, 2014))
+    horizon = pd.Timedelta('365 days')
+    cutoffs = fixed_cutoffs(df, horizon, pd.Timedelta('730 days'), pd.Timedelta('180 days'))
+    grid = {'damping': [0.0, 0.25, 0.5, 0.75, 1.0, 1.5]}
+
+    trials = successive_halving(build_trend_model, grid, df, '365 days', cutoffs, n_jobs=1, eta=3)
+
+    assert [t['n_cutoffs'] for t in trials if t['rung'] == 0] == [1] * len(grid['damping'])
+    finalists = [t for t in trials if t['n_cutoffs'] == len(cutoffs)]
+    best = min(finalists, key=lambda t: t['rmse'])
+    # La serie es lineal: sin amortiguar la tendencia el error es nulo
+    assert best['params'] == {'damping': 1.0} and np.isclose(best['rmse'], 0.0)
@@ -0,0 +1,307 @@
+"""
+Motor de búsqueda de hiperparámetros compartido por los proyectos de la familia Prophet.
+
+Validación cruzada con cortes sobre una rejilla fija (`fixed_cutoffs`), memoización en
+disco de cada pronóstico por corte (joblib.Memory) y tres estrategias de búsqueda
+(successive halving, TPE de Optuna y rejilla completa), todas sobre un único pool de
+procesos de tamaño `n_jobs`.
+
+El motor no importa Prophet: cada proyecto aporta una fábrica de modelos
+`model_factory(params)` que devuelve un objeto con la interfaz de Prophet
+(`fit(df)` y `predict(df[['ds']])` con columnas yhat, yhat_lower, yhat_upper). La
+fábrica debe ser una función de módulo (se envía a los workers y forma parte de la
+clave de la caché).
+
+Uso (desde `src/pipelines/tuning_pipeline.py` de cada proyecto):
+    run_tuning(config_path, build_model, load_and_prep_data, DEFAULT_PARAM_GRID)
+"""
+
+import itertools
+import logging
+
+import numpy as np
+import pandas as pd
+import yaml
+from joblib import Memory, Parallel, delayed, effective_n_jobs
+
+logger = logging.getLogger(__name__)
+
+
+def fixed_cutoffs(df, horizon, initial, period):
+    """
+    Cortes de validación cruzada sobre una rejilla fija: ds.min() + initial + m * period.
+
+    `prophet.diagnostics.generate_cutoffs` ancla los cortes en ds.max() - horizon, así que
+    al añadir un año (365 días, no múltiplo de `period`) se desplazan todos y ninguna celda
+    de la caché coincide. Aquí el origen no depende del último dato: una ampliación de la
+    serie conserva los cortes previos y solo agrega los nuevos al final. Como en Prophet,
+    cada corte necesita su horizonte completo observado y datos en (cutoff, cutoff + horizon].
+    """
+    ds = pd.to_datetime(df['ds'])
+    origin = ds.min() + initial
+    last = ds.max() - horizon
+    if last < origin:
+        raise ValueError('Less data than horizon after initial window. Make horizon or initial shorter.')
+
+    grid = [origin + m * period for m in range(int((last - origin) // period) + 1)]
+    cutoffs = [c for c in grid if ((ds > c) & (ds <= c + horizon)).any()]
+    if not cutoffs:
+        raise ValueError('No cutoff with data in its horizon. Make period shorter.')
+    return cutoffs
+
+
+def fit_cutoff_forecast(model_factory, params, df_window, cutoff, horizon):
+    """
+    Ajusta `model_factory(params)` con la historia hasta `cutoff` y pronostica la ventana de prueba.
+
+    Equivale a un corte de `prophet.diagnostics.cross_validation` (mismas columnas
+    de salida). `df_window` solo contiene datos hasta cutoff + horizon, de modo que
+    una ampliación de la serie no invalida los cortes anteriores en la caché.
+    """
+    history = df_window[df_window['ds'] <= cutoff]
+    if history.shape[0] < 2:
+        raise Exception('Less than two datapoints before cutoff. Increase initial window.')
+
+    model = model_factory(params)
+    model.fit(history)
+
+    df_test = df_window[df_window['ds'] > cutoff]
+    forecast = model.predict(df_test[['ds']])
+    return pd.DataFrame({
+        'ds': forecast['ds'].to_numpy(),
+        'yhat': forecast['yhat'].to_numpy(),
+        'yhat_lower': forecast['yhat_lower'].to_numpy(),
+        'yhat_upper': forecast['yhat_upper'].to_numpy(),
+        'y': df_test['y'].to_numpy(),
+        'cutoff': cutoff
+    })
+
+
+def evaluate_params(model_factory, params, df, horizon_str, cutoffs=None, initial='730 days', period='180 days', cache_dir=None):
+    """
+    Entrena un modelo con UN set de parámetros y calcula el error (RMSE).
+
+    Si se indican `cutoffs`, la validación cruzada se limita a esos cortes
+    (permite evaluar con presupuestos crecientes en successive halving).
+
+    Con `cache_dir`, cada pronóstico por corte se memoiza en disco (joblib.Memory)
+    con clave (datos hasta cutoff + horizon, cutoff, params): al ampliar la rejilla
+    o añadir datos solo se calculan las celdas nuevas (los cortes salen de la rejilla
+    fija de `fixed_cutoffs`).
+    """
+    try:
+        # Cross Validation (equivalente a prophet.diagnostics.cross_validation)
+        # initial: Con cuánto entrena antes de validar (ej. 730 days = 2 años)
+        # period: Cada cuánto hace el corte (ej. 180 days = 6 meses)
+        # horizon: Cuánto predice en la prueba (ej. 365 days = 1 año)
+        # Sin paralelismo interno: el presupuesto de workers lo administra el motor de búsqueda
+        horizon = pd.Timedelta(horizon_str)
+        if cutoffs is None:
+            cutoffs = fixed_cutoffs(df, horizon, pd.Timedelta(initial), pd.Timedelta(period))
+
+        forecast_fn = fit_cutoff_forecast
+        if cache_dir:
+            forecast_fn = Memory(cache_dir, verbose=0).cache(fit_cutoff_forecast)
+
+        df_sorted = df[['ds', 'y']].sort_values('ds').reset_index(drop=True)
+        df_cv = pd.concat([
+            forecast_fn(
+                model_factory,
+                params,
+                df_sorted[df_sorted['ds'] <= cutoff + horizon].reset_index(drop=True),
+                cutoff,
+                horizon
+            )
+            for cutoff in cutoffs
+        ], ignore_index=True)
+
+        # Igual a performance_metrics(df_cv, rolling_window=1): una sola ventana con todos los puntos
+        rmse = float(np.sqrt(np.mean((df_cv['y'] - df_cv['yhat']) ** 2)))
+
+        return {'params': params, 'rmse': rmse, 'status': 'OK'}
+
+    except Exception as e:
+        return {'params': params, 'rmse': float('inf'), 'status': str(e)}
+
+
+def evaluate_batch(model_factory, candidates, df, horizon_str, cutoffs, n_jobs, cache_dir=None):
+    # Un único pool por lote: nunca hay más de n_jobs ajustes simultáneos
+    return Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_params)(model_factory, p, df, horizon_str, cutoffs, cache_dir=cache_dir) for p in candidates
+    )
+
+
+def successive_halving(model_factory, param_grid, df, horizon_str, cutoffs, n_jobs, eta=3, min_cutoffs=1, cache_dir=None):
+    """
+    Successive halving sobre el número de cortes de validación cruzada.
+
+    Todas las combinaciones se evalúan primero con los `min_cutoffs` cortes más recientes;
+    en cada ronda sobrevive 1/eta de los candidatos y el número de cortes se multiplica
+    por eta, hasta evaluar a los finalistas con todos los cortes.
+    """
+    survivors = [dict(zip(param_grid.keys(), v)) for v in itertools.product(*param_grid.values())]
+    n_cutoffs = min(max(1, min_cutoffs), len(cutoffs))
+    trials = []
+    rung = 0
+
+    while True:
+        results = evaluate_batch(model_factory, survivors, df, horizon_str, cutoffs[-n_cutoffs:], n_jobs, cache_dir)
+        for r in results:
+            trials.append({**r, 'rung': rung, 'n_cutoffs': n_cutoffs})
+        logger.info(f"  Ronda {rung}: {len(survivors)} candidatos evaluados con {n_cutoffs} cortes")
+
+        if n_cutoffs >= len(cutoffs):
+            break
+
+        ranked = sorted(results, key=lambda r: r['rmse'])
+        survivors = [r['params'] for r in ranked[:max(1, len(ranked) // eta)]]
+        n_cutoffs = len(cutoffs) if len(survivors) == 1 else min(len(cutoffs), n_cutoffs * eta)
+        rung += 1
+
+    return trials
+
+
+def tpe_search(model_factory, param_grid, df, horizon_str, cutoffs, n_jobs, n_trials=20, seed=42, cache_dir=None):
+    """
+    Búsqueda bayesiana (TPE de Optuna) con evaluación por lotes de tamaño n_jobs.
+
+    Se usa la interfaz ask/tell para que las evaluaciones corran en el mismo pool de
+    procesos que el resto del motor (Optuna con n_jobs usaría hilos).
+    """
+    import optuna
+    from optuna.trial import TrialState
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    study = optuna.create_study(direction='minimize', sampler=optuna.samplers.TPESampler(seed=seed))
+    batch_size = effective_n_jobs(n_jobs)
+    trials = []
+
+    while len(trials) < n_trials:
+        asked = [study.ask() for _ in range(min(batch_size, n_trials - len(trials)))]
+        candidates = [{k: t.suggest_categorical(k, v) for k, v in param_grid.items()} for t in asked]
+        results = evaluate_batch(model_factory, candidates, df, horizon_str, cutoffs, n_jobs, cache_dir)
+
+        for trial, r in zip(asked, results):
+            if np.isfinite(r['rmse']):
+                study.tell(trial, r['rmse'])
+            else:
+                study.tell(trial, state=TrialState.FAIL)
+            trials.append({**r, 'rung': 0, 'n_cutoffs': len(cutoffs)})
+
+    return trials
+
+
+def tune_group(model_factory, group_id, df_group, tuning_cfg, param_grid, horizon_str, n_jobs):
+    """
+    Ejecuta la búsqueda configurada para una serie y devuelve todos los ensayos.
+    """
+    horizon = pd.Timedelta(horizon_str)
+    initial = pd.Timedelta(tuning_cfg.get('initial', '730 days'))
+    period = pd.Timedelta(tuning_cfg.get('period', '180 days'))
+    cutoffs = fixed_cutoffs(df_group, horizon, initial, period)
+
+    cache_dir = tuning_cfg.get('cache_dir')
+    search = tuning_cfg.get('search', 'halving')
+    trials = []
+    if search == 'tpe':
+        try:
+            trials = tpe_search(
+                model_factory, param_grid, df_group, horizon_str, cutoffs, n_jobs,
+                n_trials=tuning_cfg.get('n_trials', 20), seed=tuning_cfg.get('seed', 42),
+                cache_dir=cache_dir
+            )
+        except ImportError:
+            logger.warning("Optuna no está instalado; se utilizará successive halving.")
+            search = 'halving'
+
+    if search == 'halving':
+        trials = successive_halving(
+            model_factory, param_grid, df_group, horizon_str, cutoffs, n_jobs,
+            eta=tuning_cfg.get('eta', 3), min_cutoffs=tuning_cfg.get('min_cutoffs', 1),
+            cache_dir=cache_dir
+        )
+    elif search == 'grid':
+        trials = successive_halving(
+            model_factory, param_grid, df_group, horizon_str, cutoffs, n_jobs, min_cutoffs=len(cutoffs),
+            cache_dir=cache_dir
+        )
+
+    for t in trials:
+        t['group_id'] = group_id
+        t['search'] = search
+    return trials
+
+
+def run_tuning(config_path, model_factory, load_data, default_param_grid):
+    """
+    Búsqueda completa del proyecto: serie GLOBAL y, con `per_group`, cada grupo (país).
+
+    `load_data(config)` devuelve el panel largo (ds, group_id, y) del proyecto y
+    `default_param_grid` se usa cuando la sección `tuning` no define `param_grid`.
+    Escribe la tabla de mejores parámetros por grupo en `tuning.output_path`.
+    """
+    # 1. Cargar Configuración y Datos
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+
+    df_all = load_data(config)
+    tuning_cfg = config.get('tuning', {})
+
+    # La serie "Total Global" siempre se optimiza; con per_group también cada grupo (país)
+    logger.info("Agrupando datos para encontrar hiperparámetros globales...")
+    groups = {'GLOBAL': df_all.groupby('ds')['y'].sum().reset_index()}
+    if tuning_cfg.get('per_group', True):
+        for group_id, df_group in df_all.groupby('group_id', observed=True):
+            groups[group_id] = df_group[['ds', 'y']].reset_index(drop=True)
+
+    # 2. Definir la Rejilla de Búsqueda
+    param_grid = tuning_cfg.get('param_grid', default_param_grid)
+    n_combinations = int(np.prod([len(v) for v in param_grid.values()]))
+
+    if tuning_cfg.get('search', 'halving') not in ('halving', 'tpe', 'grid'):
+        raise KeyError(f"Estrategia de búsqueda no soportada: {tuning_cfg.get('search')}")
+
+    # Presupuesto global de workers compartido por todas las búsquedas
+    n_jobs = tuning_cfg.get('n_jobs', config.get('system', {}).get('n_jobs', -1))
+    forecast_cfg = config.get('forecast', config['model'])
+    horizon_days = f"{forecast_cfg['horizon_years'] * 365} days"
+
+    logger.info(f"--- Iniciando Optimización ({tuning_cfg.get('search', 'halving')}) ---")
+    logger.info(f"Combinaciones posibles: {n_combinations} | Grupos: {len(groups)} | Workers: {effective_n_jobs(n_jobs)}")
+
+    # 3. Búsqueda por grupo (secuencial entre grupos, paralela dentro de cada uno)
+    all_trials = []
+    for group_id, df_group in groups.items():
+        logger.info(f"Optimizando grupo: {group_id}")
+        try:
+            all_trials.extend(tune_group(model_factory, group_id, df_group, tuning_cfg, param_grid, horizon_days, n_jobs))
+        except ValueError as e:
+            logger.warning(f"Grupo {group_id} omitido (historia insuficiente para la validación): {e}")
+
+    if not all_trials:
+        logger.error("No se completó ninguna evaluación.")
+        return
+
+    # 4. Mejor resultado por grupo (solo ensayos evaluados con el máximo de cortes del grupo)
+    trials_df = pd.DataFrame(all_trials)
+    max_cutoffs = trials_df.groupby('group_id')['n_cutoffs'].transform('max')
+    finalists = trials_df[trials_df['n_cutoffs'] == max_cutoffs]
+    best_df = finalists.sort_values('rmse').groupby('group_id', sort=False).head(1)
+    best_df = pd.concat(
+        [best_df[['group_id', 'search', 'n_cutoffs', 'rmse']].reset_index(drop=True),
+         pd.DataFrame(best_df['params'].tolist())],
+        axis=1
+    )
+
+    global_best = best_df[best_df['group_id'] == 'GLOBAL']
+    if not global_best.empty:
+        logger.info("\n" + "="*30)
+        logger.info(f"🏆 MEJORES PARÁMETROS GLOBALES (RMSE: {global_best['rmse'].iloc[0]:.2f})")
+        logger.info(f"{global_best[list(param_grid.keys())].iloc[0].to_dict()}")
+        logger.info("="*30)
+
+    # 5. Guardar tabla de recomendaciones por grupo
+    output_path = tuning_cfg.get('output_path', "best_params_by_group.csv")
+    best_df.to_csv(output_path, index=False)
+
+    logger.info(f"✅ Recomendaciones por grupo guardadas en '{output_path}'. Copia estos valores a tu config/local.yaml")
@@ -0,0 +1,42 @@
+"""
+Benchmark de escalamiento de los modelos con datos sintéticos (ver bcie_common/benchmarks.py).
+
+Uso (desde cualquier carpeta):
+    python models/run_benchmarks.py                                  10^3, 10^4 y 10^5 registros
+    python models/run_benchmarks.py --scales 10000 100000 1000000 --timeout 1800
+    python models/run_benchmarks.py --series 200 --projects aprobaciones_prophet_2026
+
+Genera models/.cache/benchmarks/scaling.csv (tiempo, CPU, pico de RSS y exponente de
+crecimiento por proyecto, paso y escala).
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parent))
+from bcie_common.benchmarks import DEFAULT_SCALES, run_benchmarks
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laboratorio BCIE: benchmark de escalamiento")
+    parser.add_argument("--scales", nargs="+", type=int, default=list(DEFAULT_SCALES), metavar="N",
+                        help="Registros sintéticos por escala")
+    parser.add_argument("--series", type=int, default=None, help="Número de países (por defecto, 13)")
+    parser.add_argument("--projects", nargs="+", metavar="PROYECTO", help="Proyectos (por defecto, todos)")
+    parser.add_argument("--timeout", type=float, default=None, help="Segundos máximos por paso")
+    parser.add_argument("--threads", type=int, default=None, help="Hilos por proceso")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(names=args.projects, scales=args.scales, series=args.series,
+                            timeout=args.timeout, threads=args.threads, seed=args.seed)
+    return 0 if all(entry['status'] == 'ok' for entry in report['entries']) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Ejecuta todos los proyectos del laboratorio en paralelo (ver bcie_common/lab.py).
+
+Uso (desde cualquier carpeta):
+    python models/run_lab.py                               Todos los proyectos
+    python models/run_lab.py --workers 4                   Máximo 4 proyectos simultáneos
+    python models/run_lab.py --projects aprobaciones_kmeans_2026 aprobaciones_gmm_2026
+    python models/run_lab.py --force all                   Reenvía --force a cada run.py
+    python models/run_lab.py --force training              Solo en los proyectos con etapa 'training'
+    python models/run_lab.py --force aprobaciones_TimesFM_2026:evaluation
+
+Genera models/reporte_modelos.csv (estado y duración por proyecto) y termina con código 1 si
+algún proyecto falló.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Paquete compartido del laboratorio (models/bcie_common)
+sys.path.append(str(Path(__file__).resolve().parent))
+from bcie_common.lab import run_lab
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laboratorio BCIE: ejecución paralela de todos los modelos")
+    parser.add_argument("--projects", nargs="+", metavar="PROYECTO", help="Proyectos a ejecutar (por defecto, todos)")
+    parser.add_argument("--workers", type=int, default=None, help="Proyectos simultáneos (por defecto, núcleos)")
+    parser.add_argument("--timeout", type=float, default=None, help="Segundos máximos por proyecto")
+    parser.add_argument("--no-shared-etl", action="store_true", help="No sincroniza antes la extracción compartida")
+    parser.add_argument("--force", action="append", default=[], metavar="[PROYECTO:]ETAPA",
+                        help="Etapa a forzar en los proyectos que la definen, o solo en PROYECTO")
+    args = parser.parse_args(argv)
+
+    report = run_lab(names=args.projects, workers=args.workers, force=args.force,
+                     timeout=args.timeout, warm_cache=not args.no_shared_etl)
+    return 0 if report['success'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())